@@ -7,3 +7,8 @@
 from __future__ import print_function, unicode_literals, division
 
 __version__ = '1.0.5'
+
+# pylint: disable=wrong-import-position
+from ff.api import search, Search
+
+__all__ = ['search', 'Search']
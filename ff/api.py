@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Library API: search for items without running `ff` command
+
+    Example:
+        import ff
+        for entry in ff.search('*.py', ['/src'], mode='files', limit=10):
+            print(entry.path)
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import itertools
+import os, os.path
+
+from ff.config import Config
+from ff.evaluator import AllOf
+from ff import pattern as ff_pattern
+from ff import predicates
+from ff import scanner
+from ff.utils import u, normalize
+
+__all__ = ['search', 'Search']
+
+## options of pattern, see: pattern.Pattern
+_PATTERN_OPTIONS = ('fnmatch_begin', 'fnmatch_end', 'ignorecase', 'regex_dotall', 'regex_multiline',
+                    'regexp', 'fuzzy', 'magic_pattern')
+## options passed to Scanner as they are
+_SCANNER_OPTIONS = ('depth', 'min_depth', 'mode', 'include_vcs', 'respect_ignore', 'xdev', 'follow_symlinks',
+                    'skipped_fs_types', 'path_search', 'invert_match', 'engine', 'jobs', 'ordered', 'order',
+                    'sort_by_score', 'bytes_mode', 'index', 'stats')
+## metadata tests, see: predicates.Metadata
+_METADATA_OPTIONS = ('size', 'newer', 'older', 'types', 'perm', 'user', 'group', 'empty')
+
+
+def _compile_pattern(pattern, options):
+    """
+    Compile pattern(s) with given options
+    :param pattern:str|list of str|pattern.Pattern|pattern.PatternSet
+    :param options:dict
+    :return:pattern.Pattern|pattern.PatternSet
+    """
+    if isinstance(pattern, (ff_pattern.Pattern, ff_pattern.PatternSet)):
+        return pattern
+
+    sources = [pattern] if not isinstance(pattern, (list, tuple)) else pattern
+    compiled = []
+    for source in sources:
+        pat = ff_pattern.Pattern()
+        for opt in _PATTERN_OPTIONS:
+            setattr(pat, opt, options.get(opt, False))
+        pat.pattern = source
+        pat.compile()
+        compiled.append(pat)
+
+    return compiled[0] if len(compiled) == 1 else ff_pattern.PatternSet(compiled)
+
+
+def _prepare_metadata(options):
+    """
+    Prepare metadata tests from options. Values can be given as in command line
+    (ie. size='>10k'), or already parsed.
+    :param options:dict
+    :return:predicates.Metadata|None
+    """
+    parsers = {
+        'size': predicates.parse_size,
+        'newer': predicates.parse_time,
+        'older': predicates.parse_time,
+        'types': predicates.parse_types,
+        'perm': predicates.parse_perm,
+        'user': predicates.parse_user,
+        'group': predicates.parse_group,
+    }
+
+    kwargs = {}
+    for opt, parse in parsers.items():
+        value = options.get(opt)
+        if value is None:
+            continue
+        if isinstance(value, (type(''), bytes)):
+            value = parse(u(value))
+        kwargs[opt] = value
+
+    kwargs['uid'] = kwargs.pop('user', None)
+    kwargs['gid'] = kwargs.pop('group', None)
+    metadata = predicates.Metadata(empty=options.get('empty', False), **kwargs)
+    return metadata if metadata else None
+
+
+class Search(object):
+    """
+    Lazy iterator of found items (scanner.Entry).
+
+    Items are searched while iterating, so walk through filesystem stops as soon as
+    iteration ends: after `limit` items, after first item with `first_only`, after
+    call to `cancel`, or when caller just stops iterating (then `cancel` should be called
+    to release resources immediately, or Search should be used as context manager).
+    """
+
+    def __init__(self, cfg, limit=None):
+        """
+        Initializer.
+        :param cfg: configuration for scanner.Scanner
+        :param limit:int|None - maximal number of returned items
+        """
+        self.scanner = scanner.Scanner(cfg)
+        self.limit = limit
+        self.cancelled = False
+        self._walker = None
+        self._items = None
+
+    def __iter__(self):
+        if self._items is None and not self.cancelled:
+            self._walker = self._items = iter(self.scanner)
+            if self.limit is not None:
+                self._items = itertools.islice(self._walker, self.limit)
+        return self
+
+    def __next__(self):
+        if self.cancelled:
+            raise StopIteration
+        if self._items is None:
+            iter(self)
+
+        try:
+            return next(self._items)
+        except StopIteration:
+            self.cancel()
+            raise
+
+    next = __next__
+
+    def cancel(self):
+        """
+        Stop searching: no more items are returned, walk through filesystem
+        is stopped and resources (ie. threads) are released.
+        """
+        self.cancelled = True
+        self._items = None
+        ## stop generators (and threads pool) of scanner
+        if self._walker is not None:
+            self._walker.close()
+            self._walker = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cancel()
+
+
+# pylint: disable=too-many-locals
+def search(pattern, sources=None, limit=None, first_only=False, tests=None, excluded_paths=None, **options):
+    """
+    Search for items matching pattern in sources.
+
+    Accepted options are the same as command line arguments of `ff`:
+        * pattern options: fnmatch_begin, fnmatch_end, ignorecase, regex_dotall,
+            regex_multiline, regexp, fuzzy, magic_pattern
+        * scanning options: depth, min_depth, mode (one of scanner.MODE_*), include_vcs, respect_ignore,
+            xdev, follow_symlinks, skipped_fs_types, path_search, invert_match, engine, jobs, ordered, order,
+            sort_by_score, bytes_mode, index (ff.index.Index or ff.tree.CompactTree), stats (ff.stats.Stats)
+        * metadata tests: size, newer, older, types, perm, user, group, empty (see: ff.predicates)
+
+    :param pattern:str|list of str|pattern.Pattern|pattern.PatternSet - with many patterns
+        items matching any of them are found
+    :param sources:list of str|str - directories to search in (default: current directory)
+    :param limit:int|None - return at most `limit` items
+    :param first_only:bool - return only first found item
+    :param tests:list - additional tests (ie. plugin.FFPlugin with prepared predicate, or
+        evaluator.AnyOf), all of them must pass
+    :param excluded_paths:list of str - paths skipped while scanning
+    :return:Search - lazy iterator of scanner.Entry
+    :raise TypeError: on unknown option
+    :raise pattern.PatternError: on invalid pattern
+    :raise predicates.PredicateError: on invalid metadata test
+    """
+    unknown = set(options) - set(_PATTERN_OPTIONS + _SCANNER_OPTIONS + _METADATA_OPTIONS)
+    if unknown:
+        raise TypeError('search() got unexpected keyword arguments: %s' % ', '.join(sorted(unknown)))
+
+    cfg = Config()
+    cfg.invert_match = False
+    cfg.index = None
+    cfg.stats = None
+    for opt in _SCANNER_OPTIONS:
+        if opt in options:
+            setattr(cfg, opt, options[opt])
+
+    cfg.pattern = _compile_pattern(pattern, options)
+
+    if sources is None:
+        sources = ['.']
+    elif not isinstance(sources, (list, tuple)):
+        sources = [sources]
+    cfg.sources = [normalize(os.path.abspath(u(source))) for source in sources]
+    cfg.excluded_paths = [os.path.abspath(normalize(u(path))).rstrip(os.sep) for path in excluded_paths or []]
+
+    tests = list(tests or [])
+    metadata = _prepare_metadata(options)
+    if metadata is not None:
+        tests.insert(0, metadata)
+    cfg.tests = AllOf(tests)
+
+    if first_only:
+        limit = 1
+    return Search(cfg, limit)
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Benchmarks: generate synthetic directories trees, and measure time of scanning them
+
+    Every stage of search is timed separately (walk, normalize, match, tests, output),
+    and whole search is timed end to end, for every kind of pattern. Results are
+    written as JSON, so can be compared between versions.
+
+    Usage:
+        python -m ff.bench [--shape SHAPE ...] [--scale SCALE] [--repeat N] [--output FILE]
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import argparse
+import io
+import itertools
+import json
+import os, os.path
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+import unicodedata
+
+import ff
+from ff import cli
+from ff import scanner
+from ff.config import Config
+from ff.evaluator import AllOf
+from ff.output import Output
+from ff.pattern import Pattern
+from ff.plugin import stat_cache
+from ff.predicates import Metadata, parse_size
+from ff.utils import normalize, fsdecode, u
+
+__all__ = ['SHAPES', 'PATTERNS', 'STAGES', 'make_tree', 'run_benchmark', 'main']
+
+## shapes of generated trees
+SHAPE_WIDE = 'wide'
+SHAPE_DEEP = 'deep'
+SHAPE_UNICODE = 'unicode'
+SHAPE_EXCLUDES = 'excludes'
+SHAPE_VCS = 'vcs'
+SHAPES = (SHAPE_WIDE, SHAPE_DEEP, SHAPE_UNICODE, SHAPE_EXCLUDES, SHAPE_VCS)
+
+## kind of pattern, pattern, options of pattern.Pattern
+PATTERNS = (
+    ('fnmatch', '*_1*.py', {}),
+    ('regexp', r'_\d+\.py$', {'regexp': True}),
+    ('fuzzy', 'mdl1', {'fuzzy': True}),
+    ('magic', r'g/^module_\d+/i', {'magic_pattern': True}),
+)
+
+STAGES = ('walk', 'normalize', 'match', 'tests', 'output')
+
+_WORDS = ('module', 'test', 'data', 'config', 'README', 'main', 'utils', 'Makefile')
+## in NFD form, so normalization has something to do
+_UNICODE_WORDS = tuple(unicodedata.normalize('NFD', word) for word in
+                       ('zażółć', 'gęślą', 'jaźń', 'Ärger', 'naïve', 'ﬁle', 'ＡＢＣ', 'żółw'))
+_EXTENSIONS = ('.py', '.txt', '.c', '.md', '.json', '')
+
+
+def _count(base, scale):
+    """ Number of items for given scale, at least one
+        :param base:int - number of items for scale 1
+        :param scale:float
+        :return:int
+    """
+    return max(1, int(base * scale))
+
+
+def _make_files(rng, path, count, words=_WORDS):
+    """ Create directory `path` with `count` files with random names
+        :param rng:random.Random
+        :param path:str
+        :param count:int
+        :param words:tuple of str - first part of names
+        :return:int - number of created files
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    for i in range(count):
+        name = '%s_%d%s' % (rng.choice(words), i, rng.choice(_EXTENSIONS))
+        with io.open(os.path.join(path, name), 'wb') as fh:
+            fh.write(b'x' * rng.randint(0, 2048))
+    return count
+
+
+def make_tree(root, shape, scale=1.0, seed=0):
+    """
+    Generate synthetic directories tree. The same shape, scale and seed give
+    always the same tree.
+    :param root:str - directory in which tree is created
+    :param shape:str - one of SHAPES:
+        * wide - many directories with many files, just under root
+        * deep - long chains of nested directories
+        * unicode - non-ASCII names, not normalized
+        * excludes - like wide, but many of directories are on list of excluded paths
+        * vcs - many projects, every one with its VCS directory
+    :param scale:float - multiplier of number of items (about 5000 files for scale 1)
+    :param seed:int
+    :return:dict - number of created `files` and `dirs`, and `excluded_paths`
+    """
+    rng = random.Random('%s:%s' % (shape, seed))
+    files = dirs = 0
+    excluded_paths = []
+
+    if shape in (SHAPE_WIDE, SHAPE_EXCLUDES, SHAPE_UNICODE):
+        words = _UNICODE_WORDS if shape == SHAPE_UNICODE else _WORDS
+        files += _make_files(rng, root, _count(100, scale), words)
+        for i in range(_count(50, scale)):
+            path = os.path.join(root, '%s_dir%d' % (rng.choice(words), i))
+            files += _make_files(rng, path, 100, words)
+            dirs += 1
+            if shape == SHAPE_EXCLUDES and i % 2:
+                excluded_paths.append(path)
+    elif shape == SHAPE_DEEP:
+        for i in range(_count(5, scale)):
+            path = os.path.join(root, 'chain_%d' % i)
+            for level in range(40):
+                path = os.path.join(path, '%s_%d' % (rng.choice(_WORDS), level))
+                files += _make_files(rng, path, 25)
+                dirs += 1
+    elif shape == SHAPE_VCS:
+        for i in range(_count(50, scale)):
+            path = os.path.join(root, 'project_%d' % i)
+            files += _make_files(rng, os.path.join(path, 'src'), 50)
+            files += _make_files(rng, os.path.join(path, '.git', 'objects'), 50)
+            dirs += 4
+    else:
+        raise ValueError('unknown shape: %s' % shape)
+
+    return {'files': files, 'dirs': dirs, 'excluded_paths': excluded_paths}
+
+
+def _compile(kind_pattern, options):
+    """ Compile pattern
+        :param kind_pattern:str
+        :param options:dict - options of pattern.Pattern
+        :return:pattern.Pattern
+    """
+    pat = Pattern()
+    for opt, value in options.items():
+        setattr(pat, opt, value)
+    pat.pattern = kind_pattern
+    pat.compile()
+    return pat
+
+
+def _config(root, pat, excluded_paths, **options):
+    """ Prepare configuration for scanner.Scanner
+        :param root:str
+        :param pat:pattern.Pattern
+        :param excluded_paths:list of str
+        :param options: other options of Scanner
+        :return:config.Config
+    """
+    cfg = Config()
+    cfg.sources = [root]
+    cfg.pattern = pat
+    cfg.excluded_paths = excluded_paths
+    cfg.invert_match = False
+    cfg.tests = AllOf([])
+    cfg.index = None
+    cfg.stats = None
+    for opt, value in options.items():
+        setattr(cfg, opt, value)
+    return cfg
+
+
+def _best(func, repeat, setup=None):
+    """ Measure time of calling `func`, best of `repeat` runs
+        :param func:callable - called with result of `setup`
+        :param repeat:int
+        :param setup:callable|None - called before every run, not measured
+        :return:float - in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = timeit.default_timer()
+        func(arg)
+        elapsed = timeit.default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _walk(cfg):
+    """ Walk through sources, without matching items
+        :param cfg:config.Config
+        :return:list of scanner.Entry
+    """
+    scn = scanner.Scanner(cfg)
+    return list(itertools.chain.from_iterable(scn._walk(source) for source in cfg.sources))
+
+
+def _output_config():
+    """ Configuration for cli.process_item: items are written to memory
+        :return:argparse.Namespace
+    """
+    return argparse.Namespace(display=True, prefix=False, show_patterns=False, colorize=False, delim='\n',
+                              executor=None, output=Output(io.BytesIO(), encoding='utf-8'))
+
+
+def _process_items(items):
+    """ Write items, as `ff` does
+        :param items:list of scanner.Entry
+    """
+    cfg = _output_config()
+    for item in items:
+        cli.process_item(cfg, item)
+    cfg.output.flush()
+
+
+# pylint: disable=too-many-locals
+def run_benchmark(root, excluded_paths=None, repeat=3):
+    """
+    Measure time of every stage of search in `root`, and time of whole search
+    for every kind of pattern (see: PATTERNS).
+
+    Stages are measured separately: walk (listing directories, in bytes mode,
+    so names are not decoded), normalize (decoding and normalization of names),
+    match (of normalized names, per kind of pattern), tests (metadata test, with
+    empty stat cache) and output (writing of all items, to memory).
+    :param root:str
+    :param excluded_paths:list of str
+    :param repeat:int - every measurement is repeated, and best time is taken
+    :return:dict
+    """
+    excluded_paths = excluded_paths or []
+    patterns = [(kind, _compile(kind_pattern, options)) for kind, kind_pattern, options in PATTERNS]
+    any_pattern = _compile('', {})
+
+    bytes_cfg = _config(root, any_pattern, excluded_paths, bytes_mode=True)
+    fs_names = [item.fs_name for item in _walk(bytes_cfg)]
+    names = [normalize(fsdecode(name)) for name in fs_names]
+
+    cfg = _config(root, any_pattern, excluded_paths)
+    tests = AllOf([Metadata(size=parse_size('>1k'))])
+
+    def walk_and_clear():
+        """ Items with empty stat cache """
+        stat_cache.clear()
+        return _walk(cfg)
+
+    stages = {
+        'walk': _best(lambda _: _walk(bytes_cfg), repeat),
+        'normalize': _best(lambda _: [normalize(fsdecode(name)) for name in fs_names], repeat),
+        'match': dict((kind, _best(lambda _, pat=pat: [pat.match(name) for name in names], repeat))
+                      for kind, pat in patterns),
+        'tests': _best(lambda items: [tests.test(item) for item in items], repeat, walk_and_clear),
+        'output': _best(_process_items, repeat, lambda: _walk(cfg)),
+    }
+
+    end_to_end = {}
+    matched = {}
+    for kind, pat in patterns:
+        kind_cfg = _config(root, pat, excluded_paths)
+        end_to_end[kind] = _best(lambda _, kind_cfg=kind_cfg: list(scanner.Scanner(kind_cfg)), repeat)
+        matched[kind] = len(list(scanner.Scanner(kind_cfg)))
+
+    return {
+        'items': len(names),
+        'stages': stages,
+        'end_to_end': end_to_end,
+        'matched': matched,
+    }
+
+
+def parse_input_args(args):
+    """ Parse command line arguments
+        :param args:list of str
+        :return:argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(prog='python -m ff.bench',
+                                     description='Measure speed of ff on synthetic directories trees')
+    parser.add_argument('--shape', action='append', choices=SHAPES, dest='shapes',
+                        help='Shape of generated tree, can be given many times (default: all)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplier of number of generated items (default: 1, about 5000 files per tree)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repeat every measurement N times, and take the best time (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for names generator (default: 0)')
+    parser.add_argument('--dir', help='Generate trees in given directory (default: temporary one, removed at exit)')
+    parser.add_argument('--output', '-o', help='Write results to file (default: stdout)')
+
+    args = parser.parse_args(args)
+    args.shapes = args.shapes or list(SHAPES)
+    return args
+
+
+def main(args=None):
+    """ Run benchmarks
+        :param args:list of str|None - default: sys.argv[1:]
+    """
+    args = parse_input_args(sys.argv[1:] if args is None else args)
+
+    base_dir = u(args.dir) if args.dir else tempfile.mkdtemp(prefix='ff-bench-')
+    results = []
+    try:
+        for shape in args.shapes:
+            root = os.path.join(os.path.abspath(base_dir), shape)
+            if os.path.exists(root):
+                shutil.rmtree(root)
+            info = make_tree(root, shape, args.scale, args.seed)
+
+            result = run_benchmark(root, info['excluded_paths'], args.repeat)
+            result.update(shape=shape, files=info['files'], dirs=info['dirs'])
+            results.append(result)
+    finally:
+        if not args.dir:
+            shutil.rmtree(base_dir)
+
+    report = json.dumps({
+        'version': ff.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results,
+    }, indent=2, sort_keys=True)
+
+    if args.output:
+        with io.open(args.output, 'w', encoding='utf-8') as fh:
+            fh.write(u(report) + '\n')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,28 +7,58 @@
 from __future__ import print_function, unicode_literals, division
 
 import argparse
-import copy
+import errno
+import functools
+import io
 import itertools
 import os, os.path
-import shlex
-import subprocess
 import sys
 import tmcolors
 import textwrap
 
 import ff
 from ff.config import Config
+from ff import evaluator
+from ff.execute import Executor, prepare_execute  # pylint: disable=unused-import  # noqa: F401
+from ff.index import Index, FFIndexError
+from ff.output import Output
 from ff import pattern
+from ff import predicates
 from ff.plugin import FFPlugins, FFPlugin, InvalidPluginsPath, FFPluginError
 from ff import scanner
-from ff.utils import disp, err, u, ask, normalize
+from ff.stats import Stats
+from ff.tree import CompactTree
+from ff.utils import disp, err, u, normalize
+
+
+class ArgumentsError(Exception):
+    """
+        Invalid command line arguments (see: parse_input_args)
+    """
+    pass
+
+
+class _RaisingArgumentParser(argparse.ArgumentParser):
+    """
+        Parser raising ArgumentsError instead of printing message and exiting
+    """
+
+    def error(self, message):
+        raise ArgumentsError('%s: error: %s' % (self.prog, message))
 
 
 # pylint: disable=too-many-statements,too-many-branches
-def parse_input_args(args, cfg):
+def parse_input_args(args, cfg, cwd=None, raise_errors=False):
     """ Parse input 'arguments' and return parsed.
+        Relative paths are resolved against 'cwd' (default: current directory).
+        With 'raise_errors', ArgumentsError is raised on invalid arguments, instead of
+        printing usage and exiting.
     """
 
+    def abspath(path):
+        """ Absolute path, relative to 'cwd' """
+        return os.path.abspath(os.path.join(cwd, path) if cwd else path)
+
     args_description = 'Easily search and process files.'
     args_epilog = textwrap.dedent('''
         Pattern, provided as positional argument (not with --pattern) can be provided
@@ -65,8 +95,9 @@ def parse_input_args(args, cfg):
     ''').strip()
 
     # pylint: disable=invalid-name
-    p = argparse.ArgumentParser(description=args_description, epilog=args_epilog,
-                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser_class = _RaisingArgumentParser if raise_errors else argparse.ArgumentParser
+    p = parser_class(description=args_description, epilog=args_epilog,
+                     formatter_class=argparse.RawDescriptionHelpFormatter)
 
     p.add_argument('--print0', '-0', action='store_true', default=cfg.print0,
         help='split results by binary zero instead of new line (useful to work with xargs)')
@@ -74,16 +105,29 @@ def parse_input_args(args, cfg):
         help='ignore case when match pattern to paths')
     p.add_argument('--source', '-s', dest='sources', metavar='source', action='append', type=str, default=[],
         help='optional, see: source above')
-    p.add_argument('--pattern', '-p', type=str,
-        help='optional, see: pattern above')
+    p.add_argument('--pattern', '-p', type=str, action='append', default=[],
+        help='optional, see: pattern above. Can be given many times, then items matching any of patterns are found')
+    p.add_argument('--patterns-from', metavar='FILE', type=str,
+        help='read patterns from file, one per line (magic patterns are recognized, empty lines and lines '
+           'starting with "#" are skipped)')
+    p.add_argument('--show-patterns', action='store_true', default=False,
+        help='show pattern(s) matched by item before its path')
     p.add_argument('--regexp', '-g', action='store_true', default=cfg.regexp,
         help='treat pattern as regular expression (uses Python regexp engine)')
     p.add_argument('--fuzzy', '-f', action='store_true', default=cfg.fuzzy,
         help='pattern defines only set and order of characters used in filename')
     p.add_argument('--depth', '-D', type=str, default=str(cfg.depth),
         help='how deep we should search (default: -1, means infinite)')
+    p.add_argument('--min-depth', type=int, default=cfg.min_depth,
+        help='skip items placed less deep then given level (ie. 2: skip items placed directly in source)')
     p.add_argument('--path-search', '-q', action='store_true', default=cfg.path_search,
         help='search in full path, instead of bare name of item')
+    p.add_argument('--sort-by-score', action='store_true', default=cfg.sort_by_score,
+        help='sort results by quality of match to pattern, best first (results are shown after scan is finished)')
+    p.add_argument('--max-results', metavar='N', type=int,
+        help='stop searching after N items are found')
+    p.add_argument('--first', '-1', action='store_true', default=False,
+        help='stop searching after first found item (the same as --max-results 1)')
     p.add_argument('--regex-multiline', '-l', action='store_true', default=False,
         help='modify meta characters: "^" and "$" behaviour when pattern is regular expression. '
            'See: http://docs.python.org/2/library/re.html#re.MULTILINE')
@@ -98,6 +142,50 @@ def parse_input_args(args, cfg):
         help='find objects that do *not* match pattern')
     p.add_argument('--mode', '-m', default=cfg.mode,
         help='allow to choose to search for "files" only, "dirs", or "all"')
+    p.add_argument('--size', type=str,
+        help='find items of given size: [<>=]SIZE[bkmg], ie: ">10k" (bigger then 10 kibibytes)')
+    p.add_argument('--newer', metavar='TIME', type=str,
+        help='find items modified after TIME: age (ie. 2d, 3h, 15m, 30s, 1w), date (YYYY-MM-DD[ HH:MM[:SS]]) '
+           'or path to file (its modification time is used)')
+    p.add_argument('--older', metavar='TIME', type=str,
+        help='find items modified before TIME (see: --newer)')
+    p.add_argument('--type', dest='types', metavar='TYPE', type=str,
+        help='find items of given types (comma separated): f (regular file), d (directory), l (symbolic link)')
+    p.add_argument('--perm', type=str,
+        help='find items with permissions (octal, like find): MODE - exactly, -MODE - all of bits set '
+           '(pass it as --perm=-MODE), /MODE - any of bits set')
+    p.add_argument('--user', type=str,
+        help='find items owned by user (name or id)')
+    p.add_argument('--group', type=str,
+        help='find items owned by group (name or id)')
+    p.add_argument('--empty', action='store_true', default=False,
+        help='find empty files and directories')
+    p.add_argument('--engine', choices=scanner.ENGINES, default=cfg.engine,
+        help='engine used to traverse directories: "scandir" (default, faster) or "walk" (os.walk based)')
+    p.add_argument('--jobs', '-j', type=int, default=cfg.jobs,
+        help='number of threads used to list directories in parallel (default: 1)')
+    p.add_argument('--ordered', action='store_true', default=cfg.ordered,
+        help='with --jobs, return items in the same order as when scanning with single thread')
+    p.add_argument('--order', choices=scanner.ORDERS, default=cfg.order,
+        help='order of traversing directories: "dfs" (default, depth-first like os.walk), "bfs" (breadth-first: '
+           'level by level, nearest items first) or "deepening" (the same order as "bfs", but uses less memory '
+           'on wide trees)')
+    p.add_argument('--bytes', dest='bytes_mode', action='store_true', default=cfg.bytes_mode,
+        help='match names as bytes, as they are stored on filesystem: only matched items are decoded '
+           '(faster, especially for ASCII names)')
+    p.add_argument('--index-build', action='store_true', default=False,
+        help='build index of sources, or refresh it (only changed directories are scanned again), and exit')
+    p.add_argument('--use-index', action='store_true', default=cfg.use_index,
+        help='search in index (see --index-build) instead of scanning filesystem')
+    p.add_argument('--index-path', type=str, default=cfg.index_path,
+        help='path to index file (default: %s)' % cfg.index_path)
+    p.add_argument('--server', action='store_true', default=False,
+        help='run as server: keep tree of sources in memory (updated with inotify on Linux), and answer '
+           'queries from `ff --connect` over unix socket')
+    p.add_argument('--connect', dest='use_server', action='store_true', default=cfg.use_server,
+        help='send query to server (see --server), and search locally only if server is not running')
+    p.add_argument('--socket', dest='server_socket', type=str, default=cfg.server_socket,
+        help='path to unix socket of server (default: %s)' % cfg.server_socket)
     p.add_argument('--exec', '-x', metavar='COMMAND', dest='execute', type=str,
         help='execute some command on every found item. In command, placeholders: {path}, '
            '{dirname}, {basename} are replaced with correct value')
@@ -111,6 +199,11 @@ def parse_input_args(args, cfg):
         help='don\'t display element (useful with --exec argument)')
     p.add_argument('--no-colorize', action="store_false", dest='colorize', default=cfg.colorize,
         help='Colorize output')
+    p.add_argument('--exec-batch', action='store_true', default=False,
+        help='execute command once for many found items (like xargs): items are appended to the command, or '
+           'arguments with placeholders are repeated for every item')
+    p.add_argument('--exec-jobs', metavar='N', type=int, default=1,
+        help='run up to N commands from --exec in parallel (default: 1)')
     p.add_argument('--verbose-exec', action='store_true', default=False,
         help='show command before execute it')
     p.add_argument('--interactive-exec', action='store_true', default=False,
@@ -119,10 +212,24 @@ def parse_input_args(args, cfg):
         help='execute command from --exec argument in shell (with shell expansion etc)')
     p.add_argument('--vcs', dest='include_vcs', action='store_true', default=cfg.include_vcs,
         help='do not skip VCS directories (.git, .svn etc)')
+    p.add_argument('--respect-ignore', action='store_true', default=cfg.respect_ignore,
+        help='skip items ignored by rules from .gitignore, .ignore and .ffignore files (also from parent '
+           'directories, up to root of repository)')
+    p.add_argument('--xdev', action='store_true', default=cfg.xdev,
+        help='do not descend into directories on other filesystems (mount points are still reported)')
+    p.add_argument('--follow', '-L', dest='follow_symlinks', action='store_true', default=cfg.follow_symlinks,
+        help='descend into symbolic links to directories (loops are detected and not followed)')
+    p.add_argument('--skip-fs-type', metavar='FS_TYPE', dest='skipped_fs_types', action='append', type=str,
+        default=[], help='do not descend into mount points with filesystems of given type (ie. proc, nfs), '
+           'can be specified multiple times (Linux only)')
     p.add_argument('--exclude-path', '-c', metavar='EXCLUDED_PATH', dest='excluded_paths', action='append', type=str, default=[],
         help='skip given paths from scanning')
     p.add_argument('--test', '-t', dest='tests', action='append', default=[],
         help='additional tests, available by plugins (see annotations below or --help-test-plugins)')
+    p.add_argument('--test-any', metavar='TEST', action='append', default=[],
+        help='like --test, but item must pass at least one of tests given with --test-any')
+    p.add_argument('--test-not', metavar='TEST', action='append', default=[],
+        help='like --test, but item must *not* pass the test')
     p.add_argument('--plugins-path', type=str, action='append', default=[],
         help='additional path where to search plugins (see annotations below)')
     p.add_argument('--version', action='version', version="%s %s\n%s" % (os.path.basename(sys.argv[0]), ff.__version__, args_description))
@@ -130,6 +237,11 @@ def parse_input_args(args, cfg):
         help='display help for installed test plugins')
     p.add_argument('--show-plugins-paths', action='store_true',
         help='Show recognized plugins paths and exit')
+    p.add_argument('--stats', dest='stats_format', action='store_const', const='text', default=None,
+        help='print statistics of search to stderr at exit: entries seen, excluded and matched, time of every '
+           'stage, tests calls and time')
+    p.add_argument('--stats-json', dest='stats_format', action='store_const', const='json',
+        help='like --stats, but print statistics as JSON')
     p.add_argument('anon_pattern', metavar='pattern', type=str, nargs=argparse.OPTIONAL,
        help='pattern to search')
     p.add_argument('anon_sources', metavar='source', type=str, nargs=argparse.ZERO_OR_MORE,
@@ -151,6 +263,17 @@ def parse_input_args(args, cfg):
     except ValueError:
         p.error("argument --depth/-D: invalid int value: '%s'" % args.depth)
 
+    if args.min_depth < 0:
+        p.error("argument --min-depth: must be greater or equal 0: '%s'" % args.min_depth)
+
+    if args.jobs < 1:
+        p.error("argument --jobs/-j: must be greater then 0: '%s'" % args.jobs)
+
+    if args.first:
+        args.max_results = 1
+    elif args.max_results is not None and args.max_results < 1:
+        p.error("argument --max-results: must be greater then 0: '%s'" % args.max_results)
+
     # mode
     modes = {
         'files': scanner.MODE_FILES, 'file': scanner.MODE_FILES, 'f': scanner.MODE_FILES,
@@ -162,35 +285,51 @@ def parse_input_args(args, cfg):
     except KeyError:
         p.error("argument -m/--mode: invalid choice: '%s' (choose from 'files', 'dirs', 'all')" % args.mode)
 
-    # prepare pattern
-    # TODO: should be converted to UTF8 in this place?
-    if args.pattern is not None:
+    # when building index or running server there is no pattern: all positional arguments are sources
+    if args.index_build or args.server:
         if args.anon_pattern:
             args.anon_sources.insert(0, args.anon_pattern)
-        args.magic_pattern = False
+        args.pattern = None
     else:
-        args.pattern = args.anon_pattern
-        args.magic_pattern = True
+        # prepare pattern
+        # TODO: should be converted to UTF8 in this place?
+        patterns = [(pat, False) for pat in args.pattern]
+        if args.patterns_from:
+            try:
+                patterns.extend((pat, True) for pat in read_patterns_file(abspath(args.patterns_from)))
+            except (IOError, OSError, UnicodeDecodeError) as ex:
+                p.error('argument --patterns-from: %s' % ex)
 
-    if not args.pattern:
-        p.error('argument -p/--pattern is required')
+        if args.pattern or args.patterns_from:
+            if args.anon_pattern:
+                args.anon_sources.insert(0, args.anon_pattern)
+        elif args.anon_pattern:
+            patterns.append((args.anon_pattern, True))
 
-    try:
-        pat = pattern.Pattern()
+        if not patterns:
+            p.error('argument -p/--pattern is required')
 
-        opts_list = ('fnmatch_begin', 'fnmatch_end', 'ignorecase', 'regex_dotall', 'regex_multiline',
-        'invert_match', 'regexp', 'fuzzy', 'magic_pattern', 'pattern')
+        try:
+            compiled = []
+            opts_list = ('fnmatch_begin', 'fnmatch_end', 'ignorecase', 'regex_dotall', 'regex_multiline',
+            'invert_match', 'regexp', 'fuzzy')
+
+            for source, magic_pattern in patterns:
+                pat = pattern.Pattern()
 
-        for opt in opts_list:
-            # TODO: should be converted to UTF8 in this place?
-            setattr(pat, opt, getattr(args, opt))
+                for opt in opts_list:
+                    setattr(pat, opt, getattr(args, opt))
+                pat.magic_pattern = magic_pattern
+                pat.pattern = source
 
-        pat.compile()
-        args.pattern = pat
+                pat.compile()
+                compiled.append(pat)
 
-        del pat, opts_list
-    except pattern.PatternError as ex:
-        raise p.error(str(ex))
+            args.pattern = compiled[0] if len(compiled) == 1 else pattern.PatternSet(compiled)
+
+            del pat, opts_list, compiled, patterns
+        except pattern.PatternError as ex:
+            raise p.error(str(ex))
 
     # prepare sources
     args.sources += args.anon_sources
@@ -203,18 +342,54 @@ def parse_input_args(args, cfg):
         except UnicodeDecodeError as ex:
             err('%s: %s' % (src, ex), sep='', exit_code=1)
 
-        src = os.path.abspath(src)
+        src = abspath(src)
         args.sources[i] = normalize(src)
 
+    # prepare metadata tests
+    try:
+        args.metadata = predicates.Metadata(
+            size=predicates.parse_size(args.size) if args.size else None,
+            newer=predicates.parse_time(u(args.newer)) if args.newer else None,
+            older=predicates.parse_time(u(args.older)) if args.older else None,
+            types=predicates.parse_types(args.types) if args.types else None,
+            perm=predicates.parse_perm(args.perm) if args.perm else None,
+            uid=predicates.parse_user(args.user) if args.user else None,
+            gid=predicates.parse_group(args.group) if args.group else None,
+            empty=args.empty,
+        )
+    except predicates.PredicateError as ex:
+        p.error(str(ex))
+    if not args.metadata:
+        args.metadata = None
+
     # prepare exec
     args.execute = u(args.execute)
+    if args.exec_jobs < 1:
+        p.error("argument --exec-jobs: must be greater then 0: '%s'" % args.exec_jobs)
+    if args.exec_batch and (args.shell_exec or args.interactive_exec):
+        p.error('argument --exec-batch: not allowed with --shell-exec or --interactive-exec')
+    if args.interactive_exec and args.exec_jobs > 1:
+        p.error('argument --exec-jobs: not allowed with --interactive-exec')
+    args.executor = None
+    args.output = None
+
+    args.stats = Stats() if args.stats_format else None
+
+    args.server_socket = abspath(os.path.expanduser(u(args.server_socket)))
+
+    # prepare index
+    args.index_path = abspath(os.path.expanduser(u(args.index_path)))
+    args.index = None
 
     # prepare excluded paths
     args.excluded_paths.extend(cfg.excluded_paths)
     for i, ex_path in enumerate(args.excluded_paths):
         ex_path = u(ex_path)
         ex_path = normalize(ex_path)
-        args.excluded_paths[i] = os.path.abspath(ex_path).rstrip(os.sep)
+        args.excluded_paths[i] = abspath(ex_path).rstrip(os.sep)
+
+    args.skipped_fs_types.extend(cfg.skipped_fs_types)
+    args.skipped_fs_types = [u(fs_type) for fs_type in args.skipped_fs_types]
 
     # append plugins_paths
     args.plugins_path.extend(cfg.plugins_paths)
@@ -227,6 +402,19 @@ def parse_input_args(args, cfg):
     return args
 
 
+def read_patterns_file(path):
+    """
+    Read patterns from file: one pattern per line, empty lines and lines
+    starting with "#" are skipped.
+    :param path:str
+    :return:list of str
+    """
+    with io.open(path, encoding='utf-8') as fh:
+        lines = [line.rstrip('\r\n') for line in fh]
+
+    return [line for line in lines if line.strip() and not line.startswith('#')]
+
+
 def detect_plugins_paths(paths):
     """
     Detect and collect plugins paths
@@ -252,12 +440,29 @@ def detect_plugins_paths(paths):
 
 def initialize_plugins(args):
     """
-    Find and prepare plugins for use
+    Find and prepare plugins for use, and combine them with metadata tests: item must
+    pass metadata tests, all tests from --test, at least one from --test-any and none
+    from --test-not. Tests are evaluated lazily, cheaper and more selective first.
     :param args:
-    :return:
+    :return:evaluator.AllOf
+    """
+    tests = [args.metadata] if args.metadata else []
+    tests.extend(load_test_plugins(args.tests))
+    if args.test_any:
+        tests.append(evaluator.AnyOf(load_test_plugins(args.test_any)))
+    tests.extend(evaluator.Not(plugin) for plugin in load_test_plugins(args.test_not))
+
+    return evaluator.AllOf(tests)
+
+
+def load_test_plugins(tests):
+    """
+    Load and prepare test plugins
+    :param tests:list of str - plugin names, with optional argument after colon
+    :return:FFPlugins
     """
     plugins = FFPlugins()
-    for plugin in args.tests:
+    for plugin in tests:
         if ':' in plugin:
             plugin_name, plugin_argument = plugin.split(':', 1)
         else:
@@ -265,36 +470,53 @@ def initialize_plugins(args):
 
         try:
             plugin = FFPlugin(plugin_name, 'test', argument=plugin_argument)
-            plugins.append(plugin)
         except ImportError:
             raise FFPluginError('unknown plugin: %s' % plugin_name, plugin_name)
         except AttributeError:
             raise FFPluginError('broken plugin: %s' % plugin_name, plugin_name)
 
+        # plugin argument is parsed once, here
+        try:
+            plugin.prepare()
+        except FFPluginError as ex:
+            raise FFPluginError(str(ex), plugin_name)
+        plugins.append(plugin)
+
     return plugins
 
 
-def prepare_execute(exe, path, dirname, basename):
-    """ Replace keywords and env variables in 'exe' with values.
-        Recognized keywords:
-        {path} - full file path
-        {dirname} - parent directory for file
-        {basename} - filename without path
-        :param exe:list|tuple
-        :param path:str
-        :param dirname:str
-        :param basename:str
-        :return:list
+def load_index(path, sources):
     """
+    Load indexed content of sources into memory, so directories are not queried
+    in database one by one while searching
+    :param path:str - path to index file
+    :param sources:list of str
+    :return:tree.CompactTree
+    :raise FFIndexError: if index file doesn't exist
+    """
+    index = Index(path)
+    try:
+        return CompactTree.from_index(index, sources)
+    finally:
+        index.close()
 
-    exe = copy.copy(exe)
-    for i, elem in enumerate(exe):
-        elem = elem.replace('{path}', path)
-        elem = elem.replace('{dirname}', dirname)
-        elem = elem.replace('{basename}', basename)
-        exe[i] = elem
 
-    return exe
+def _colorize_spans(text, spans):
+    """
+    Colorize given parts of text
+    :param text:str
+    :param spans:list of tuples (start, end)
+    :return:str
+    """
+    parts = []
+    pos = 0
+    for start, end in spans:
+        parts.append(text[pos:start])
+        parts.append(tmcolors.colorize(text[start:end], fg='green'))
+        pos = end
+    parts.append(text[pos:])
+
+    return ''.join(parts)
 
 
 def colorize(cfg, path):
@@ -304,49 +526,41 @@ def colorize(cfg, path):
     :param path:str
     :return:str
     """
-    if not sys.stdout.isatty():
-        return path
-
-    repl = tmcolors.colorize(r'\1', fg='green')
     if cfg.path_search:
-        path = cfg.pattern.pattern.sub(repl, path)
+        path = _colorize_spans(path, cfg.pattern.spans(path))
     else:
         dirname, basename = os.path.split(path)
-        basename = cfg.pattern.pattern.sub(repl, basename)
+        basename = _colorize_spans(basename, cfg.pattern.spans(basename))
         path = os.path.join(dirname, basename)
 
     return path
 
 
-def process_item(cfg, path):
+def process_item(cfg, item):
     """
     Print item and/or execute command if given.
     :param cfg:argparse.Namespace
-    :param path:str
+    :param item:scanner.Entry
     """
 
-
+    path = item.path
     if cfg.display:
         if not cfg.prefix:
             prefix = ''
-        elif os.path.isdir(path):
+        elif item.is_dir():
             prefix = cfg.prefix_dirs
         else:
             prefix = cfg.prefix_files
 
-        disp(prefix, colorize(cfg, path) if cfg.colorize else path, sep='', end=cfg.delim)
+        if cfg.show_patterns and item.patterns:
+            prefix = ' '.join(str(pat) for pat in item.patterns) + ': ' + prefix
 
-    if cfg.execute:
-        if cfg.shell_exec:
-            execute = [cfg.execute]
-        else:
-            execute = shlex.split(cfg.execute)
+        cfg.output.write(prefix, colorize(cfg, path) if cfg.colorize else path, end=cfg.delim)
 
-        execute = prepare_execute(execute, path, os.path.dirname(path), os.path.basename(path))
-        if cfg.verbose_exec:
-            disp(*execute)
-        if not cfg.interactive_exec or ask('Execute command on %s?' % path, 'yn', 'n') == 'y':
-            subprocess.call(execute, shell=cfg.shell_exec)
+    if cfg.executor:
+        ## command can write to the same stream
+        cfg.output.flush()
+        cfg.executor.submit(path)
 
 
 def main():
@@ -360,6 +574,36 @@ def main():
     except argparse.ArgumentError as ex:
         err(str(ex), exit_code=1)
 
+    if args.server:
+        ## server imports cli, so it can't be imported at top
+        from ff.server import Server
+        ## plugins paths are resolved once, by server
+        cfg.plugins_paths = args.plugins_path
+        try:
+            Server(cfg, args.sources, args.server_socket).serve()
+        except KeyboardInterrupt:
+            pass
+        except (IOError, OSError) as ex:
+            err('cannot start server: %s' % ex, exit_code=1)
+        sys.exit()
+
+    # ask server, if it's running: results are already in its memory, and plugins loaded
+    if args.use_server and not (args.execute or args.index_build or args.use_index or args.help_test_plugins or
+                                args.show_plugins_paths or args.stats):
+        from ff.server import query
+        stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+        try:
+            code = query(args.server_socket, sys.argv[1:], os.getcwd(), stdout, sys.stderr,
+                         tty=sys.stdout.isatty(), encoding=getattr(sys.stdout, 'encoding', None))
+        except KeyboardInterrupt:
+            code = 1
+        except IOError as ex:
+            if ex.errno != errno.EPIPE:
+                raise
+            code = 0
+        if code is not None:
+            sys.exit(code)
+
     # where to search for plugins
     try:
         detect_plugins_paths(args.plugins_path)
@@ -396,10 +640,65 @@ def main():
     except FFPluginError as ex:
         err(str(ex), exit_code=1)
 
+    if args.index_build:
+        try:
+            args.index = Index(args.index_path, create=True)
+        except FFIndexError as ex:
+            err(str(ex), exit_code=1)
+
+        for source in args.sources:
+            if not os.path.isdir(source):
+                err('Source %s doesn\'t exists or is not a directory' % source)
+                continue
+            args.index.update(source)
+        args.index.close()
+        sys.exit()
+
+    if args.use_index:
+        try:
+            args.index = load_index(args.index_path, args.sources)
+        except FFIndexError as ex:
+            err(str(ex), exit_code=1)
+
+    ## colorize only when writing to terminal
+    args.output = Output()
+    args.colorize = args.colorize and args.output.is_tty
+
+    if args.execute:
+        args.executor = Executor(args.execute, shell=args.shell_exec, batch=args.exec_batch, jobs=args.exec_jobs,
+                                 verbose=args.verbose_exec, interactive=args.interactive_exec)
+
+    process = process_item
+    close_executor = args.executor.close if args.executor else None
+    if args.stats:
+        process = args.stats.timed('output', process_item)
+        if args.executor:
+            args.executor.submit = args.stats.timed('exec', args.executor.submit)
+            close_executor = functools.partial(args.stats.measure, 'exec', args.executor.close)
+
+    items = iter(scanner.Scanner(args))
     try:
-        for item in scanner.Scanner(args):
-            process_item(args, item)
+        for item in itertools.islice(items, args.max_results):
+            process(args, item)
+        ## stop walking (and threads of parallel walker) immediately
+        items.close()
+        args.output.flush()
+        if close_executor:
+            close_executor()
     except FFPluginError as ex:
+        args.output.flush()
         err('Plugin error (%s): %s' % (ex.get_plugin_name(), ex), exit_code=1)
     except KeyboardInterrupt:
+        args.output.flush()
+        if args.executor:
+            args.executor.close(wait=False)
         disp('Interrupted by CTRL-C, aborting', file=sys.stderr)
+    except IOError as ex:
+        ## reader of our output (ie. head) is gone
+        if ex.errno != errno.EPIPE:
+            raise
+        if args.executor:
+            args.executor.close(wait=False)
+    finally:
+        if args.stats:
+            disp(args.stats.format(args.tests, args.stats_format), file=sys.stderr)
@@ -62,31 +62,48 @@ class Config(object):
         self.smartcase = False
         self.print0 = False
         self.depth = -1
+        self.min_depth = 0
         self.mode = scanner.MODE_ALL
         self.regexp = False
         self.fuzzy = False
         self.path_search = False
+        self.sort_by_score = False
         self.prefix = False
         self.prefix_dirs = 'd: '
         self.prefix_files = 'f: '
         self.colorize = True
         self.include_vcs = False
+        self.respect_ignore = False
+        self.xdev = False
+        self.follow_symlinks = False
+        self.engine = scanner.ENGINE_SCANDIR
+        self.jobs = 1
+        self.ordered = False
+        self.order = scanner.ORDER_DFS
+        self.bytes_mode = False
+        self.use_index = False
+        self.index_path = os.path.join('~', '.ff', 'index.sqlite')
+        self.use_server = False
+        self.server_socket = os.path.join('~', '.ff', 'server.sock')
 
         self.excluded_paths = []
         self.plugins_paths = []
+        self.skipped_fs_types = []
 
     def __str__(self):
         ret = []
 
         items = (
             'ignorecase', 'smartcase', 'print0', 'regexp', 'fuzzy',
-            'path_search', 'prefix', 'colorize', 'include_vcs',
+            'path_search', 'prefix', 'colorize', 'include_vcs', 'respect_ignore', 'xdev', 'follow_symlinks',
+            'ordered', 'bytes_mode', 'use_index', 'use_server', 'sort_by_score',
         )
         for item in items:
             if getattr(self, item):
                 ret.append(item)
 
-        items = ('depth', 'mode', 'prefix_dirs', 'prefix_files')
+        items = ('depth', 'min_depth', 'mode', 'prefix_dirs', 'prefix_files', 'engine', 'jobs', 'order', 'index_path',
+                 'server_socket')
         for item in items:
             ret.append('%s="%s"' % (item, getattr(self, item)))
 
@@ -98,6 +115,9 @@ class Config(object):
         if self.excluded_paths:
             ret.append('excluded_paths:cnt:%d' % len(self.excluded_paths))
 
+        if self.skipped_fs_types:
+            ret.append('skipped_fs_types:cnt:%d' % len(self.skipped_fs_types))
+
         return 'Config(%s)' % ','.join(ret)
 
 
@@ -134,6 +154,8 @@ class Config(object):
             self.print0 = parser.getboolean('ff', 'print0')
         if parser.has_option('ff', 'depth'):
             self.depth = parser.getint('ff', 'depth')
+        if parser.has_option('ff', 'min_depth'):
+            self.min_depth = parser.getint('ff', 'min_depth')
         if parser.has_option('ff', 'mode'):
             self.mode = parser.get('ff', 'mode')
         if parser.has_option('ff', 'regexp'):
@@ -142,6 +164,8 @@ class Config(object):
             self.fuzzy = parser.getboolean('ff', 'fuzzy')
         if parser.has_option('ff', 'path_search'):
             self.path_search = parser.getboolean('ff', 'path_search')
+        if parser.has_option('ff', 'sort_by_score'):
+            self.sort_by_score = parser.getboolean('ff', 'sort_by_score')
         if parser.has_option('ff', 'prefix'):
             self.prefix = parser.getboolean('ff', 'prefix')
         if parser.has_option('ff', 'prefix_dirs'):
@@ -152,6 +176,30 @@ class Config(object):
             self.colorize = parser.getboolean('ff', 'colorize')
         if parser.has_option('ff', 'include_vcs'):
             self.include_vcs = parser.getboolean('ff', 'include_vcs')
+        if parser.has_option('ff', 'respect_ignore'):
+            self.respect_ignore = parser.getboolean('ff', 'respect_ignore')
+        if parser.has_option('ff', 'xdev'):
+            self.xdev = parser.getboolean('ff', 'xdev')
+        if parser.has_option('ff', 'follow_symlinks'):
+            self.follow_symlinks = parser.getboolean('ff', 'follow_symlinks')
+        if parser.has_option('ff', 'engine'):
+            self.engine = parser.get('ff', 'engine')
+        if parser.has_option('ff', 'jobs'):
+            self.jobs = parser.getint('ff', 'jobs')
+        if parser.has_option('ff', 'ordered'):
+            self.ordered = parser.getboolean('ff', 'ordered')
+        if parser.has_option('ff', 'order'):
+            self.order = parser.get('ff', 'order')
+        if parser.has_option('ff', 'bytes_mode'):
+            self.bytes_mode = parser.getboolean('ff', 'bytes_mode')
+        if parser.has_option('ff', 'use_index'):
+            self.use_index = parser.getboolean('ff', 'use_index')
+        if parser.has_option('ff', 'index_path'):
+            self.index_path = parser.get('ff', 'index_path')
+        if parser.has_option('ff', 'use_server'):
+            self.use_server = parser.getboolean('ff', 'use_server')
+        if parser.has_option('ff', 'server_socket'):
+            self.server_socket = parser.get('ff', 'server_socket')
 
         if parser.has_section('excluded_paths'):
             for item in parser.options('excluded_paths'):
@@ -165,4 +213,10 @@ class Config(object):
                 if enabled:
                     self.plugins_paths.append(item)
 
+        if parser.has_section('skipped_fs_types'):
+            for item in parser.options('skipped_fs_types'):
+                enabled = parser.getboolean('skipped_fs_types', item)
+                if enabled:
+                    self.skipped_fs_types.append(item)
+
         return self
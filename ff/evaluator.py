@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Evaluate tests (plugins) on found items
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import time
+
+__all__ = ['AllOf', 'AnyOf', 'Not']
+
+## timer used to measure cost of tests
+_timer = getattr(time, 'perf_counter', time.time)
+
+## number of evaluations between reordering of tests
+REORDER_EVERY = 128
+## every n-th evaluation of single item is timed
+TIME_EVERY = 8
+## cost of calling any test (in seconds), so tests are ranked even if timer is not precise enough
+_MIN_COST = 1e-7
+
+
+class _TestStats(object):
+    """
+    Statistics of single test collected in group: how many times was called,
+    how many times passed, and how long it takes.
+    """
+    __slots__ = ('test', 'calls', 'passed', 'timed', 'time')
+
+    def __init__(self, test):
+        self.test = test
+        self.calls = 0
+        self.passed = 0
+        self.timed = 0
+        self.time = 0.0
+
+    def add(self, calls, passed):
+        """
+        Add results of test
+        :param calls:int
+        :param passed:int
+        """
+        self.calls += calls
+        self.passed += passed
+
+    def add_time(self, calls, elapsed):
+        """
+        Add time taken by `calls` calls of test
+        :param calls:int
+        :param elapsed:float
+        """
+        self.timed += calls
+        self.time += elapsed
+
+    def rank(self, stop_on):
+        """
+        Rank of test in group: expected cost of single call divided by probability
+        that test ends evaluation (fails for AllOf, passes for AnyOf). Tests with
+        lower rank should be run first.
+        :param stop_on:bool
+        :return:float
+        """
+        cost = _MIN_COST + (self.time / self.timed if self.timed else 0.0)
+        ## probability with Laplace smoothing, so rarely called tests are not ranked too high or too low
+        passed = (self.passed + 1) / (self.calls + 2)
+        probability = passed if stop_on else 1 - passed
+        return cost / probability
+
+
+class _Group(object):
+    """
+    Group of tests evaluated with short-circuit: evaluation of item ends on first test
+    which returns `_stop_on` value.
+
+    If `adaptive` is set, order of tests is changed from time to time, using statistics
+    collected while evaluating: cheap tests, and tests which often end evaluation, are
+    run first.
+    """
+    _stop_on = None
+
+    def __init__(self, tests, adaptive=True):
+        """
+        Initializer.
+        :param tests:list - items with methods: `test(entry)`, `test_batch(entries)` and
+            `has_batch` attribute (like plugin.FFPlugin)
+        :param adaptive:bool
+        """
+        self.adaptive = adaptive
+        self._stats = [_TestStats(test) for test in tests]
+        self._evaluations = 0
+
+    @property
+    def tests(self):
+        """ Tests in current order of evaluation
+            :return:list
+        """
+        return [stats.test for stats in self._stats]
+
+    @property
+    def has_batch(self):
+        """ Check if any of tests can test many entries at once by itself
+            :return:bool
+        """
+        return any(stats.test.has_batch for stats in self._stats)
+
+    def statistics(self):
+        """ Statistics of tests, collected while evaluating. Time of single
+            evaluations is measured only from time to time, so total time is estimated.
+            :return:list of tuples (test, calls, passed, time in seconds)
+        """
+        return [(stats.test, stats.calls, stats.passed, stats.time / stats.timed * stats.calls if stats.timed else 0.0)
+                for stats in self._stats]
+
+    def _reorder(self):
+        """ Sort tests by their rank
+        """
+        stop_on = self._stop_on
+        self._stats.sort(key=lambda stats: stats.rank(stop_on))
+
+    def test(self, entry):
+        """
+        Test single entry
+        :param entry:scanner.Entry
+        :return:bool
+        """
+        self._evaluations += 1
+        if self.adaptive and self._evaluations % REORDER_EVERY == 0:
+            self._reorder()
+
+        stop_on = self._stop_on
+        timed = self._evaluations % TIME_EVERY == 1
+        for stats in self._stats:
+            if timed:
+                start = _timer()
+                result = bool(stats.test.test(entry))
+                stats.add_time(1, _timer() - start)
+            else:
+                result = bool(stats.test.test(entry))
+
+            stats.add(1, result)
+            if result is stop_on:
+                return stop_on
+
+        return not stop_on
+
+    def test_batch(self, entries):
+        """
+        Test many entries at once: every test is called with entries not
+        decided by previous tests
+        :param entries:list of scanner.Entry
+        :return:list of bool
+        """
+        self._evaluations += len(entries)
+        if self.adaptive:
+            self._reorder()
+
+        stop_on = self._stop_on
+        results = [not stop_on] * len(entries)
+        remaining = list(range(len(entries)))
+        for stats in self._stats:
+            if not remaining:
+                break
+
+            start = _timer()
+            batch_results = stats.test.test_batch([entries[i] for i in remaining])
+            stats.add_time(len(remaining), _timer() - start)
+
+            undecided = []
+            for i, result in zip(remaining, batch_results):
+                if bool(result) is stop_on:
+                    results[i] = stop_on
+                else:
+                    undecided.append(i)
+            stats.add(len(remaining), len(remaining) - len(undecided) if stop_on else len(undecided))
+            remaining = undecided
+
+        return results
+
+    def __len__(self):
+        return len(self._stats)
+
+    def __repr__(self):
+        return '<%s(%s)>' % (self.__class__.__name__, ', '.join(repr(test) for test in self.tests))
+
+
+class AllOf(_Group):
+    """
+    Entry passes if passes all of tests
+    """
+    _stop_on = False
+
+
+class AnyOf(_Group):
+    """
+    Entry passes if passes at least one of tests
+    """
+    _stop_on = True
+
+
+class Not(object):
+    """
+    Negation of test
+    """
+
+    def __init__(self, test):
+        """
+        Initializer.
+        :param test: negated test
+        """
+        self.item = test
+
+    @property
+    def has_batch(self):
+        """ Check if negated test can test many entries at once by itself
+            :return:bool
+        """
+        return self.item.has_batch
+
+    def test(self, entry):
+        """
+        Test single entry
+        :param entry:scanner.Entry
+        :return:bool
+        """
+        return not self.item.test(entry)
+
+    def test_batch(self, entries):
+        """
+        Test many entries at once
+        :param entries:list of scanner.Entry
+        :return:list of bool
+        """
+        return [not result for result in self.item.test_batch(entries)]
+
+    def __repr__(self):
+        return '<Not(%r)>' % (self.item, )
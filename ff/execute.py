@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Execute commands on found items
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import copy
+import os, os.path
+import shlex
+import subprocess
+import threading
+
+try:
+    from concurrent import futures
+except ImportError:
+    futures = None
+
+from ff.utils import disp, ask
+
+__all__ = ['Executor', 'prepare_execute']
+
+PLACEHOLDERS = ('{path}', '{dirname}', '{basename}')
+
+## command line size limit used when --exec-batch, the same as in xargs
+_ARGS_SIZE_LIMIT = 128 * 1024
+## size of pointer to every argument (in argv table)
+_ARG_POINTER_SIZE = 8
+
+
+def prepare_execute(exe, path, dirname, basename):
+    """ Replace keywords and env variables in 'exe' with values.
+        Recognized keywords:
+        {path} - full file path
+        {dirname} - parent directory for file
+        {basename} - filename without path
+        :param exe:list|tuple
+        :param path:str
+        :param dirname:str
+        :param basename:str
+        :return:list
+    """
+
+    exe = copy.copy(exe)
+    for i, elem in enumerate(exe):
+        elem = elem.replace('{path}', path)
+        elem = elem.replace('{dirname}', dirname)
+        elem = elem.replace('{basename}', basename)
+        exe[i] = elem
+
+    return exe
+
+
+def get_args_size_limit():
+    """
+    Calculate how long can be command line: system limit (ARG_MAX) without
+    size of environment, but no more then _ARGS_SIZE_LIMIT
+    :return:int
+    """
+    try:
+        limit = os.sysconf(str('SC_ARG_MAX'))
+    except (AttributeError, ValueError, OSError):
+        limit = 32 * 1024
+
+    env_size = sum(len(key) + len(value) + 2 + _ARG_POINTER_SIZE for key, value in os.environ.items())
+    return max(min(limit - env_size - 2048, _ARGS_SIZE_LIMIT), 4096)
+
+
+def _arg_size(arg):
+    """
+    Size taken by single argument in command line
+    :param arg:str
+    :return:int
+    """
+    return len(arg.encode('utf-8')) + 1 + _ARG_POINTER_SIZE
+
+
+# pylint: disable=too-many-instance-attributes
+class Executor(object):
+    """
+    Execute command on found items.
+
+    Command is parsed only once. With `batch` many items are passed to single
+    command (like xargs does): elements of command containing placeholders are
+    repeated for every item, and if there are no placeholders items are appended
+    to the end of command. With `jobs` greater then 1, commands are run in parallel,
+    but no more then `jobs` at once.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, command, shell=False, batch=False, jobs=1, verbose=False, interactive=False):
+        self.shell = shell
+        self.batch = batch
+        self.verbose = verbose
+        self.interactive = interactive
+
+        if shell:
+            self.template = [command]
+        else:
+            self.template = shlex.split(command)
+
+        ## positions of elements with placeholders, used with batch
+        self._placeholders = [i for i, elem in enumerate(self.template)
+                              if any(placeholder in elem for placeholder in PLACEHOLDERS)]
+        self._batch = []
+        self._batch_size = 0
+        self._size_limit = get_args_size_limit() if batch else 0
+
+        self._pool = None
+        if jobs > 1 and futures is not None:
+            self._pool = futures.ThreadPoolExecutor(max_workers=jobs)
+            ## do not queue more then `jobs` commands waiting for free worker
+            self._slots = threading.BoundedSemaphore(jobs * 2)
+            self._pending = set()
+
+    def _run(self, execute):
+        """
+        Run command, in pool if there is one
+        :param execute:list
+        """
+        if self.verbose:
+            disp(*execute)
+
+        if self._pool is None:
+            subprocess.call(execute, shell=self.shell)
+            return
+
+        self._slots.acquire()
+        future = self._pool.submit(subprocess.call, execute, shell=self.shell)
+        self._pending.add(future)
+        future.add_done_callback(self._task_done)
+
+    def _task_done(self, future):
+        """
+        Callback called when command in pool ends
+        :param future:futures.Future
+        """
+        self._pending.discard(future)
+        self._slots.release()
+
+    def _prepare_batch(self, paths):
+        """
+        Build command for many paths
+        :param paths:list of str
+        :return:list
+        """
+        if not self._placeholders:
+            return self.template + paths
+
+        first, last = self._placeholders[0], self._placeholders[-1] + 1
+        execute = self.template[:first]
+        for path in paths:
+            execute.extend(prepare_execute(self.template[first:last], path,
+                                           os.path.dirname(path), os.path.basename(path)))
+        execute.extend(self.template[last:])
+
+        return execute
+
+    def _batch_args_size(self, path):
+        """
+        Size of arguments added to batch command by single path
+        :param path:str
+        :return:int
+        """
+        if not self._placeholders:
+            return _arg_size(path)
+
+        first, last = self._placeholders[0], self._placeholders[-1] + 1
+        args = prepare_execute(self.template[first:last], path, os.path.dirname(path), os.path.basename(path))
+        return sum(_arg_size(arg) for arg in args)
+
+    def flush(self):
+        """
+        Run command for items collected in batch
+        """
+        if self._batch:
+            self._run(self._prepare_batch(self._batch))
+            self._batch = []
+            self._batch_size = 0
+
+    def submit(self, path):
+        """
+        Execute command on given path (or add path to batch)
+        :param path:str
+        """
+        if self.batch:
+            size = self._batch_args_size(path)
+            if self._batch and self._batch_size + size > self._size_limit:
+                self.flush()
+
+            if not self._batch:
+                self._batch_size = sum(_arg_size(arg) for arg in self.template)
+            self._batch.append(path)
+            self._batch_size += size
+            return
+
+        execute = prepare_execute(self.template, path, os.path.dirname(path), os.path.basename(path))
+        if not self.interactive or ask('Execute command on %s?' % path, 'yn', 'n') == 'y':
+            self._run(execute)
+
+    def close(self, wait=True):
+        """
+        Run remaining batch and wait for all commands to finish.
+        :param wait:bool - if False, do not run remaining batch and commands waiting in pool
+        """
+        if wait:
+            self.flush()
+
+        if self._pool is not None:
+            if not wait:
+                for future in list(self._pending):
+                    future.cancel()
+            self._pool.shutdown(wait=True)
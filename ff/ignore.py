@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Ignore files (.gitignore and similar) support
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import io
+import os, os.path
+import re
+
+__all__ = ['IgnoreRules', 'IGNORE_FILES']
+
+## names of files with ignore rules, read in this order (later ones have higher priority)
+IGNORE_FILES = ('.gitignore', '.ignore', '.ffignore')
+## directory marking root of repository: ignore files are not searched above it
+_REPOSITORY_MARKERS = ('.git', '.hg')
+
+
+def _translate_segment(segment):
+    """
+    Translate single part of path from ignore pattern (wildcards: *, ?, [...])
+    into regular expression
+    :param segment:str
+    :return:str
+    """
+    ret = ''
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        i += 1
+        if char == '*':
+            ret += '[^/]*'
+        elif char == '?':
+            ret += '[^/]'
+        elif char == '\\' and i < len(segment):
+            ret += re.escape(segment[i])
+            i += 1
+        elif char == '[':
+            end = segment.find(']', i + 1 if segment[i:i + 1] in ('!', '^') else i)
+            if end < 0:
+                ret += re.escape(char)
+                continue
+            content = segment[i:end]
+            if content[:1] == '!':
+                content = '^' + content[1:]
+            ret += '[' + content.replace('\\', '\\\\') + ']'
+            i = end + 1
+        else:
+            ret += re.escape(char)
+    return ret
+
+
+def compile_rule(line):
+    """
+    Compile single line of ignore file (syntax of .gitignore)
+    :param line:str
+    :return:tuple (compiled regular expression, negate, directories only)|None - None for
+        empty lines and comments
+    """
+    line = line.rstrip('\r\n')
+    if not line.endswith('\\ '):
+        line = line.rstrip(' ')
+    if not line or line.startswith('#'):
+        return None
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    ## pattern with slash (other then trailing one) is relative to directory with ignore file
+    anchored = '/' in line
+    segments = line.lstrip('/').split('/')
+
+    rxp = ''
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == '**':
+            rxp += '.*' if last else '(?:[^/]*/)*'
+        else:
+            rxp += _translate_segment(segment)
+            if not last:
+                rxp += '/'
+
+    if not anchored:
+        rxp = '(?:.*/)?' + rxp
+
+    return re.compile(rxp + r'\Z', re.DOTALL), negate, dir_only
+
+
+def read_rules(path):
+    """
+    Read and compile rules from ignore file
+    :param path:str
+    :return:list of rules (see: compile_rule)
+    """
+    try:
+        with io.open(path, encoding='utf-8', errors='replace') as fh:
+            rules = [compile_rule(line) for line in fh]
+    except (IOError, OSError):
+        return []
+
+    return [rule for rule in rules if rule is not None]
+
+
+class IgnoreRules(object):
+    """
+    Rules read from ignore files in single directory, linked with rules from
+    parent directories. Rules from deeper directories, and later rules in file,
+    have higher priority.
+    """
+    __slots__ = ('base', 'rules', 'parent')
+
+    def __init__(self, base, rules, parent=None):
+        """
+        Initializer.
+        :param base:str - directory with ignore files
+        :param rules:list of rules (see: compile_rule)
+        :param parent:IgnoreRules|None - rules from parent directories
+        """
+        self.base = base.rstrip(os.sep) + os.sep
+        self.rules = rules
+        self.parent = parent
+
+    @classmethod
+    def for_directory(cls, parent, found):
+        """
+        Prepare rules for content of `parent` directory.
+        :param parent:scanner.Entry - directory, with rules from parent directories in `ignore`
+        :param found:dict - paths of ignore files found in `parent` directory, by name (one of IGNORE_FILES)
+        :return:IgnoreRules|None - rules from parent directories if there are no ignore files
+        """
+        rules = []
+        for name in IGNORE_FILES:
+            if name in found:
+                rules.extend(read_rules(found[name]))
+
+        if not rules:
+            return parent.ignore
+        return cls(parent.path, rules, parent.ignore)
+
+    @classmethod
+    def for_parents(cls, path):
+        """
+        Read rules from directories above `path`, up to root of repository (ignore
+        files outside of repository are not used).
+        :param path:str - source directory
+        :return:IgnoreRules|None
+        """
+        parents = []
+        current = os.path.abspath(path)
+        while True:
+            if any(os.path.exists(os.path.join(current, marker)) for marker in _REPOSITORY_MARKERS):
+                break
+            parent = os.path.dirname(current)
+            if parent == current:
+                ## not in repository
+                return None
+            parents.append(parent)
+            current = parent
+
+        rules = None
+        for parent in reversed(parents):
+            found = []
+            for name in IGNORE_FILES:
+                found.extend(read_rules(os.path.join(parent, name)))
+            if found:
+                rules = cls(parent, found, rules)
+
+        return rules
+
+    def is_ignored(self, path, is_dir):
+        """
+        Check if item is ignored
+        :param path:str - full path of item
+        :param is_dir:bool
+        :return:bool
+        """
+        rules = self
+        while rules is not None:
+            if path.startswith(rules.base):
+                relative = path[len(rules.base):]
+                if os.sep != '/':
+                    relative = relative.replace(os.sep, '/')
+
+                for rxp, negate, dir_only in reversed(rules.rules):
+                    if dir_only and not is_dir:
+                        continue
+                    if rxp.match(relative):
+                        return not negate
+            rules = rules.parent
+
+        return False
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Persistent index of directories tree (locate-style mode)
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import os, os.path
+import sqlite3
+
+from ff import scanner
+from ff.utils import fsencode, fsdecode
+
+__all__ = ['Index', 'FFIndexError']
+
+## version of schema, increased on every incompatible change
+_VERSION = 1
+
+## paths and names are stored as they are encoded on filesystem (BLOB), so names
+## which cannot be decoded (escaped with surrogates) can be stored too
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS dirs (
+        id INTEGER PRIMARY KEY,
+        parent_id INTEGER,
+        path BLOB NOT NULL UNIQUE,
+        mtime REAL
+    );
+    CREATE INDEX IF NOT EXISTS dirs_parent_id ON dirs (parent_id);
+
+    CREATE TABLE IF NOT EXISTS entries (
+        dir_id INTEGER NOT NULL,
+        name BLOB NOT NULL,
+        fs_name BLOB,
+        is_dir INTEGER NOT NULL,
+        is_symlink INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS entries_dir_id ON entries (dir_id);
+'''
+
+
+def _blob(text):
+    """ Encode path or name to store it in index
+        :param text:str
+        :return:sqlite3.Binary
+    """
+    return sqlite3.Binary(fsencode(text))
+
+
+def _text(blob):
+    """ Decode path or name stored in index
+        :param blob:bytes|None
+        :return:str|None
+    """
+    return fsdecode(bytes(blob)) if blob is not None else None
+
+
+class FFIndexError(Exception):
+    """
+        Index error exception
+    """
+    pass
+
+
+class Index(object):
+    """
+    Index of directories tree, stored in SQLite database.
+
+    For every indexed directory there are stored its mtime and list of items
+    inside it. Index is refreshed incrementally: only directories with changed
+    mtime are listed again.
+    """
+
+    def __init__(self, path, create=False):
+        """
+        Open index file
+        :param path:str
+        :param create:bool - create index file if doesn't exists
+        """
+        self.path = path
+
+        if not os.path.exists(path):
+            if not create:
+                raise FFIndexError('Index file %s doesn\'t exists, build it with --index-build' % path)
+
+            dirname = os.path.dirname(path)
+            if dirname and not os.path.isdir(dirname):
+                os.makedirs(dirname)
+
+        try:
+            self._db = sqlite3.connect(path)
+            self._check_version(create)
+            self._db.executescript(_SCHEMA)
+            self._db.execute('PRAGMA user_version = %d' % _VERSION)
+        except sqlite3.Error as ex:
+            raise FFIndexError('%s: %s' % (path, ex))
+
+    def _check_version(self, create):
+        """
+        Check if index file was created by compatible version of ff. Index in old
+        format is dropped when `create` is set (it will be built again).
+        :param create:bool
+        :raise FFIndexError: if index has old format
+        """
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        has_tables = self._db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dirs'").fetchone()
+        if version == _VERSION or not has_tables:
+            return
+
+        if not create:
+            self._db.close()
+            raise FFIndexError('Index file %s has old format, build it again with --index-build' % self.path)
+        self._db.executescript('DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS dirs;')
+
+    def close(self):
+        """ Close index file
+        """
+        self._db.close()
+
+    def has_dir(self, path):
+        """
+        Check if directory is indexed
+        :param path:str
+        :return:bool
+        """
+        row = self._db.execute('SELECT 1 FROM dirs WHERE path = ?', (_blob(path), )).fetchone()
+        return row is not None
+
+    def list_dir(self, path):
+        """
+        Return indexed content of directory.
+        :param path:str - directory path as it exists on filesystem
+        :return:list of tuples: (name, fs_name, is_dir, is_symlink). `fs_name` is None
+            if is the same as normalized `name`
+        """
+        rows = self._db.execute('''
+            SELECT e.name, e.fs_name, e.is_dir, e.is_symlink
+            FROM entries e JOIN dirs d ON e.dir_id = d.id
+            WHERE d.path = ?
+            ORDER BY e.rowid
+        ''', (_blob(path), ))
+        return [(_text(name), _text(fs_name), is_dir, is_symlink) for name, fs_name, is_dir, is_symlink in rows]
+
+    def _remove_tree(self, dir_id):
+        """
+        Remove directory with all its subdirectories from index
+        :param dir_id:int
+        """
+        stack = [dir_id]
+        while stack:
+            dir_id = stack.pop()
+            stack.extend(row[0] for row in self._db.execute('SELECT id FROM dirs WHERE parent_id = ?', (dir_id, )))
+            self._db.execute('DELETE FROM entries WHERE dir_id = ?', (dir_id, ))
+            self._db.execute('DELETE FROM dirs WHERE id = ?', (dir_id, ))
+
+    def update(self, root):
+        """
+        Build or refresh index for `root` directory.
+
+        Every known directory is checked with single stat call, and only
+        directories with changed mtime are listed again.
+        :param root:str
+        :return:int - number of listed directories
+        """
+        if scanner.scandir is not None:
+            list_dir = scanner.Scanner._list_dir_scandir
+        else:
+            list_dir = scanner.Scanner._list_dir_walk
+
+        listed = 0
+        row = self._db.execute('SELECT parent_id FROM dirs WHERE path = ?', (_blob(root), )).fetchone()
+        stack = [(root, row[0] if row else None)]
+        while stack:
+            path, parent_id = stack.pop()
+            row = self._db.execute('SELECT id, mtime, parent_id FROM dirs WHERE path = ?', (_blob(path), )).fetchone()
+
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                if row:
+                    self._remove_tree(row[0])
+                continue
+
+            ## directory indexed earlier as separate root
+            if row and parent_id is not None and row[2] != parent_id:
+                self._db.execute('UPDATE dirs SET parent_id = ? WHERE id = ?', (parent_id, row[0]))
+
+            if row and row[1] == mtime:
+                stack.extend((_text(child_path), child_parent_id) for child_path, child_parent_id in
+                             self._db.execute('SELECT path, parent_id FROM dirs WHERE parent_id = ?', (row[0], )))
+                continue
+
+            if row:
+                dir_id = row[0]
+                self._db.execute('UPDATE dirs SET mtime = ? WHERE id = ?', (mtime, dir_id))
+                self._db.execute('DELETE FROM entries WHERE dir_id = ?', (dir_id, ))
+            else:
+                dir_id = self._db.execute('INSERT INTO dirs (parent_id, path, mtime) VALUES (?, ?, ?)',
+                                          (parent_id, _blob(path), mtime)).lastrowid
+
+            dirs, files = list_dir(scanner.Entry(path, os.path.basename(path), path, 0, True))
+            listed += 1
+
+            rows = []
+            for entry in dirs + files:
+                fs_name = os.path.basename(entry.fs_path)
+                rows.append((dir_id, _blob(entry.name), _blob(fs_name) if fs_name != entry.name else None,
+                             entry.is_dir(), entry.is_symlink()))
+            self._db.executemany('INSERT INTO entries (dir_id, name, fs_name, is_dir, is_symlink) VALUES (?, ?, ?, ?, ?)',
+                                 rows)
+
+            subdirs = set(entry.fs_path for entry in dirs if not entry.is_symlink())
+            for child_id, child_path in self._db.execute('SELECT id, path FROM dirs WHERE parent_id = ?', (dir_id, )).fetchall():
+                if _text(child_path) not in subdirs:
+                    self._remove_tree(child_id)
+
+            stack.extend((subdir, dir_id) for subdir in sorted(subdirs, reverse=True))
+
+        self._db.commit()
+        return listed
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Buffered output of results
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import codecs
+import sys
+
+from ff.utils import IS_PY2
+
+__all__ = ['Output']
+
+## size of buffer: data is written to stream when buffer is bigger
+BUFFER_SIZE = 64 * 1024
+
+
+class Output(object):
+    """
+    Buffered writer of results.
+
+    Everything about stream is decided once, when Output is created: encoding
+    and errors policy, and if stream is TTY (then data is written immediately,
+    otherwise is collected in buffer and written in blocks).
+    """
+
+    def __init__(self, stream=None, encoding=None, errors=None, buffer_size=BUFFER_SIZE):
+        """
+        Initializer.
+        :param stream:file - default: sys.stdout
+        :param encoding:str - default: encoding of stream, or utf-8
+        :param errors:str - encoding errors policy. Default: 'surrogateescape' for unicode
+            encodings (so names not decodable with filesystem encoding are written as they are),
+            'replace' for others
+        :param buffer_size:int
+        """
+        if stream is None:
+            stream = sys.stdout
+        self._text_stream = stream
+        self._stream = getattr(stream, 'buffer', stream)
+
+        try:
+            self.is_tty = stream.isatty()
+        except (AttributeError, ValueError):
+            self.is_tty = False
+
+        self.encoding = codecs.lookup(encoding or getattr(stream, 'encoding', None) or 'utf-8').name
+        if errors is None:
+            errors = 'surrogateescape' if self.encoding.startswith('utf') and not IS_PY2 else 'replace'
+        self.errors = errors
+
+        self.buffer_size = 0 if self.is_tty else buffer_size
+        self._buffer = []
+        self._size = 0
+
+    def write(self, *parts, **kwargs):
+        """
+        Add data to buffer, and write it to stream if buffer is full.
+        :param parts:str
+        :param end:str - written after parts
+        """
+        data = ''.join(parts) + kwargs.get('end', '\n')
+        data = data.encode(self.encoding, self.errors)
+
+        self._buffer.append(data)
+        self._size += len(data)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write buffered data to stream
+        """
+        if self._buffer:
+            ## there can be something written directly to stream
+            self._text_stream.flush()
+            data, self._buffer, self._size = b''.join(self._buffer), [], 0
+            self._stream.write(data)
+        self._stream.flush()
@@ -6,12 +6,19 @@
 
 from __future__ import print_function, unicode_literals, division
 
+import bisect
+import collections
 import re
 import unicodedata
 
-from ff.utils import u
+from ff.utils import u, normalize, fsdecode
 
-__all__ = ['Pattern', 'PatternError']
+__all__ = ['Pattern', 'PatternSet', 'PatternError']
+
+LITERAL_EQUALS = 'equals'
+LITERAL_STARTS = 'starts'
+LITERAL_ENDS = 'ends'
+LITERAL_CONTAINS = 'contains'
 
 _DELIM_CLOSED = {
     ## match same
@@ -38,6 +45,163 @@ _MODES = {
 
 _VALID_MODES = sorted(_MODES.keys())
 
+## characters with special meaning in fnmatch and regexp syntax
+_RXP_FNMATCH_SPECIAL = re.compile(r'[*?[]')
+_RXP_REGEXP_SPECIAL = re.compile(r'[.^$*+?{}[\]\\|()]')
+## parts of fnmatch pattern that are not literal: wildcards and brackets
+_RXP_FNMATCH_SPLIT = re.compile(r'\[!?\]?[^]]*\]|[*?[\]]')
+
+## non ASCII bytes: names containing them are decoded before matching in bytes mode
+_RXP_NON_ASCII = re.compile(b'[\x80-\xff]')
+
+## regular expressions which cannot be run over many names joined with new line: with
+## lookarounds (could look into neighbour name) or inline flags
+_RXP_NOT_BATCHABLE = re.compile(r'\(\?[=!<aiLmsux]')
+## anchors to begin and end of string (not escaped), and groups with "dot matches new line" flag
+## (fnmatch translation), replaced when names are joined with new line
+_RXP_ANCHORS = re.compile(r'(?<!\\)((?:\\\\)*)\\([AZ])')
+_DOTALL_GROUP = '(?s:'
+## minimal length of literal searched with str.find before matching names one by one
+## (shorter literals are found too often)
+_BATCH_LITERAL_MIN = 2
+_OCTAL_DIGITS = '01234567'
+
+## regular expressions that cannot be joined with others: with backreferences, named
+## groups, or global inline flags (allowed only at the start of expression)
+_RXP_NOT_JOINABLE = re.compile(r'\\[1-9]|\(\?P|\(\?[aiLmsux]+\)')
+## global inline flags at the start of regular expression
+_RXP_GLOBAL_FLAGS = re.compile(r'^(?:\(\?[aiLmsux]+\))+')
+
+## weights used to score matches (see: `Pattern.score`)
+_SCORE_MATCH = 16
+_SCORE_GAP_START = 3
+_SCORE_GAP_EXTENSION = 1
+_BONUS_BOUNDARY = 8
+_BONUS_CAMEL_CASE = 7
+_BONUS_CONSECUTIVE = 4
+_BOUNDARY_CHARS = '/\\_-. '
+
+
+def _split_joined(buffer, starts, base=0):
+    """ Split names joined with new line, using their offsets
+        :param buffer:str
+        :param starts:sequence of int - offset of every name in buffer, plus `base`
+        :param base:int
+        :return:list of str
+    """
+    ends = [start - 1 for start in starts[1:]] + [base + len(buffer)]
+    return [buffer[start - base:end - base] for start, end in zip(starts, ends)]
+
+
+def _match_joined(search, match, buffer, starts, base=0):
+    """ Find names matching pattern in names joined with new line. Buffer is searched
+        for candidates (with regular expression or str.find), so Python code is run
+        once per candidate, not once per name.
+
+        When candidate found by `search` crosses the new line, it's not known which of
+        touched names really match, so they are checked one by one with `match`.
+
+        :param search:tuple (callable, exact)|None - function called with buffer and position,
+            returning span of next candidate or None, and flag if candidate inside single
+            name is a match for sure. None if names must be matched one by one.
+        :param match:callable - matcher of single name
+        :param buffer:str - names joined with new line
+        :param starts:sequence of int - offset of every name in buffer, plus `base` (so offsets
+            of part of bigger buffer can be used as they are)
+        :param base:int
+        :return:list of int - indexes of matching names
+    """
+    count = len(starts)
+    ## new line in any of names: cannot tell where names begin
+    if search is None or buffer.count('\n') != count - 1:
+        return [i for i, name in enumerate(_split_joined(buffer, starts, base)) if match(name)]
+
+    search, exact = search
+    found = []
+    pos = base
+    end_of_buffer = base + len(buffer)
+    while pos <= end_of_buffer:
+        span = search(buffer, pos - base)
+        if span is None:
+            break
+
+        ## pattern doesn't match empty string, so candidate is never empty
+        start, end = span[0] + base, span[1] + base
+        first = bisect.bisect_right(starts, start) - 1
+        first_end = starts[first + 1] - 1 if first + 1 < count else end_of_buffer
+        if end <= first_end:
+            last = first
+            if exact or match(buffer[starts[first] - base:first_end - base]):
+                found.append(first)
+        else:
+            last = bisect.bisect_right(starts, end - 1) - 1
+            for i in range(first, last + 1):
+                name_end = starts[i + 1] - 1 if i + 1 < count else end_of_buffer
+                if match(buffer[starts[i] - base:name_end - base]):
+                    found.append(i)
+        pos = starts[last + 1] if last + 1 < count else end_of_buffer + 1
+
+    return found
+
+
+def _find_literal(literal):
+    """ Prepare search function (see: _match_joined) finding literal with str.find
+        :param literal:str
+        :return:callable
+    """
+    length = len(literal)
+
+    def _find(buffer, pos):
+        """ Find span of literal """
+        start = buffer.find(literal, pos)
+        return (start, start + length) if start >= 0 else None
+    return _find
+
+
+def _search_regexp(rxp):
+    """ Prepare search function (see: _match_joined) for compiled regular expression
+        :param rxp:re.RegexObject
+        :return:callable
+    """
+    search = rxp.search
+
+    def _search(buffer, pos):
+        """ Find span of match """
+        found = search(buffer, pos)
+        return found.span() if found else None
+    return _search
+
+
+def _fuzzy_find_end(chars, name, fnmatch_end):
+    """ Check if all `chars` are in `name` in the same order, with anything between
+        them. Each character is searched with str.find, starting just after previous
+        one, so it never backtracks.
+
+        :param chars:str|bytes
+        :param name:str|bytes - the same type as `chars`
+        :param fnmatch_end:bool - last character must be the last one in name
+        :return:int|None - position of last matched character, None if doesn't match
+    """
+    if not chars:
+        return len(name) - 1 if fnmatch_end else -1
+
+    if fnmatch_end:
+        if name[-1:] != chars[-1:]:
+            return None
+        end = len(name) - 1
+        chars = chars[:-1]
+    else:
+        end = len(name)
+
+    pos = 0
+    for char in chars:
+        pos = name.find(char, pos, end)
+        if pos < 0:
+            return None
+        pos += 1
+
+    return end if fnmatch_end else pos - 1
+
 
 class PatternError(Exception):
     """
@@ -52,7 +216,8 @@ class Pattern(object):
     """
     __slots__ = ('_pattern', '_fnmatch_begin', '_fnmatch_end', '_ignorecase',
         '_regex_dotall', '_regex_multiline', '_invert_match', '_regexp',
-        '_fuzzy', '_magic_pattern', '_compilation_status',
+        '_fuzzy', '_magic_pattern', '_compilation_status', '_matcher',
+        '_source', '_bytes_matcher', '_batch_search',
     )
 
     STATUS_NEW = 1
@@ -71,6 +236,10 @@ class Pattern(object):
         self._fuzzy = False
         self._magic_pattern = False
         self._compilation_status = self.STATUS_NEW
+        self._matcher = None
+        self._source = ''
+        self._bytes_matcher = None
+        self._batch_search = None
 
     def compile(self):
         """ Compile pattern using data set to this
@@ -81,6 +250,7 @@ class Pattern(object):
         if self.magic_pattern:
             self._prepare_pattern__decompile_magic_pattern()
 
+        source = self._source = self.pattern
         if self.fuzzy:
             self.pattern = self._prepare_pattern__compile_fuzzy()
         elif self.regexp:
@@ -88,8 +258,375 @@ class Pattern(object):
         else:
             self.pattern = self._prepare_pattern__compile_fnmatch()
 
+        self._matcher = self._prepare_matcher(source, self.pattern.search)
+        self._bytes_matcher = self._prepare_bytes_matcher(source)
+        self._batch_search = self._prepare_batch_search()
+
         self._compilation_status = self.STATUS_COMPLETED
 
+    def match(self, name):
+        """ Check if `name` matches to compiled pattern
+            :param name:str
+            :return:bool
+        """
+        return self._matcher(name)
+
+    def match_bytes(self, name):
+        """ Check if `name` as it's stored on filesystem (bytes, not decoded
+            nor normalized) matches to compiled pattern
+            :param name:bytes
+            :return:bool
+        """
+        return self._bytes_matcher(name)
+
+    def match_joined(self, buffer, starts, base=0):
+        """ Find names matching pattern, in names joined with new line (block of index,
+            see: `tree.CompactTree.match`, used by Scanner when searching with --use-index).
+            :param buffer:str
+            :param starts:sequence of int - offset of every name in buffer, plus `base`
+            :param base:int
+            :return:list of int - indexes of matching names
+        """
+        return _match_joined(self._batch_search, self._matcher, buffer, starts, base)
+
+    def matching(self, name):
+        """ Return list of patterns matching `name`. Should be called only
+            for names already matched by `match`.
+            :param name:str
+            :return:list of Pattern
+        """
+        return [self]
+
+    def get_literal(self):
+        """ Check if pattern is plain literal (without any wildcards, special
+            characters or case insensitivity).
+            :return:tuple (kind, literal)|None - kind is one of LITERAL_* constants
+        """
+        if self.fuzzy or self.ignorecase:
+            return None
+
+        source = self._source
+        if self.regexp:
+            if _RXP_REGEXP_SPECIAL.search(source):
+                return None
+            return LITERAL_CONTAINS, source
+
+        if _RXP_FNMATCH_SPECIAL.search(source):
+            return None
+        if self.fnmatch_begin and self.fnmatch_end:
+            return LITERAL_EQUALS, source
+        elif self.fnmatch_begin:
+            return LITERAL_STARTS, source
+        elif self.fnmatch_end:
+            return LITERAL_ENDS, source
+        return LITERAL_CONTAINS, source
+
+    def _fuzzy_positions(self, name):
+        """ Find positions of pattern characters in `name` when pattern is fuzzy.
+            Returns None when name doesn't match, or when positions cannot be
+            found without regular expression (some names change length when lowercased).
+
+            :param name:str
+            :return:list of int|None
+        """
+        chars = self._source
+        if self.ignorecase:
+            chars = chars.lower()
+            lname = name.lower()
+            if len(lname) != len(name):
+                return None
+            name = lname
+
+        last = _fuzzy_find_end(chars, name, self.fnmatch_end)
+        if last is None:
+            return None
+
+        ## go back from end of match, to find shortest possible match
+        positions = []
+        pos = last + 1
+        for char in reversed(chars):
+            pos = name.rfind(char, 0, pos)
+            positions.append(pos)
+        positions.reverse()
+
+        return positions
+
+    def spans(self, name):
+        """ Find parts of `name` matched by pattern (ie. for colorizing).
+            :param name:str
+            :return:list of tuples (start, end)
+        """
+        if self.fuzzy:
+            positions = self._fuzzy_positions(name)
+            if positions is not None:
+                spans = []
+                for pos in positions:
+                    if spans and spans[-1][1] == pos:
+                        spans[-1] = (spans[-1][0], pos + 1)
+                    else:
+                        spans.append((pos, pos + 1))
+                return spans
+
+        return [match.span(1) for match in self.pattern.finditer(name) if match.end(1) > match.start(1)]
+
+    def score(self, name):
+        """ Rate how good `name` matches to pattern: consecutive characters, characters
+            on beginnings of words and in camel case are scored higher, gaps between matched
+            characters lower score.
+            :param name:str
+            :return:int|None - None if name doesn't match
+        """
+        positions = self._fuzzy_positions(name) if self.fuzzy else None
+        if positions is None:
+            match = self.pattern.search(name)
+            if not match:
+                return None
+            positions = range(match.start(1), match.end(1))
+
+        score = 0
+        prev = None
+        for pos in positions:
+            score += _SCORE_MATCH
+            if prev is not None:
+                if pos == prev + 1:
+                    score += _BONUS_CONSECUTIVE
+                else:
+                    score -= _SCORE_GAP_START + _SCORE_GAP_EXTENSION * (pos - prev - 2)
+
+            if pos == 0 or name[pos - 1] in _BOUNDARY_CHARS:
+                score += _BONUS_BOUNDARY
+            elif name[pos - 1].islower() and name[pos].isupper():
+                score += _BONUS_CAMEL_CASE
+            prev = pos
+
+        return score
+
+    def _prepare_matcher(self, source, search):
+        """ Prepare function used to match names.
+
+            Simple patterns (just literal, without any wildcards or special characters)
+            are matched with plain string operations. For the rest of patterns compiled
+            regular expression is used, but when there is a literal part required to match,
+            it's checked first with `in` operator, and regular expression is run only for
+            names containing it.
+
+            :param source:str|bytes - pattern before compilation
+            :param search:callable - search method of compiled regular expression,
+                for the same type of strings as `source`
+            :return:callable
+        """
+        if self.fuzzy:
+            end = self.fnmatch_end
+            if not source and self.fnmatch_begin and end:
+                return lambda name: not name
+            if not self.ignorecase:
+                return lambda name: _fuzzy_find_end(source, name, end) is not None
+
+            chars = source.lower()
+
+            def _match_fuzzy_ignorecase(name):
+                """ Match fuzzy pattern ignoring case """
+                lname = name.lower()
+                if len(lname) != len(name):
+                    return search(name) is not None
+                return _fuzzy_find_end(chars, lname, end) is not None
+            return _match_fuzzy_ignorecase
+
+        if self.ignorecase:
+            return lambda name: search(name) is not None
+
+        kind = (self.get_literal() or (None, ))[0]
+        if kind == LITERAL_EQUALS:
+            return lambda name: name == source
+        elif kind == LITERAL_STARTS:
+            return lambda name: name.startswith(source)
+        elif kind == LITERAL_ENDS:
+            return lambda name: name.endswith(source)
+        elif kind == LITERAL_CONTAINS:
+            return lambda name: source in name
+
+        if self.regexp:
+            required = self._find_required_literal_regexp(self._source)
+        else:
+            required = max(_RXP_FNMATCH_SPLIT.split(self._source), key=len)
+        if isinstance(source, bytes):
+            required = required.encode('ascii')
+
+        if required:
+            return lambda name: required in name and search(name) is not None
+
+        return lambda name: search(name) is not None
+
+    def _prepare_batch_search(self):
+        """ Prepare search used to match many names joined with new line (see: _match_joined).
+
+            When pattern requires literal, candidates are found with str.find and checked
+            one by one. Otherwise regular expression is run over all names: it's compiled
+            with re.MULTILINE, begin and end of string anchors are changed to begin and end
+            of line, and dot doesn't match new line (there is no new line in names, so
+            it doesn't change anything for single name).
+
+            :return:tuple (callable, exact)|None - None if names must be matched one by one:
+                for fuzzy patterns (not matched with regular expressions), patterns matching
+                empty string (every match would be empty) and patterns in which new line
+                is not like begin or end of name (see: _RXP_NOT_BATCHABLE)
+        """
+        rxp = self.pattern
+        if self.fuzzy or rxp.search(''):
+            return None
+
+        if not self.ignorecase:
+            literal = self.get_literal()
+            if literal:
+                required = literal[1]
+            elif self.regexp:
+                required = self._find_required_literal_regexp(self._source)
+            else:
+                required = max(_RXP_FNMATCH_SPLIT.split(self._source), key=len)
+            if len(required) >= _BATCH_LITERAL_MIN:
+                return _find_literal(required), bool(literal) and literal[0] == LITERAL_CONTAINS
+
+        source = _RXP_ANCHORS.sub(lambda match: match.group(1) + ('^' if match.group(2) == 'A' else '$'),
+                                  rxp.pattern.replace(_DOTALL_GROUP, '(?:'))
+        if _RXP_NOT_BATCHABLE.search(source):
+            return None
+        return _search_regexp(re.compile(source, (rxp.flags | re.MULTILINE) & ~re.DOTALL)), True
+
+    def _prepare_bytes_matcher(self, source):
+        """ Prepare function used to match names not decoded from filesystem encoding.
+
+            When both pattern and name are ASCII, decoding and normalization of name
+            wouldn't change anything, so name is matched as it is, with pattern compiled
+            for bytes. All other names are decoded, normalized and matched with `match`.
+
+            :param source:str - pattern before compilation
+            :return:callable
+        """
+        match = self.match
+
+        def _match_decoded(name):
+            """ Decode and normalize name, and match it """
+            return match(normalize(fsdecode(name)))
+
+        try:
+            source = source.encode('ascii')
+            rxp = re.compile(self.pattern.pattern.encode('ascii'), self.pattern.flags & ~re.UNICODE)
+        ## non-ASCII pattern, or escapes valid only in str patterns (\u, \N{...})
+        except (UnicodeEncodeError, re.error):
+            return _match_decoded
+
+        match_ascii = self._prepare_matcher(source, rxp.search)
+        non_ascii = _RXP_NON_ASCII.search
+
+        def _match_bytes(name):
+            """ Match ASCII names directly, decode the rest """
+            if non_ascii(name):
+                return _match_decoded(name)
+            return match_ascii(name)
+        return _match_bytes
+
+    @staticmethod
+    def _skip_escape(source, i):
+        """ Find end of escape sequence with alphanumeric character (ie. \\d, \\x41, \\101,
+            \\u00e9, \\N{name} or backreference \\12)
+
+            :param source:str - regular expression
+            :param i:int - position of character after backslash
+            :return:int - position after escape sequence
+        """
+        char = source[i:i + 1]
+        i += 1
+        if char == 'x':
+            return i + 2
+        if char == 'u':
+            return i + 4
+        if char == 'U':
+            return i + 8
+        if char == 'N' and source[i:i + 1] == '{':
+            end = source.find('}', i)
+            return end + 1 if end >= 0 else len(source)
+        if char == '0':
+            ## octal escape: up to 2 more octal digits
+            for _ in range(2):
+                if source[i:i + 1] not in _OCTAL_DIGITS:
+                    break
+                i += 1
+            return i
+        if char.isdigit():
+            ## octal escape (3 octal digits) or backreference (up to 2 digits)
+            digits = source[i:i + 2]
+            if char in _OCTAL_DIGITS and len(digits) == 2 and all(digit in _OCTAL_DIGITS for digit in digits):
+                return i + 2
+            if source[i:i + 1].isdigit():
+                i += 1
+        return i
+
+    @staticmethod
+    def _find_required_literal_regexp(source):
+        """ Find longest literal part of regular expression, which must be present
+            in every matching string.
+
+            Only top level of expression is analyzed, and when there is no certainty
+            (alternatives, inline flags), empty string is returned.
+
+            :param source:str - regular expression
+            :return:str
+        """
+        if '|' in source or '(?' in source:
+            return ''
+
+        parts = []
+        current = ''
+        level = 0
+        i = 0
+        while i < len(source):
+            char = source[i]
+            i += 1
+
+            literal = None
+            if char == '\\':
+                if i < len(source) and not source[i].isalnum():
+                    literal = source[i]
+                    i += 1
+                else:
+                    ## escapes like \d, \x41 or \N{...} end current part
+                    i = Pattern._skip_escape(source, i)
+            elif char == '[':
+                ## skip whole class, first "]" (or "^]") is literal
+                if source[i:i + 1] == '^':
+                    i += 1
+                if source[i:i + 1] == ']':
+                    i += 1
+                while i < len(source) and source[i] != ']':
+                    i += 2 if source[i] == '\\' else 1
+                i += 1
+            elif char == '{':
+                ## skip whole quantifier
+                while i < len(source) and source[i] != '}':
+                    i += 1
+                i += 1
+            elif char == '(':
+                level += 1
+            elif char == ')':
+                level -= 1
+            elif char not in '.^$*+?' and level == 0:
+                literal = char
+
+            ## literal is optional when quantified with "*", "?" or "{", and with "+"
+            ## it may be repeated, so it ends current part
+            quantifier = source[i:i + 1]
+            if literal is None or quantifier in ('*', '?', '{'):
+                parts.append(current)
+                current = ''
+            else:
+                current += literal
+                if quantifier == '+':
+                    parts.append(current)
+                    current = ''
+
+        parts.append(current)
+        return max(parts, key=len)
+
     def _prepare_pattern__decompile_magic_pattern(self):
         """ Parse pattern and try to recognize it is magic pattern.
             If so, parse magic pattern and set options for argparse
@@ -186,7 +723,10 @@ class Pattern(object):
         if self.regex_multiline:
             flags = flags | re.MULTILINE
 
-        pat = '(%s)' % self.pattern
+        ## global inline flags must stay at the start of expression
+        inline_flags = _RXP_GLOBAL_FLAGS.match(self.pattern)
+        inline_flags = inline_flags.group(0) if inline_flags else ''
+        pat = '%s(%s)' % (inline_flags, self.pattern[len(inline_flags):])
 
         return re.compile(pat, flags)
 
@@ -407,8 +947,10 @@ class Pattern(object):
         elif self._regexp:
             ret += 'g'
 
-        # pylint: disable=no-member
-        pat = self._pattern if isinstance(self._pattern, (str, unicode)) else self._pattern.pattern
+        if self._compilation_status == self.STATUS_COMPLETED:
+            pat = self._source
+        else:
+            pat = self._pattern
         ret += '/' + pat + '/'
 
         for mod, name in _MODIFIERS.items():
@@ -430,3 +972,124 @@ class Pattern(object):
             if val:
                 properties.append('%s=%s' % (prop, val))
         return '<Pattern(%s)>' % ', '.join(properties)
+
+
+class PatternSet(object):
+    """ Set of compiled patterns, matched at once.
+
+        Literal patterns are grouped by kind: matched with single set lookup,
+        str.startswith/str.endswith with tuple of literals, or with single regular
+        expression (alternative of all literals, for one literal `in` operator is used).
+        Regular expressions with the same flags are joined into single alternative.
+        Name matches if any of patterns matches.
+    """
+    __slots__ = ('patterns', '_equals', '_starts', '_ends', '_contains', '_searches')
+
+    def __init__(self, patterns):
+        """ Initializer.
+            :param patterns:list of Pattern - compiled patterns
+        """
+        self.patterns = list(patterns)
+
+        literals = collections.defaultdict(list)
+        regexps = collections.OrderedDict()
+        self._searches = []
+        for pat in self.patterns:
+            literal = pat.get_literal()
+            if literal:
+                literals[literal[0]].append(literal[1])
+            elif not pat.fuzzy and not _RXP_NOT_JOINABLE.search(pat.pattern.pattern):
+                regexps.setdefault(pat.pattern.flags, []).append(pat.pattern.pattern)
+            else:
+                self._searches.append(pat.match)
+
+        self._equals = frozenset(literals[LITERAL_EQUALS])
+        self._starts = tuple(literals[LITERAL_STARTS])
+        self._ends = tuple(literals[LITERAL_ENDS])
+
+        contains = literals[LITERAL_CONTAINS]
+        if len(contains) > 1:
+            self._searches.insert(0, re.compile('|'.join(re.escape(literal) for literal in contains)).search)
+        elif contains:
+            self._searches.insert(0, lambda name, literal=contains[0]: literal in name)
+
+        for flags, items in regexps.items():
+            rxp = re.compile('|'.join('(?:%s)' % item for item in items), flags)
+            self._searches.append(rxp.search)
+
+    def match(self, name):
+        """ Check if `name` matches to any of patterns
+            :param name:str
+            :return:bool
+        """
+        if name in self._equals:
+            return True
+        if self._starts and name.startswith(self._starts):
+            return True
+        if self._ends and name.endswith(self._ends):
+            return True
+        for search in self._searches:
+            if search(name):
+                return True
+        return False
+
+    def match_joined(self, buffer, starts, base=0):
+        """ Find names matching any of patterns, in names joined with new line
+            (see: `Pattern.match_joined`)
+            :param buffer:str
+            :param starts:sequence of int - offset of every name in buffer, plus `base`
+            :param base:int
+            :return:list of int - indexes of matching names
+        """
+        found = set()
+        for pat in self.patterns:
+            found.update(pat.match_joined(buffer, starts, base))
+        return sorted(found)
+
+    def matching(self, name):
+        """ Return list of patterns matching `name`
+            :param name:str
+            :return:list of Pattern
+        """
+        return [pat for pat in self.patterns if pat.match(name)]
+
+    def match_bytes(self, name):
+        """ Check if `name` as it's stored on filesystem (bytes, not decoded
+            nor normalized) matches to any of patterns
+            :param name:bytes
+            :return:bool
+        """
+        for pat in self.patterns:
+            if pat.match_bytes(name):
+                return True
+        return False
+
+    def spans(self, name):
+        """ Find parts of `name` matched by any of patterns.
+            :param name:str
+            :return:list of tuples (start, end)
+        """
+        spans = []
+        for start, end in sorted(span for pat in self.matching(name) for span in pat.spans(name)):
+            if spans and start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(end, spans[-1][1]))
+            else:
+                spans.append((start, end))
+        return spans
+
+    def score(self, name):
+        """ Score of the best matching pattern
+            :param name:str
+            :return:int|None
+        """
+        scores = [pat.score(name) for pat in self.matching(name)]
+        return max(scores) if scores else None
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __str__(self):
+        return ' '.join(str(pat) for pat in self.patterns)
+
+    def __repr__(self):
+        return '<PatternSet(%s)>' % ', '.join(repr(pat) for pat in self.patterns)
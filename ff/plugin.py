@@ -11,12 +11,16 @@ import glob
 import os
 import sys
 import textwrap
+import threading
 
 from ff.utils import disp, u, normalize
 
 
 PluginMetaData = collections.namedtuple('PluginMetaData', ('type', 'name'))
 
+## maximal number of items kept in stat cache
+STAT_CACHE_SIZE = 16384
+
 
 def parse_plugin_filename(name):
     """
@@ -40,6 +44,81 @@ def parse_plugin_filename(name):
     return PluginMetaData(plugin_type, plugin_name)
 
 
+class StatCache(object):
+    """ Cache of stat data of found items, shared by scanner and plugins.
+
+        Keeps at most `max_size` items, when is full least recently used
+        items are removed. Scanner fills cache with data collected while listing
+        directories (os.DirEntry), so usually there is no need to call os.stat again.
+        Every search has its own cache (scanner.Entry.cache, with own hits/misses counters),
+        so stat data is never older then current search. Shared `stat_cache` is used by
+        plugins looking for stat data by path, server keeps it up to date.
+    """
+
+    def __init__(self, max_size=STAT_CACHE_SIZE):
+        """ Initializer.
+            :param max_size:int
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def stat(self, path, dir_entry=None):
+        """ Return stat data of `path` (following symlinks), from cache if there is.
+            :param path:str
+            :param dir_entry:os.DirEntry - used instead of os.stat if given
+            :return:os.stat_result:raise OSError:
+        """
+        with self._lock:
+            result = self._items.pop(path, None)
+            if result is not None:
+                self._items[path] = result
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = dir_entry.stat() if dir_entry is not None else os.stat(path)
+        self.put(path, result)
+        return result
+
+    def put(self, path, result):
+        """ Add stat data to cache
+            :param path:str
+            :param result:os.stat_result
+        """
+        with self._lock:
+            self._items.pop(path, None)
+            self._items[path] = result
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, path):
+        """ Remove stat data of `path` from cache (ie. when item was modified)
+            :param path:str
+        """
+        with self._lock:
+            self._items.pop(path, None)
+
+    def clear(self):
+        """ Remove all items from cache, and reset counters
+        """
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def __contains__(self, path):
+        return path in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+# pylint: disable=invalid-name
+stat_cache = StatCache()
+
+
 class FFPluginError(Exception):
     """ Exception class for plugins.
     """
@@ -94,6 +173,17 @@ class FFPlugin(object):
     """ Wrapper for custom plugin.
 
         Loads module, read data, bind custom argument and allow to easy run plugin.
+
+        There are two versions of plugins API:
+            * 1 - module defines `plugin_action(name, argument, path)`, called for every
+                tested item
+            * 2 - module defines `plugin_prepare(name, argument)`, called once, which returns
+                predicate: callable called for every tested item with `scanner.Entry` (with
+                cached stat data). Module can define also `plugin_test_batch(predicate, entries)`,
+                which tests many entries at once and returns list of results.
+
+        Plugins using API version 1 are called by predicate adapter, so both can be
+        used in the same way: by `FFPlugin.test` and `FFPlugin.test_batch`.
     """
 
     def __init__(self, name, type_, **kw):
@@ -103,6 +193,8 @@ class FFPlugin(object):
                 * name (required)
                 * type_ (required)
                 * action (optional) (will be overwrited by `FFPlugin`.`load`)
+                * prepare (optional) (will be overwrited by `FFPlugin`.`load`)
+                * batch (optional) (will be overwrited by `FFPlugin`.`load`)
                 * descr (optional) (will be overwrited by `FFPlugin`.`load`)
                 * help (optional) (will be overwrited by `FFPlugin`.`load`)
                 * argument (optional)
@@ -112,6 +204,9 @@ class FFPlugin(object):
         self.name = name
         self.type = type_
         self.action = kw.get('action')
+        self.prepare_action = kw.get('prepare')
+        self.batch_action = kw.get('batch')
+        self.predicate = None
         self.descr = kw.get('descr', '')
         self.help = kw.get('help', '')
         self.argument = kw.get('argument')
@@ -132,34 +227,91 @@ class FFPlugin(object):
             Returns imported module.
         """
         _mod = __import__('_'.join(['ffplugin', type_, name]), {}, {}, [], 0)
-        ## monkey patch - plugin doesn't need to import FFPluginError
+        ## monkey patch - plugin doesn't need to import FFPluginError and stat_cache
         _mod.FFPluginError = FFPluginError
+        _mod.stat_cache = stat_cache
 
         return _mod
 
     def load(self):
         """ Load and initialize plugin with data from module.
 
-            Set `descr`, `help` and `action`.
+            Set `descr`, `help`, `action`, `prepare_action` and `batch_action`.
         """
         _module = self._import(self.type, self.name)
 
         self.descr = getattr(_module, 'PLUGIN_DESCR', '')
-        if isinstance(self.descr, collections.Callable):
+        if callable(self.descr):
             self.descr = self.descr(self.name)
 
         self.help = getattr(_module, 'PLUGIN_HELP', '')
-        if isinstance(self.help, collections.Callable):
+        if callable(self.help):
             self.help = self.help(self.name)
 
-        self.action = _module.plugin_action
+        self.prepare_action = getattr(_module, 'plugin_prepare', None)
+        self.batch_action = getattr(_module, 'plugin_test_batch', None)
+        if self.prepare_action is None:
+            self.action = _module.plugin_action
+        else:
+            self.action = getattr(_module, 'plugin_action', None)
+
+    @property
+    def api_version(self):
+        """ Version of plugins API used by plugin
+            :return:int
+        """
+        return 1 if self.prepare_action is None else 2
+
+    @property
+    def has_batch(self):
+        """ Check if plugin can test many entries at once by itself
+            :return:bool
+        """
+        return self.prepare_action is not None and self.batch_action is not None
+
+    def prepare(self):
+        """ Prepare predicate used to test entries. Plugin argument is parsed
+            and validated here, once (API version 2).
+            :return:callable
+        """
+        if self.prepare_action is not None:
+            self.predicate = self.prepare_action(self.name, self.argument)
+        else:
+            action, name, argument = self.action, self.name, self.argument
+            self.predicate = lambda entry: action(name, argument, entry.path)
+
+        return self.predicate
+
+    def test(self, entry):
+        """ Test single entry
+            :param entry:scanner.Entry
+            :return:bool
+        """
+        if self.predicate is None:
+            self.prepare()
+        return self.predicate(entry)
+
+    def test_batch(self, entries):
+        """ Test many entries at once
+            :param entries:list of scanner.Entry
+            :return:list of bool
+        """
+        if self.predicate is None:
+            self.prepare()
+        if self.has_batch:
+            return self.batch_action(self.predicate, entries)
+        return [self.predicate(entry) for entry in entries]
 
     def run(self, path):
         """ Run plugins callable.
 
             Pass self.name, self.argument and path.
         """
-        return self.action(self.name, self.argument, path)
+        if self.action is not None:
+            return self.action(self.name, self.argument, path)
+
+        from ff.scanner import Entry
+        return self.test(Entry(path, os.path.basename(path), path, 0, os.path.isdir(path), os.path.islink(path)))
 
 
 class FFPlugins(list):
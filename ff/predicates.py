@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Built-in tests of items metadata (size, modification time, type, permissions, owner)
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import datetime
+import operator
+import os, os.path
+import re
+import stat
+import time
+
+try:
+    import pwd
+    import grp
+except ImportError:
+    pwd = grp = None
+
+__all__ = ['Metadata', 'PredicateError']
+
+TYPE_FILE = 'f'
+TYPE_DIR = 'd'
+TYPE_SYMLINK = 'l'
+TYPES = (TYPE_FILE, TYPE_DIR, TYPE_SYMLINK)
+
+_OPERATORS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '=': operator.eq,
+}
+
+_SIZE_MULTI = {
+    'b': 1,
+    'k': 1024,
+    'm': 1024 ** 2,
+    'g': 1024 ** 3,
+}
+
+_TIME_MULTI = {
+    's': 1,
+    'm': 60,
+    'h': 60 * 60,
+    'd': 24 * 60 * 60,
+    'w': 7 * 24 * 60 * 60,
+}
+
+_RXP_SIZE = re.compile(r'^([<>=]?)(\d+)([bkmg]?)$', re.IGNORECASE)
+_RXP_AGE = re.compile(r'^(\d+)([smhdw])$')
+_DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S')
+
+
+class PredicateError(Exception):
+    """
+        Invalid argument of predicate
+    """
+    pass
+
+
+def parse_size(value):
+    """
+    Parse size condition. Syntax (without spaces): operator size multiplier,
+    where operator (optional) is one of: >, <, = (default), and multiplier (optional)
+    is one of: b (default), k, m, g.
+    :param value:str
+    :return:tuple (operator function, size in bytes):raise PredicateError:
+    """
+    match = _RXP_SIZE.match(value.strip())
+    if not match:
+        raise PredicateError('invalid size: %s' % value)
+
+    oper, size, multi = match.groups()
+    return _OPERATORS[oper or '='], int(size) * _SIZE_MULTI[(multi or 'b').lower()]
+
+
+def parse_time(value, now=None):
+    """
+    Parse point in time. Accepted are: age (number with one of units: s, m, h, d, w,
+    ie. 2d means: 2 days ago), date (YYYY-MM-DD, optionally with time: HH:MM[:SS]),
+    or path to file: then its modification time is used.
+    :param value:str
+    :param now:float - current timestamp
+    :return:float - timestamp:raise PredicateError:
+    """
+    match = _RXP_AGE.match(value.strip())
+    if match:
+        if now is None:
+            now = time.time()
+        return now - int(match.group(1)) * _TIME_MULTI[match.group(2)]
+
+    for fmt in _DATE_FORMATS:
+        try:
+            date = datetime.datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+        return time.mktime(date.timetuple())
+
+    try:
+        return os.stat(value).st_mtime
+    except OSError:
+        raise PredicateError('invalid time, date or path: %s' % value)
+
+
+def parse_perm(value):
+    """
+    Parse permissions condition, in octal (like find -perm): "mode" means exactly
+    this permissions, "-mode" - all of given bits are set, "/mode" - any of given bits is set.
+    :param value:str
+    :return:tuple (kind: one of '', '-', '/', mode):raise PredicateError:
+    """
+    kind = value[:1] if value[:1] in ('-', '/') else ''
+    try:
+        mode = int(value[len(kind):], 8)
+    except ValueError:
+        raise PredicateError('invalid permissions: %s' % value)
+
+    if not 0 <= mode <= 0o7777:
+        raise PredicateError('invalid permissions: %s' % value)
+
+    return kind, mode
+
+
+def parse_types(value):
+    """
+    Parse types of items: comma separated list of f (file), d (directory) and l (symbolic link)
+    :param value:str
+    :return:set of str:raise PredicateError:
+    """
+    types = set(item.strip() for item in value.split(','))
+    for type_ in types:
+        if type_ not in TYPES:
+            raise PredicateError('invalid type: %s (choose from %s)' % (type_, ', '.join(TYPES)))
+    return types
+
+
+def _parse_id(value, database, kind):
+    """
+    Find id of user or group by name (numeric value is used as is)
+    :param value:str
+    :param database: pwd or grp module
+    :param kind:str - 'user' or 'group'
+    :return:int:raise PredicateError:
+    """
+    if value.isdigit():
+        return int(value)
+
+    if database is None:
+        raise PredicateError('%s names are not supported on this platform, use numeric id' % kind)
+
+    try:
+        entry = database.getpwnam(value) if kind == 'user' else database.getgrnam(value)
+    except KeyError:
+        raise PredicateError('unknown %s: %s' % (kind, value))
+    return entry[2]
+
+
+def parse_user(value):
+    """
+    Find user id
+    :param value:str - user name or id
+    :return:int:raise PredicateError:
+    """
+    return _parse_id(value, pwd, 'user')
+
+
+def parse_group(value):
+    """
+    Find group id
+    :param value:str - group name or id
+    :return:int:raise PredicateError:
+    """
+    return _parse_id(value, grp, 'group')
+
+
+def _is_empty_dir(path):
+    """
+    Check if directory is empty
+    :param path:str
+    :return:bool
+    """
+    try:
+        return not os.listdir(path)
+    except OSError:
+        return False
+
+
+class Metadata(object):
+    """
+    Test of entry metadata: all given conditions must be met. Entry type is checked
+    with data collected while listing directory, and all other conditions are evaluated
+    with single stat (of symlink target, for symbolic links) per entry.
+
+    Can be used as test in ff.evaluator.
+    """
+    has_batch = False
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, size=None, newer=None, older=None, types=None, perm=None, uid=None, gid=None, empty=False):
+        """
+        Initializer.
+        :param size:tuple (operator function, size) - see: parse_size
+        :param newer:float - timestamp
+        :param older:float - timestamp
+        :param types:set of str - see: parse_types
+        :param perm:tuple (kind, mode) - see: parse_perm
+        :param uid:int
+        :param gid:int
+        :param empty:bool
+        """
+        self.types = types
+        self.empty = empty
+
+        checks = []
+        if size is not None:
+            oper, size_ = size
+            checks.append(lambda st: oper(st.st_size, size_))
+        if newer is not None:
+            checks.append(lambda st: st.st_mtime > newer)
+        if older is not None:
+            checks.append(lambda st: st.st_mtime < older)
+        if perm is not None:
+            kind, mode = perm
+            if kind == '-':
+                checks.append(lambda st: st.st_mode & mode == mode)
+            elif kind == '/':
+                checks.append(lambda st: st.st_mode & mode != 0 or mode == 0)
+            else:
+                checks.append(lambda st: stat.S_IMODE(st.st_mode) == mode)
+        if uid is not None:
+            checks.append(lambda st: st.st_uid == uid)
+        if gid is not None:
+            checks.append(lambda st: st.st_gid == gid)
+        self._checks = checks
+
+    def _test_type(self, entry):
+        """
+        Check type of entry
+        :param entry:scanner.Entry
+        :return:bool
+        """
+        if entry.is_symlink():
+            return TYPE_SYMLINK in self.types
+        if entry.is_dir():
+            return TYPE_DIR in self.types
+        if TYPE_FILE not in self.types:
+            return False
+
+        ## sockets, devices etc are not files
+        try:
+            return stat.S_ISREG(entry.stat().st_mode)
+        except OSError:
+            return False
+
+    def test(self, entry):
+        """
+        Test single entry
+        :param entry:scanner.Entry
+        :return:bool
+        """
+        if self.types and not self._test_type(entry):
+            return False
+
+        if self._checks or self.empty:
+            try:
+                st = entry.stat()
+            except OSError:
+                return False
+
+            for check in self._checks:
+                if not check(st):
+                    return False
+
+            if self.empty:
+                if entry.is_dir():
+                    return _is_empty_dir(entry.fs_path)
+                return st.st_size == 0
+
+        return True
+
+    def test_batch(self, entries):
+        """
+        Test many entries at once
+        :param entries:list of scanner.Entry
+        :return:list of bool
+        """
+        return [self.test(entry) for entry in entries]
+
+    def __len__(self):
+        """ Number of conditions
+        """
+        return len(self._checks) + bool(self.types) + bool(self.empty)
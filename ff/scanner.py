@@ -6,19 +6,191 @@
 
 from __future__ import print_function, unicode_literals, division
 
+import collections
+import itertools
 import os, os.path
 
-from ff.utils import normalize, err
+try:
+    from concurrent import futures
+except ImportError:
+    futures = None
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+from ff.evaluator import AllOf
+from ff.ignore import IgnoreRules, IGNORE_FILES
+from ff.plugin import StatCache, stat_cache
+from ff.utils import normalize, err, fsencode, fsdecode, read_mounts
 
 
 MODE_ALL = 'all'
 MODE_FILES = 'files'
 MODE_DIRS = 'dirs'
+ENGINE_SCANDIR = 'scandir'
+ENGINE_WALK = 'walk'
+ENGINES = (ENGINE_SCANDIR, ENGINE_WALK)
+ORDER_DFS = 'dfs'
+ORDER_BFS = 'bfs'
+ORDER_DEEPENING = 'deepening'
+ORDERS = (ORDER_DFS, ORDER_BFS, ORDER_DEEPENING)
 VCS_NAMES = {
     '.git': 1, '.svn': 1, 'CVS': 1, '.hg': 1,
     '_MTN': 1, 'RCS': 1, 'SCCS': 1, '_darcs': 1,
     '_sgbak': 1
 }
+## number of items tested at once by plugins supporting it
+TESTS_BATCH_SIZE = 256
+_VCS_NAMES_BYTES = dict((name.encode('ascii'), 1) for name in VCS_NAMES)
+_IGNORE_FILES_BYTES = dict((name.encode('ascii'), name) for name in IGNORE_FILES)
+
+
+class Entry(object):
+    """
+    Single item found while scanning sources.
+
+    Remembers item type (and stat data, when asked for it) collected while
+    listing parent directory, so consumers don't have to touch filesystem again.
+
+    `path` and `name` are normalized (used for matching and displaying),
+    `fs_path` is path as it exists on filesystem. `patterns` is list of patterns
+    matched by entry (set by Scanner). `ignore` are rules from ignore files
+    applicable to content of directory (set by Scanner with cfg.respect_ignore).
+
+    `cache` is stat cache (plugin.StatCache) of search in which entry was found, by
+    default: plugin.stat_cache shared with plugins.
+
+    For directories, Scanner can also set: `fs_id` - (device, inode) of directory,
+    `ancestors` - set of `fs_id` of parent directories (to detect loops when
+    following symlinks), and `descend` - if directory should be listed.
+    """
+    __slots__ = ('path', 'name', 'fs_path', 'depth', 'patterns', 'ignore', 'fs_id', 'ancestors', 'descend', 'cache',
+                 '_is_dir', '_is_symlink', '_dir_entry', '_stat')
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, path, name, fs_path, depth, is_dir, is_symlink=False, dir_entry=None, cache=stat_cache):
+        self.path = path
+        self.name = name
+        self.fs_path = fs_path
+        self.depth = depth
+        self.patterns = None
+        self.ignore = None
+        self.fs_id = None
+        self.ancestors = frozenset()
+        self.descend = True
+        self.cache = cache
+        self._is_dir = is_dir
+        self._is_symlink = is_symlink
+        self._dir_entry = dir_entry
+        self._stat = None
+
+    def is_dir(self):
+        """ Check if entry is directory (or symlink to directory)
+        """
+        return self._is_dir
+
+    def is_symlink(self):
+        """ Check if entry is symbolic link
+        """
+        return self._is_symlink
+
+    def stat(self):
+        """
+        Return stat data of entry. Called once, result is cached (and stored
+        in stat cache of search).
+        :return:os.stat_result
+        """
+        if self._stat is None:
+            self._stat = self.cache.stat(self.fs_path, self._dir_entry)
+        return self._stat
+
+    @property
+    def size(self):
+        """ Size of entry in bytes
+        """
+        return self.stat().st_size
+
+    def child(self, name, fs_path, is_dir, is_symlink=False, dir_entry=None):
+        """
+        Create Entry for item found inside this one
+        :param name:str - name as it exists on filesystem
+        :param fs_path:str
+        :param is_dir:bool
+        :param is_symlink:bool
+        :param dir_entry:os.DirEntry
+        :return:Entry
+        """
+        name = normalize(name)
+        return Entry(os.path.join(self.path, name), name, fs_path, self.depth + 1, is_dir, is_symlink, dir_entry,
+                     self.cache)
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return '<Entry(%s%s)>' % (self.path, os.sep if self._is_dir else '')
+
+
+class BytesEntry(Entry):
+    """
+    Entry found while scanning sources in bytes mode.
+
+    `fs_name` and `fs_path` are bytes, as they are returned by filesystem.
+    `name` and `path` are decoded and normalized only when asked for them
+    (usually only for matched items).
+    """
+    __slots__ = ('fs_name', '_name', '_path')
+
+    # pylint: disable=too-many-arguments,super-init-not-called
+    def __init__(self, fs_name, fs_path, depth, is_dir, is_symlink=False, dir_entry=None, cache=stat_cache):
+        self.fs_name = fs_name
+        self.fs_path = fs_path
+        self.depth = depth
+        self.patterns = None
+        self.ignore = None
+        self.fs_id = None
+        self.ancestors = frozenset()
+        self.descend = True
+        self.cache = cache
+        self._is_dir = is_dir
+        self._is_symlink = is_symlink
+        self._dir_entry = dir_entry
+        self._stat = None
+        self._name = None
+        self._path = None
+
+    @property
+    def name(self):
+        """ Decoded and normalized name of entry
+        """
+        if self._name is None:
+            self._name = normalize(fsdecode(self.fs_name))
+        return self._name
+
+    @property
+    def path(self):
+        """ Decoded and normalized path of entry
+        """
+        if self._path is None:
+            self._path = normalize(fsdecode(self.fs_path))
+        return self._path
+
+    def child(self, name, fs_path, is_dir, is_symlink=False, dir_entry=None):
+        """
+        Create BytesEntry for item found inside this one
+        :param name:bytes
+        :param fs_path:bytes
+        :param is_dir:bool
+        :param is_symlink:bool
+        :param dir_entry:os.DirEntry
+        :return:BytesEntry
+        """
+        return BytesEntry(name, fs_path, self.depth + 1, is_dir, is_symlink, dir_entry, self.cache)
+
 
 # pylint: disable=too-many-instance-attributes,too-few-public-methods
 class Scanner(object):
@@ -29,26 +201,110 @@ class Scanner(object):
         self.sources = cfg.sources
 
         self.depth = cfg.depth
+        self.min_depth = cfg.min_depth
         self.excluded_paths = cfg.excluded_paths
         self.include_vcs = cfg.include_vcs
         self.mode = cfg.mode
         self.pattern = cfg.pattern
         self.path_search = cfg.path_search
         self.invert_match = cfg.invert_match
+        ## list of tests means: all of them must pass
         self.tests = cfg.tests
+        if isinstance(self.tests, list):
+            self.tests = AllOf(self.tests)
+
+        self.engine = cfg.engine
+        if self.engine == ENGINE_SCANDIR and scandir is None:
+            self.engine = ENGINE_WALK
+
+        self.jobs = cfg.jobs if futures is not None else 1
+        self.ordered = cfg.ordered
+
+        ## iterative deepening lists directories level by level, many times, so in single thread only
+        self.order = cfg.order
+        if self.order == ORDER_DEEPENING:
+            self.jobs = 1
+
+        self.sort_by_score = cfg.sort_by_score
+
+        self.bytes_mode = cfg.bytes_mode
+        self.respect_ignore = cfg.respect_ignore
+
+        self.xdev = cfg.xdev
+        self.follow_symlinks = cfg.follow_symlinks
+        ## mount points of skipped filesystems types, read once
+        self.skipped_mounts = set()
+        if cfg.skipped_fs_types:
+            self.skipped_mounts = set(mount for mount, fs_type in read_mounts().items()
+                                      if fs_type in cfg.skipped_fs_types)
+            if self.bytes_mode:
+                self.skipped_mounts = set(fsencode(mount) for mount in self.skipped_mounts)
+
+        ## statistics of search (stats.Stats), collected only when given
+        self.stats = cfg.stats
+        ## stat data of found items, every search has its own (see: `Scanner.__iter__`)
+        self.stat_cache = stat_cache
+
+        ## index is read from single thread only, and keeps decoded names. In tree.CompactTree
+        ## names are matched at once, without listing directories (see: `Scanner._match_tree`)
+        self.index = cfg.index
+        if self.index is not None:
+            self.jobs = 1
+            self.bytes_mode = False
+
+    @property
+    def excluded_paths(self):
+        """ Getter for excluded_paths property
+            :return:
+        """
+        return self._excluded_paths
+
+    @excluded_paths.setter
+    def excluded_paths(self, paths):
+        """ Setter for excluded_paths property.
+            Builds index of excluded paths: tree of nested dicts, one level per
+            path component. Excluded path is marked by `None` key.
+            :param paths:list of str
+            :return:
+        """
+        self._excluded_paths = paths
+
+        index = {}
+        for path in paths:
+            node = index
+            for part in path.rstrip(os.sep).split(os.sep):
+                node = node.setdefault(part, {})
+            node[None] = True
+        self._excluded_index = index
+
+    def _excluded_node(self, path):
+        """
+        Find node of excluded paths index for `path`.
+        :param path:str
+        :return:dict|None - None if nothing below `path` is excluded
+        """
+        node = self._excluded_index
+        for part in path.rstrip(os.sep).split(os.sep):
+            if not node:
+                return None
+            node = node.get(part)
+        return node
 
     def _is_path_excluded(self, path):
         """
-        Check that path is excluded from processing
+        Check that path is excluded from processing: it's one of excluded
+        paths, or is placed inside one of them.
 
         Excluded paths shouldn't end with `os.sep`.
         """
-
-        path = path.rstrip(os.sep)
-        return any(
-            path == ex_path or ex_path + os.sep in path
-                for ex_path in self.excluded_paths
-        )
+        node = self._excluded_index
+        for part in path.rstrip(os.sep).split(os.sep):
+            node = node.get(part)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
 
     @staticmethod
     def _is_not_vcs(item):
@@ -56,50 +312,426 @@ class Scanner(object):
         """
         return item not in VCS_NAMES
 
+    @staticmethod
+    def _list_dir_scandir(parent):
+        """
+        List directory using os.scandir. Item types are taken from
+        DirEntry (d_type), so usually no additional syscall is made.
+        :param parent:Entry
+        :return:tuple of lists of Entry: (dirs, files)
+        """
+        dirs, files = [], []
+        try:
+            dir_entries = scandir(parent.fs_path)
+        except OSError:
+            return dirs, files
+
+        for dir_entry in dir_entries:
+            try:
+                is_dir = dir_entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            entry = parent.child(dir_entry.name, dir_entry.path, is_dir, dir_entry.is_symlink(), dir_entry)
+            if is_dir:
+                dirs.append(entry)
+            else:
+                files.append(entry)
+
+        return dirs, files
+
+    @staticmethod
+    def _list_dir_walk(parent):
+        """
+        List directory using os.walk (fallback engine).
+        :param parent:Entry
+        :return:tuple of lists of Entry: (dirs, files)
+        """
+        _, dir_names, file_names = next(os.walk(parent.fs_path), (None, [], []))
+
+        dirs, files = [], []
+        for name in dir_names:
+            fs_path = os.path.join(parent.fs_path, name)
+            dirs.append(parent.child(name, fs_path, True, os.path.islink(fs_path)))
+        for name in file_names:
+            files.append(parent.child(name, os.path.join(parent.fs_path, name), False))
+
+        return dirs, files
+
+    def _list_dir_index(self, parent):
+        """
+        List directory using index instead of filesystem.
+        :param parent:Entry
+        :return:tuple of lists of Entry: (dirs, files)
+        """
+        depth = parent.depth + 1
+
+        dirs, files = [], []
+        for name, fs_name, is_dir, is_symlink in self.index.list_dir(parent.fs_path):
+            entry = Entry(os.path.join(parent.path, name), name, os.path.join(parent.fs_path, fs_name or name),
+                          depth, bool(is_dir), bool(is_symlink), cache=parent.cache)
+            if is_dir:
+                dirs.append(entry)
+            else:
+                files.append(entry)
+
+        return dirs, files
+
+    def _get_list_dir(self):
+        """
+        Return function listing directories with configured engine
+        :return:callable
+        """
+        if self.index is not None:
+            list_dir = self._list_dir_index
+        elif self.engine == ENGINE_SCANDIR:
+            list_dir = self._list_dir_scandir
+        else:
+            list_dir = self._list_dir_walk
+
+        if self.stats is not None:
+            list_dir = self.stats.list_dir(list_dir)
+        return list_dir
+
+    def _can_descend(self, parent, count=True):
+        """
+        Check if walker should list content of `parent` directory.
+
+        Symlinks to directories are not followed (the same as os.walk) unless
+        cfg.follow_symlinks is set, directories marked by `Scanner._check_dirs`
+        are skipped, and search depth is limited to cfg.depth.
+        :param parent:Entry
+        :param count:bool - count skipped directory in statistics (disabled when the same
+            directory is checked many times)
+        :return:bool
+        """
+        if not parent.descend or (parent.is_symlink() and not self.follow_symlinks) or -1 < self.depth <= parent.depth:
+            if count and self.stats is not None:
+                self.stats.add('dirs_pruned')
+            return False
+        return True
+
+    def _check_dirs(self, parent, dirs):
+        """
+        Mark directories which shouldn't be listed: mount points of skipped filesystem
+        types, directories on other devices (with cfg.xdev), and directories already
+        visited on the way from source (loops, when following symlinks). Such directories
+        are still reported, but never listed.
+        :param parent:Entry
+        :param dirs:list of Entry
+        """
+        check_device = self.xdev or self.follow_symlinks
+        for entry in dirs:
+            if self.skipped_mounts and entry.fs_path in self.skipped_mounts:
+                entry.descend = False
+                continue
+
+            if not check_device or (entry.is_symlink() and not self.follow_symlinks):
+                continue
+
+            try:
+                st = entry.stat()
+            except OSError:
+                entry.descend = False
+                continue
+
+            entry.fs_id = (st.st_dev, st.st_ino)
+            if self.xdev and parent.fs_id is not None and st.st_dev != parent.fs_id[0]:
+                entry.descend = False
+            elif self.follow_symlinks:
+                entry.ancestors = parent.ancestors | set((parent.fs_id, ))
+                if entry.fs_id in entry.ancestors:
+                    entry.descend = False
+
+    def _filter_ignored(self, parent, dirs, files):
+        """
+        Read ignore files (.gitignore etc) found in `parent` directory, and remove
+        items ignored by them, or by ignore files from parent directories. Rules are
+        compiled once per directory, and passed to subdirectories.
+        :param parent:Entry
+        :param dirs:list of Entry
+        :param files:list of Entry
+        :return:tuple of lists of Entry: (dirs, files)
+        """
+        if self.bytes_mode:
+            found = dict((_IGNORE_FILES_BYTES[entry.fs_name], entry.fs_path) for entry in files
+                         if entry.fs_name in _IGNORE_FILES_BYTES)
+        else:
+            found = dict((entry.name, entry.fs_path) for entry in files if entry.name in IGNORE_FILES)
+
+        rules = IgnoreRules.for_directory(parent, found) if found else parent.ignore
+        if rules is None:
+            return dirs, files
+
+        dirs = [entry for entry in dirs if not rules.is_ignored(entry.path, True)]
+        files = [entry for entry in files if not rules.is_ignored(entry.path, False)]
+        for entry in dirs:
+            entry.ignore = rules
+        return dirs, files
+
+    def _expand(self, parent, list_dir):
+        """
+        List `parent` directory and filter its content.
+
+        In parallel mode it is called from worker threads, so it doesn't
+        modify the Scanner; statistics counters are updated under lock of stats.Stats.
+        :param parent:Entry
+        :param list_dir:callable
+        :return:tuple of lists of Entry: (files to report, directories to descend)
+        """
+        stats = self.stats
+        dirs, files = list_dir(parent)
+        if self.respect_ignore:
+            count = len(dirs) + len(files)
+            dirs, files = self._filter_ignored(parent, dirs, files)
+            if stats is not None:
+                stats.add('entries_ignored', count - len(dirs) - len(files))
+        if self.mode not in (MODE_FILES, MODE_ALL):
+            files = []
+
+        ## remove excluded items, so excluded directories are never listed
+        excluded = self._excluded_node(parent.path) if self._excluded_index else None
+        if excluded:
+            count = len(dirs) + len(files)
+            dirs = [entry for entry in dirs if None not in excluded.get(entry.name, ())]
+            files = [entry for entry in files if None not in excluded.get(entry.name, ())]
+            if stats is not None:
+                stats.add('entries_excluded', count - len(dirs) - len(files))
+
+        ## remove vcs directories from traversing
+        if not self.include_vcs:
+            count = len(dirs)
+            if self.bytes_mode:
+                dirs = [entry for entry in dirs if entry.fs_name not in _VCS_NAMES_BYTES]
+            else:
+                dirs = [entry for entry in dirs if self._is_not_vcs(entry.name)]
+            if stats is not None:
+                stats.add('dirs_vcs', count - len(dirs))
+
+        if self.skipped_mounts or self.xdev or self.follow_symlinks:
+            self._check_dirs(parent, dirs)
+
+        return files, dirs
+
+    def _root_entry(self, path):
+        """
+        Create Entry for source directory
+        :param path:str
+        :return:Entry
+        """
+        if self.bytes_mode:
+            fs_path = fsencode(path)
+            root = BytesEntry(os.path.basename(fs_path), fs_path, 0, True, cache=self.stat_cache)
+        else:
+            root = Entry(path, os.path.basename(path), path, 0, True, cache=self.stat_cache)
+
+        if self.respect_ignore:
+            root.ignore = IgnoreRules.for_parents(path)
+        if self.xdev or self.follow_symlinks:
+            try:
+                st = os.stat(path)
+                root.fs_id = (st.st_dev, st.st_ino)
+            except OSError:
+                pass
+        return root
+
     def _walk(self, path):
         """
         Walk through filesystem, find items.
+
+        Items are returned in the same order as top-down os.walk would do:
+        directory, its files, and then its subdirectories.
         :param path:str
         :return:
         """
-        src_len = len(path)
-        for root, dirs, files in os.walk(path):
-            ## limit search depth to cfg.depth
-            if -1 < self.depth < len(root[src_len:].split('/')):
-                dirs[:] = []
+        list_dir = self._get_list_dir()
+
+        if self._is_path_excluded(path):
+            return
+
+        stack = [self._root_entry(path)]
+        while stack:
+            parent = stack.pop()
+
+            if self.mode in (MODE_DIRS, MODE_ALL) and parent.depth > 0:
+                yield parent
+
+            if not self._can_descend(parent):
                 continue
 
-            root = normalize(root)
-            if self._is_path_excluded(root):
+            files, dirs = self._expand(parent, list_dir)
+            for entry in files:
+                yield entry
+
+            stack.extend(reversed(dirs))
+
+    def _walk_bfs(self, paths):
+        """
+        Walk through filesystem breadth-first, find items.
+
+        Items are returned level by level: first all items placed directly in
+        sources, then items in their subdirectories etc. Only directories waiting
+        for listing (the frontier) are kept in memory.
+        :param paths:list of str
+        :return:
+        """
+        list_dir = self._get_list_dir()
+        show_dirs = self.mode in (MODE_DIRS, MODE_ALL)
+
+        queue = collections.deque(self._root_entry(path) for path in paths if not self._is_path_excluded(path))
+        while queue:
+            parent = queue.popleft()
+            if not self._can_descend(parent):
                 continue
 
-            ## remove vcs directories from traversing
-            if not self.include_vcs:
-                dirs[:] = filter(self._is_not_vcs, dirs)
+            files, dirs = self._expand(parent, list_dir)
+            for entry in files:
+                yield entry
+            for entry in dirs:
+                if show_dirs:
+                    yield entry
+                queue.append(entry)
 
-            if self.mode in (MODE_DIRS, MODE_ALL) and root != path:
-                yield root
+    def _walk_deepening(self, paths):
+        """
+        Walk through filesystem with iterative deepening, find items.
 
-            if self.mode in (MODE_FILES, MODE_ALL):
-                for file_ in files:
-                    file_ = normalize(file_)
-                    path = os.path.join(root, file_)
-                    if self._is_path_excluded(path):
+        Items are returned in the same order as with `Scanner._walk_bfs`, but
+        tree is walked depth-first many times, one level deeper every time. Directories
+        near to sources are listed many times, but memory usage depends only on
+        depth of tree, not on its width.
+        :param paths:list of str
+        :return:
+        """
+        list_dir = self._get_list_dir()
+        show_dirs = self.mode in (MODE_DIRS, MODE_ALL)
+
+        roots = [self._root_entry(path) for path in paths if not self._is_path_excluded(path)]
+        level = 1
+        deeper = True
+        while deeper:
+            deeper = False
+            for root in roots:
+                stack = [root]
+                while stack:
+                    parent = stack.pop()
+                    ## directories are checked in every pass, but counted only when found
+                    ## (roots: in first pass)
+                    if not self._can_descend(parent, count=level == 1):
+                        continue
+
+                    files, dirs = self._expand(parent, list_dir)
+                    if parent.depth + 1 < level:
+                        stack.extend(reversed(dirs))
                         continue
 
-                    yield path
+                    for entry in files:
+                        yield entry
+                    for entry in dirs:
+                        if show_dirs:
+                            yield entry
+                        if self._can_descend(entry):
+                            deeper = True
+            level += 1
 
-    def _scan_source(self, path):
+    def _walk_parallel(self, paths):
         """
-        Match found sources to given conditions
-        :param path:str
+        Walk through filesystem using pool of threads, find items.
+
+        Every directory is listed in separate task, and subdirectories found
+        are submitted to the pool as soon as their parent is listed.
+        Without `ordered` items are returned as soon as any directory is listed,
+        otherwise in exactly the same order as `Scanner._walk` (or `Scanner._walk_bfs`
+        with breadth-first order) returns them (directories are still listed in
+        advance by the pool).
+        :param paths:list of str
+        :return:
+        """
+        list_dir = self._get_list_dir()
+        pool = futures.ThreadPoolExecutor(max_workers=self.jobs)
+        pending = set()
+
+        def submit(parent):
+            """ Schedule listing of `parent`, if it should be listed at all """
+            if not self._can_descend(parent):
+                return None
+            future = pool.submit(self._expand, parent, list_dir)
+            pending.add(future)
+            return future
+
+        roots = [self._root_entry(path) for path in paths]
+        roots = [root for root in roots if not self._is_path_excluded(root.path)]
+        show_dirs = self.mode in (MODE_DIRS, MODE_ALL)
+
+        try:
+            if self.order == ORDER_BFS:
+                queue = collections.deque((root, submit(root)) for root in roots)
+                while queue:
+                    parent, future = queue.popleft()
+                    if future is None:
+                        continue
+
+                    files, dirs = future.result()
+                    pending.discard(future)
+                    for entry in files:
+                        yield entry
+                    for entry in dirs:
+                        if show_dirs:
+                            yield entry
+                        queue.append((entry, submit(entry)))
+            elif self.ordered:
+                stack = [(root, submit(root)) for root in reversed(roots)]
+                while stack:
+                    parent, future = stack.pop()
+                    if show_dirs and parent.depth > 0:
+                        yield parent
+
+                    if future is None:
+                        continue
+
+                    files, dirs = future.result()
+                    pending.discard(future)
+                    for entry in files:
+                        yield entry
+
+                    dirs = [(entry, submit(entry)) for entry in dirs]
+                    stack.extend(reversed(dirs))
+            else:
+                for root in roots:
+                    submit(root)
+
+                while pending:
+                    done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    for future in done:
+                        pending.discard(future)
+                        files, dirs = future.result()
+                        for entry in files:
+                            yield entry
+
+                        for entry in dirs:
+                            if show_dirs:
+                                yield entry
+                            submit(entry)
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown()
+
+    def _scan(self, items):
+        """
+        Match found items to given conditions
+        :param items:iterable of Entry
         :return:
         """
-        for item in self._walk(path):
-            if self.path_search:
-                is_name_match = self.pattern.pattern.search(item)
+        min_depth = self.min_depth
+        for item in items:
+            if item.depth < min_depth:
+                continue
+
+            if self.bytes_mode:
+                is_name_match = self.pattern.match_bytes(item.fs_path if self.path_search else item.fs_name)
             else:
-                is_name_match = self.pattern.pattern.search(os.path.basename(item))
+                is_name_match = self.pattern.match(item.path if self.path_search else item.name)
 
             to_show = False
             if not self.invert_match and is_name_match:
@@ -110,25 +742,176 @@ class Scanner(object):
             if not to_show:
                 continue
 
-            if self.tests:
-                for test in self.tests:
-                    # TODO: test should have passed to_show argument to decide to fail or not (usualy: yes)
-                    to_show = test.run(item)
+            if is_name_match:
+                item.patterns = self.pattern.matching(item.path if self.path_search else item.name)
+            else:
+                item.patterns = []
+            yield item
 
-            if not to_show:
+    def _can_match_tree(self, sources):
+        """
+        Check if items can be found with `Scanner._match_tree`, without walking
+        through index: index is tree.CompactTree, and no option needs listing of
+        directories (ignore files, checks of filesystems, inverted match) or would
+        report the same items many times (nested sources).
+        :param sources:list of str
+        :return:bool
+        """
+        if getattr(self.index, 'match', None) is None or self.invert_match or self.respect_ignore:
+            return False
+        if self.xdev or self.follow_symlinks or self.skipped_mounts:
+            return False
+
+        positions = set(self.index.find(source) for source in sources)
+        if len(positions) < len(sources):
+            return False
+        for i in positions:
+            i = self.index.parents[i]
+            while i >= 0:
+                if i in positions:
+                    return False
+                i = self.index.parents[i]
+        return True
+
+    def _match_tree(self, sources):
+        """
+        Find matching items in tree.CompactTree used as index: names of all items are
+        matched at once (see: tree.CompactTree.match), and entries are built only
+        for matching items. Items are returned in the same order as walkers return them.
+        :param sources:list of str
+        :return:list of Entry
+        """
+        tree = self.index
+        parents = tree.parents
+        roots = dict((tree.find(source), n) for n, source in enumerate(sources))
+        show_files = self.mode in (MODE_FILES, MODE_ALL)
+        show_dirs = self.mode in (MODE_DIRS, MODE_ALL)
+        breadth_first = self.order in (ORDER_BFS, ORDER_DEEPENING)
+
+        found = []
+        for i in tree.match(self.pattern, self.path_search):
+            is_dir = tree.is_dir(i)
+            if not (show_dirs if is_dir else show_files):
                 continue
 
-            yield item
+            ## item with its parents, up to source
+            chain = []
+            node = i
+            while node >= 0 and node not in roots:
+                chain.append(node)
+                node = parents[node]
+            depth = len(chain)
+            if node < 0 or depth < self.min_depth or -1 < self.depth < depth:
+                continue
+            if not self.include_vcs and any(tree.is_dir(item) and tree.name(item) in _VCS_NAMES_BYTES
+                                            for item in chain):
+                continue
+
+            path = tree.path(i)
+            if self._excluded_index and self._is_path_excluded(path):
+                continue
+
+            ## depth-first: directory, its files, then its subdirectories; breadth-first:
+            ## level by level, in order of parents, files before directories
+            chain.reverse()
+            if breadth_first:
+                key = (depth, roots[node], chain[:-1], is_dir, i)
+            else:
+                key = (roots[node], [(True, item) for item in chain[:-1]] + [(is_dir, i)])
+
+            name = normalize(fsdecode(tree.name(i)))
+            entry = Entry(path, name, fsdecode(tree.fs_path(i)), depth, is_dir, tree.is_symlink(i),
+                          cache=self.stat_cache)
+            entry.patterns = self.pattern.matching(path if self.path_search else name)
+            found.append((key, entry))
+
+        found.sort(key=lambda item: item[0])
+        return [entry for _, entry in found]
+
+    def _test(self, items):
+        """
+        Filter items using tests (see: ff.evaluator). When any of plugins
+        can test many items at once, items are tested in batches.
+        :param items:iterable of Entry
+        :return:
+        """
+        if not self.tests.has_batch:
+            for item in items:
+                if self.tests.test(item):
+                    yield item
+            return
+
+        items = iter(items)
+        while True:
+            batch = list(itertools.islice(items, TESTS_BATCH_SIZE))
+            if not batch:
+                return
+
+            for item, result in zip(batch, self.tests.test_batch(batch)):
+                if result:
+                    yield item
 
     def __iter__(self):
         """
         Iterator protocol
         :return:
         """
+        ## own cache of every search: stat data cached by previous searches can be outdated,
+        ## and shared cache would be cleared by concurrent searches (ie. in server)
+        self.stat_cache = StatCache()
+        if self.stats is not None:
+            self.stats.stat_cache = self.stat_cache
+
+        sources = []
         for source in self.sources:
             if not os.path.isdir(source):
                 err('Source %s doesn\'t exists or is not a directory' % source)
                 continue
+            if self.index is not None and not self.index.has_dir(source):
+                err('Source %s is not indexed, build index with --index-build' % source)
+                continue
+            sources.append(source)
+
+        stats = self.stats
+        if self._can_match_tree(sources):
+            items = self._match_tree(sources)
+            if stats is not None:
+                items = stats.stage('match', items)
+        else:
+            if self.jobs > 1:
+                items = self._walk_parallel(sources)
+            elif self.order == ORDER_BFS:
+                items = self._walk_bfs(sources)
+            elif self.order == ORDER_DEEPENING:
+                items = self._walk_deepening(sources)
+            else:
+                items = itertools.chain.from_iterable(self._walk(source) for source in sources)
 
-            for path in self._scan_source(source):
-                yield path
+            if stats is not None:
+                items = stats.stage('walk', items)
+            items = self._scan(items)
+            if stats is not None:
+                items = stats.stage('match', items)
+        if self.tests:
+            items = self._test(items)
+            if stats is not None:
+                items = stats.stage('tests', items)
+        if self.sort_by_score:
+            items = self._sort_by_score(items)
+
+        for item in items:
+            yield item
+
+    def _sort_by_score(self, items):
+        """
+        Sort items by score of match to pattern, best first.
+        Items with the same score are sorted by length.
+        :param items:iterable of Entry
+        :return:list of Entry
+        """
+        scored = []
+        for item in items:
+            name = item.path if self.path_search else item.name
+            scored.append((-(self.pattern.score(name) or 0), len(name), len(scored), item))
+        scored.sort()
+        return [row[-1] for row in scored]
@@ -0,0 +1,606 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Server mode: tree of sources kept in memory and updated on the fly, queried
+    by clients over unix socket
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import ctypes
+import ctypes.util
+import errno
+import itertools
+import json
+import os, os.path
+import socket
+import struct
+import threading
+import time
+
+from ff import cli
+from ff.output import Output
+from ff.plugin import FFPluginError, stat_cache
+from ff import scanner
+from ff.tree import FLAG_DIR, FLAG_SYMLINK
+from ff.utils import err, disp, fsencode, fsdecode, normalize
+
+__all__ = ['MemoryTree', 'Server', 'query']
+
+## how often tree is refreshed (in seconds) when inotify is not available
+POLL_INTERVAL = 2.0
+
+## header of every message: kind (single byte) and length of payload
+_HEADER = struct.Struct('!cI')
+_MSG_QUERY = b'q'
+_MSG_OUTPUT = b'o'
+_MSG_ERROR = b'e'
+_MSG_EXIT = b'x'
+
+## inotify constants, see: inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_CLOEXEC = 0o2000000
+## events changing content of directory: directory has to be listed again
+_IN_LISTING_CHANGED = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF
+## events changing metadata of items: stat data of item is removed from stat cache
+_IN_ITEM_CHANGED = _IN_MODIFY | _IN_ATTRIB
+_IN_WATCH_MASK = _IN_LISTING_CHANGED | _IN_ITEM_CHANGED | _IN_ONLYDIR | _IN_DONT_FOLLOW
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class MemoryTree(object):
+    """
+    Tree of directories kept in memory. Has the same interface as index.Index, so
+    can be used by scanner.Scanner instead of filesystem.
+
+    Content of every directory is packed, like in tree.CompactTree: for every directory
+    there are kept only its mtime, names of items (as they exist on filesystem, separated
+    with NUL) and single byte of flags per item. Names are decoded only when directory
+    is listed by scanner. Unlike tree.CompactTree, single directory can be updated.
+    """
+
+    def __init__(self, on_listed=None, on_removed=None):
+        """
+        Initializer.
+        :param on_listed:callable - called with path of every listed directory
+        :param on_removed:callable - called with path of every directory removed from tree
+        """
+        self._dirs = {}
+        self._lock = threading.Lock()
+        self.on_listed = on_listed
+        self.on_removed = on_removed
+
+        if scanner.scandir is not None:
+            self._list_dir = scanner.Scanner._list_dir_scandir
+        else:
+            self._list_dir = scanner.Scanner._list_dir_walk
+
+    def __len__(self):
+        return len(self._dirs)
+
+    def has_dir(self, path):
+        """
+        Check if directory is in tree
+        :param path:str
+        :return:bool
+        """
+        return path in self._dirs
+
+    @staticmethod
+    def _pack(entries):
+        """
+        Pack content of directory
+        :param entries:list of scanner.BytesEntry
+        :return:tuple (names separated with NUL, flags) - both bytes
+        """
+        names = b'\0'.join(entry.fs_name for entry in entries)
+        flags = bytearray((FLAG_DIR if entry.is_dir() else 0) | (FLAG_SYMLINK if entry.is_symlink() else 0)
+                          for entry in entries)
+        return names, bytes(flags)
+
+    @staticmethod
+    def _unpack(names, flags):
+        """
+        Unpack content of directory
+        :param names:bytes
+        :param flags:bytes
+        :return:list of tuples (name as it exists on filesystem - bytes, flags - int)
+        """
+        if not flags:
+            return []
+        return list(zip(names.split(b'\0'), bytearray(flags)))
+
+    def list_dir(self, path):
+        """
+        Return content of directory.
+        :param path:str - directory path as it exists on filesystem
+        :return:list of tuples: (name, fs_name, is_dir, is_symlink). `fs_name` is None
+            if is the same as normalized `name`
+        """
+        record = self._dirs.get(path)
+        if record is None:
+            return []
+
+        ret = []
+        for fs_name, flags in self._unpack(record[1], record[2]):
+            fs_name = fsdecode(fs_name)
+            name = normalize(fs_name)
+            ret.append((name, fs_name if fs_name != name else None, bool(flags & FLAG_DIR), bool(flags & FLAG_SYMLINK)))
+        return ret
+
+    def _subdirs(self, path, record):
+        """
+        Paths of subdirectories which are descended into (symlinks are not followed)
+        :param path:str
+        :param record:tuple - packed directory (mtime, names, flags)
+        :return:list of str
+        """
+        return [os.path.join(path, fsdecode(fs_name)) for fs_name, flags in self._unpack(record[1], record[2])
+                if flags == FLAG_DIR]
+
+    def _remove_tree(self, path):
+        """
+        Remove directory with all its subdirectories from tree. Must be called with lock acquired.
+        :param path:str
+        """
+        stack = [path]
+        while stack:
+            path = stack.pop()
+            record = self._dirs.pop(path, None)
+            if record is not None:
+                stack.extend(self._subdirs(path, record))
+            if self.on_removed:
+                self.on_removed(path)
+
+    def update(self, root, recursive=True, force=False):
+        """
+        Add `root` directory to tree, or refresh it.
+
+        Directories are listed again only if their mtime changed (or always, with `force`).
+        With `recursive`, all known subdirectories of `root` are checked, otherwise only
+        directories found for the first time are listed.
+        :param root:str
+        :param recursive:bool
+        :param force:bool - list `root` even if its mtime didn't change
+        :return:int - number of listed directories
+        """
+        listed = 0
+        stack = [root]
+        with self._lock:
+            while stack:
+                path = stack.pop()
+                known = self._dirs.get(path)
+
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    self._remove_tree(path)
+                    continue
+
+                if known and known[0] == mtime and not (force and path == root):
+                    if recursive:
+                        stack.extend(self._subdirs(path, known))
+                    continue
+
+                fs_path = fsencode(path)
+                dirs, files = self._list_dir(scanner.BytesEntry(os.path.basename(fs_path), fs_path, 0, True))
+                listed += 1
+
+                record = (mtime, ) + self._pack(dirs + files)
+                self._dirs[path] = record
+                if self.on_listed:
+                    self.on_listed(path)
+
+                subdirs = self._subdirs(path, record)
+                if known:
+                    for subdir in set(self._subdirs(path, known)) - set(subdirs):
+                        self._remove_tree(subdir)
+                for subdir in reversed(subdirs):
+                    if recursive or subdir not in self._dirs:
+                        stack.append(subdir)
+
+        return listed
+
+
+class Inotify(object):
+    """
+    Minimal wrapper for Linux inotify (with ctypes)
+    """
+
+    def __init__(self):
+        """
+        Initializer.
+        :raise OSError: if inotify is not available
+        """
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+
+        self.fd = init(_IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+
+    def add_watch(self, path):
+        """
+        Watch for changes of directory content
+        :param path:str
+        :return:int - watch descriptor:raise OSError:
+        """
+        wd = self._libc.inotify_add_watch(self.fd, fsencode(path), _IN_WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        return wd
+
+    def rm_watch(self, wd):
+        """
+        Stop watching
+        :param wd:int - watch descriptor
+        """
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """
+        Wait for events
+        :return:list of tuples: (watch descriptor, mask, name - bytes, empty for directory itself)
+        """
+        data = os.read(self.fd, 64 * 1024)
+        events = []
+        pos = 0
+        while pos + _INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, pos)
+            start = pos + _INOTIFY_EVENT.size
+            events.append((wd, mask, data[start:start + length].rstrip(b'\0')))
+            pos = start + length
+        return events
+
+    def close(self):
+        """ Release inotify instance
+        """
+        os.close(self.fd)
+
+
+class _Watcher(object):
+    """
+    Keeps tree up to date: with inotify every listed directory is watched, and listed
+    again when its content changes. Modified items are removed from stat cache. Without
+    inotify, tree is refreshed every POLL_INTERVAL.
+    """
+
+    def __init__(self, tree, roots):
+        self.tree = tree
+        self.roots = roots
+        self._wds = {}
+        self._paths = {}
+        self._warned = False
+
+        try:
+            self.inotify = Inotify()
+        except OSError:
+            self.inotify = None
+        else:
+            tree.on_listed = self._add_watch
+            tree.on_removed = self._rm_watch
+
+    def _add_watch(self, path):
+        """ Watch directory (if not watched yet) """
+        if path in self._wds:
+            return
+        try:
+            wd = self.inotify.add_watch(path)
+        except OSError as ex:
+            ## ie. limit of watches (fs.inotify.max_user_watches) is reached
+            if not self._warned:
+                err('cannot watch %s: %s, some changes will be not noticed' % (path, ex))
+                self._warned = True
+            return
+        self._wds[path] = wd
+        self._paths[wd] = path
+
+    def _rm_watch(self, path):
+        """ Stop watching directory """
+        wd = self._wds.pop(path, None)
+        if wd is not None and self._paths.pop(wd, None) is not None:
+            self.inotify.rm_watch(wd)
+
+    def start(self):
+        """ Run watcher in background thread """
+        thread = threading.Thread(target=self._run_inotify if self.inotify else self._run_poll)
+        thread.daemon = True
+        thread.start()
+
+    def _run_poll(self):
+        """ Refresh tree periodically """
+        while True:
+            time.sleep(POLL_INTERVAL)
+            for root in self.roots:
+                self.tree.update(root)
+
+    def _run_inotify(self):
+        """ Refresh directories reported by inotify """
+        while True:
+            dirty = set()
+            for wd, mask, name in self.inotify.read_events():
+                if mask & _IN_Q_OVERFLOW:
+                    ## some events are lost: check whole tree
+                    dirty.update(self.roots)
+                    continue
+                path = self._paths.get(wd)
+                if path is None:
+                    continue
+                if mask & _IN_IGNORED:
+                    ## watch removed by kernel (directory deleted)
+                    self._paths.pop(wd, None)
+                    self._wds.pop(path, None)
+                    continue
+                if mask & _IN_ITEM_CHANGED:
+                    stat_cache.discard(os.path.join(path, fsdecode(name)) if name else path)
+                if mask & _IN_LISTING_CHANGED:
+                    dirty.add(path)
+
+            for path in sorted(dirty):
+                if path in self.roots:
+                    self.tree.update(path, recursive=True)
+                else:
+                    self.tree.update(path, recursive=False, force=True)
+
+
+class _ClientStream(object):
+    """
+    Stream writing output to client, used by output.Output
+    """
+
+    def __init__(self, conn, encoding):
+        self.conn = conn
+        self.encoding = encoding
+
+    @staticmethod
+    def isatty():
+        return False
+
+    def write(self, data):
+        _send(self.conn, _MSG_OUTPUT, data)
+
+    def flush(self):
+        pass
+
+
+def _send(conn, kind, payload):
+    """
+    Send single message
+    :param conn:socket.socket
+    :param kind:bytes
+    :param payload:bytes
+    """
+    conn.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _recv_exactly(conn, size):
+    """
+    Receive exactly `size` bytes
+    :param conn:socket.socket
+    :param size:int
+    :return:bytes|None - None if connection was closed
+    """
+    data = b''
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _recv(conn):
+    """
+    Receive single message
+    :param conn:socket.socket
+    :return:tuple (kind, payload)|(None, None) if connection was closed
+    """
+    header = _recv_exactly(conn, _HEADER.size)
+    if header is None:
+        return None, None
+    kind, size = _HEADER.unpack(header)
+    payload = _recv_exactly(conn, size)
+    if payload is None:
+        return None, None
+    return kind, payload
+
+
+class Server(object):
+    """
+    Answers queries from clients (`ff --connect`) with results from tree kept in memory.
+    Configuration and plugins are loaded once, so query costs only matching and testing.
+    Sources outside of tree are searched on filesystem.
+    """
+
+    def __init__(self, cfg, roots, socket_path):
+        """
+        Initializer.
+        :param cfg:config.Config
+        :param roots:list of str - directories kept in memory
+        :param socket_path:str
+        """
+        self.cfg = cfg
+        self.roots = roots
+        self.socket_path = socket_path
+        self.tree = MemoryTree()
+        self.watcher = _Watcher(self.tree, roots)
+        self.stopped = False
+
+    def _handle_query(self, conn, request):
+        """
+        Search for items and send them to client
+        :param conn:socket.socket
+        :param request:dict
+        :return:int - exit code
+        """
+        try:
+            args = cli.parse_input_args(request['argv'], self.cfg, cwd=request['cwd'], raise_errors=True)
+        except cli.ArgumentsError as ex:
+            _send(conn, _MSG_ERROR, str(ex).encode('utf-8'))
+            return 2
+        except SystemExit:
+            ## --help or --version
+            _send(conn, _MSG_ERROR, b'invalid arguments')
+            return 2
+
+        ## plugins paths are resolved once, when server starts
+        if set(args.plugins_path) - set(self.cfg.plugins_paths):
+            _send(conn, _MSG_ERROR, b'argument --plugins-path: not supported by server, restart server with it')
+            return 2
+
+        try:
+            args.tests = cli.initialize_plugins(args)
+        except FFPluginError as ex:
+            _send(conn, _MSG_ERROR, str(ex).encode('utf-8'))
+            return 1
+
+        sources = []
+        for source in args.sources:
+            if not os.path.isdir(source):
+                _send(conn, _MSG_ERROR, ('Source %s doesn\'t exists or is not a directory' % source).encode('utf-8'))
+                continue
+            sources.append(source)
+        args.sources = sources
+        args.index = self.tree if all(self.tree.has_dir(source) for source in sources) else None
+
+        args.output = Output(_ClientStream(conn, request.get('encoding') or 'utf-8'))
+        args.colorize = args.colorize and request.get('tty', False)
+        args.executor = None
+
+        items = iter(scanner.Scanner(args))
+        try:
+            for item in itertools.islice(items, args.max_results):
+                cli.process_item(args, item)
+        except FFPluginError as ex:
+            args.output.flush()
+            _send(conn, _MSG_ERROR, ('Plugin error (%s): %s' % (ex.get_plugin_name(), ex)).encode('utf-8'))
+            return 1
+        finally:
+            items.close()
+
+        args.output.flush()
+        return 0
+
+    def _handle(self, conn):
+        """
+        Handle connection from client
+        :param conn:socket.socket
+        """
+        try:
+            kind, payload = _recv(conn)
+            if kind != _MSG_QUERY:
+                return
+            code = self._handle_query(conn, json.loads(payload.decode('utf-8')))
+            _send(conn, _MSG_EXIT, str(code).encode('ascii'))
+        except socket.error:
+            ## client is gone (ie. output was piped to head)
+            pass
+        finally:
+            conn.close()
+
+    def serve(self, verbose=True):
+        """
+        Build tree and answer queries, until interrupted or stopped
+        :param verbose:bool - display information about started server
+        :raise OSError: if other server is already listening on the same socket
+        """
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except socket.error:
+                ## left by server which is not running anymore
+                os.unlink(self.socket_path)
+            else:
+                raise OSError(errno.EADDRINUSE, 'server is already running on %s' % self.socket_path)
+            finally:
+                probe.close()
+
+        cli.detect_plugins_paths(self.cfg.plugins_paths)
+        for root in self.roots:
+            self.tree.update(root)
+        self.watcher.start()
+
+        dirname = os.path.dirname(self.socket_path)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen(16)
+        ## check from time to time if server is stopped
+        listener.settimeout(0.5)
+        if verbose:
+            disp('ff server: %d directories in memory, listening on %s' % (len(self.tree), self.socket_path))
+
+        try:
+            while not self.stopped:
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                thread = threading.Thread(target=self._handle, args=(conn, ))
+                thread.daemon = True
+                thread.start()
+        finally:
+            listener.close()
+            os.unlink(self.socket_path)
+
+    def stop(self):
+        """ Stop answering queries, serve() returns in a moment
+        """
+        self.stopped = True
+
+
+def query(socket_path, argv, cwd, stdout, stderr, tty=False, encoding=None):
+    """
+    Send query to server and write results to given streams
+    :param socket_path:str
+    :param argv:list of str - command line arguments
+    :param cwd:str - relative paths in arguments are relative to this directory
+    :param stdout:file - binary stream for results
+    :param stderr:file - text stream for errors
+    :param tty:bool - if results are displayed on terminal (then they can be colorized)
+    :param encoding:str - encoding of results
+    :return:int|None - exit code, or None if server is not running
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except socket.error:
+        conn.close()
+        return None
+
+    try:
+        request = {'argv': argv, 'cwd': cwd, 'tty': tty, 'encoding': encoding}
+        _send(conn, _MSG_QUERY, json.dumps(request).encode('utf-8'))
+
+        while True:
+            kind, payload = _recv(conn)
+            if kind is None:
+                disp('ERROR: connection to server lost', file=stderr)
+                return 1
+            elif kind == _MSG_OUTPUT:
+                stdout.write(payload)
+            elif kind == _MSG_ERROR:
+                disp('ERROR:', payload.decode('utf-8', 'replace'), file=stderr)
+            elif kind == _MSG_EXIT:
+                stdout.flush()
+                return int(payload)
+    finally:
+        conn.close()
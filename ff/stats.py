@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Statistics of search: counters and timers of every stage (--stats)
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import collections
+import json
+import threading
+import time
+
+from ff.evaluator import Not
+from ff.plugin import stat_cache
+
+__all__ = ['Stats']
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+## stages of search, in order of processing items
+STAGES = ('walk', 'match', 'tests', 'output', 'exec')
+
+## descriptions of counters, in order of reporting
+_COUNTERS = (
+    ('dirs_listed', 'directories listed'),
+    ('entries_seen', 'entries seen'),
+    ('entries_ignored', 'entries ignored (--respect-ignore)'),
+    ('entries_excluded', 'entries excluded (--exclude-path)'),
+    ('dirs_vcs', 'VCS directories skipped'),
+    ('dirs_pruned', 'directories not listed (depth, symlinks, filesystems)'),
+    ('walk', 'entries walked'),
+    ('match', 'entries matched'),
+    ('tests', 'entries passed tests'),
+    ('output', 'entries printed'),
+    ('exec', 'entries passed to command'),
+)
+
+
+class Stats(object):
+    """
+    Counters and timers of search stages.
+
+    Nothing is measured unless Stats is given to scanner.Scanner (as cfg.stats) and
+    to cli.main: measured functions and iterators are wrapped only then, so there is
+    no cost when statistics are disabled.
+
+    Times of stages are exclusive: time of iterator of `match` stage doesn't include
+    time spent in `walk` stage, even if `walk` items are pulled from inside of it.
+    Stages are measured in main thread only, counters can be updated from any thread.
+    """
+
+    def __init__(self):
+        self.counters = collections.defaultdict(int)
+        self.times = collections.defaultdict(float)
+        self._lock = threading.Lock()
+        ## stat cache of measured search (set by scanner.Scanner)
+        self.stat_cache = stat_cache
+        ## time of measurements nested in currently running one
+        self._nested = 0.0
+        self._started = _timer()
+
+    def add(self, name, value=1):
+        """ Increase counter
+            :param name:str
+            :param value:int
+        """
+        with self._lock:
+            self.counters[name] += value
+
+    def add_time(self, name, elapsed):
+        """ Add time to timer (not accounted as stage, see: `Stats.timed`)
+            :param name:str
+            :param elapsed:float - in seconds
+        """
+        with self._lock:
+            self.times[name] += elapsed
+
+    def measure(self, name, func, *args, **kwargs):
+        """ Call `func` and add its exclusive time to `name` stage
+            :param name:str
+            :param func:callable
+            :return: result of `func`
+        """
+        outer, self._nested = self._nested, 0.0
+        start = _timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = _timer() - start
+            self.times[name] += elapsed - self._nested
+            self._nested = outer + elapsed
+
+    def timed(self, name, func):
+        """ Wrap `func`, so every call is counted and measured as `name` stage
+            :param name:str
+            :param func:callable
+            :return:callable
+        """
+        def wrapper(*args, **kwargs):
+            """ Measured call """
+            self.counters[name] += 1
+            return self.measure(name, func, *args, **kwargs)
+        return wrapper
+
+    def stage(self, name, items):
+        """ Wrap iterator, so every item is counted and time of producing it is measured
+            as `name` stage
+            :param name:str
+            :param items:iterable
+            :return:generator
+        """
+        items = iter(items)
+        next_item = getattr(items, '__next__', None) or items.next
+        counters = self.counters
+        while True:
+            try:
+                item = self.measure(name, next_item)
+            except StopIteration:
+                return
+            counters[name] += 1
+            yield item
+
+    def list_dir(self, list_dir):
+        """ Wrap function listing directories (see: scanner.Scanner._get_list_dir), to count
+            listed directories and found entries. Can be called from many threads.
+            :param list_dir:callable
+            :return:callable
+        """
+        def wrapper(parent):
+            """ Counted listing of directory """
+            start = _timer()
+            dirs, files = list_dir(parent)
+            elapsed = _timer() - start
+            with self._lock:
+                self.counters['dirs_listed'] += 1
+                self.counters['entries_seen'] += len(dirs) + len(files)
+                self.times['list_dir'] += elapsed
+            return dirs, files
+        return wrapper
+
+    def report(self, tests=None):
+        """ Collect all statistics
+            :param tests:evaluator.AllOf|None - tests used while searching
+            :return:dict
+        """
+        return {
+            'counters': dict((name, self.counters.get(name, 0)) for name, _ in _COUNTERS),
+            'times': dict((name, self.times.get(name, 0.0)) for name in STAGES + ('list_dir', )),
+            'tests': _tests_statistics(tests) if tests else [],
+            'stat_cache': {'hits': self.stat_cache.hits, 'misses': self.stat_cache.misses},
+            'total_time': _timer() - self._started,
+        }
+
+    def format(self, tests=None, fmt='text'):
+        """ Format all statistics
+            :param tests:evaluator.AllOf|None - tests used while searching
+            :param fmt:str - 'text' (human readable) or 'json'
+            :return:str
+        """
+        report = self.report(tests)
+        if fmt == 'json':
+            return json.dumps(report, indent=2, sort_keys=True)
+
+        lines = ['Statistics:']
+        for name, descr in _COUNTERS:
+            lines.append('  %-55s %10d' % (descr + ':', report['counters'][name]))
+
+        lines.append('Time (seconds):')
+        for name in STAGES:
+            lines.append('  %-55s %10.4f' % (name + ':', report['times'][name]))
+        lines.append('  %-55s %10.4f' % ('listing directories (included in walk):', report['times']['list_dir']))
+        lines.append('  %-55s %10.4f' % ('total:', report['total_time']))
+
+        if report['tests']:
+            lines.append('Tests:')
+            for test in report['tests']:
+                lines.append('  %-40s calls: %8d passed: %8d time: %8.4f' %
+                             (test['name'], test['calls'], test['passed'], test['time']))
+
+        lines.append('Stat cache: %(hits)d hits, %(misses)d misses' % report['stat_cache'])
+        return '\n'.join(lines)
+
+
+def _test_name(test):
+    """ Name of test, for report
+        :param test: plugin.FFPlugin, evaluator.Not or any other test
+        :return:str
+    """
+    if isinstance(test, Not):
+        return 'not ' + _test_name(test.item)
+    name = getattr(test, 'name', None)
+    if name is None:
+        return test.__class__.__name__.lower()
+    argument = getattr(test, 'argument', None)
+    return '%s:%s' % (name, argument) if argument else name
+
+
+def _tests_statistics(group, prefix=''):
+    """ Statistics of tests collected by evaluator, nested groups are flattened
+        :param group:evaluator.AllOf|evaluator.AnyOf
+        :param prefix:str - prepended to names of tests
+        :return:list of dicts
+    """
+    ret = []
+    for test, calls, passed, elapsed in group.statistics():
+        name = prefix + _test_name(test)
+        ret.append({'name': name, 'calls': calls, 'passed': passed, 'time': elapsed})
+        if hasattr(test, 'statistics'):
+            ret.extend(_tests_statistics(test, name + ' / '))
+    return ret
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Compact, read-only snapshot of directories tree
+"""
+
+from __future__ import print_function, unicode_literals, division
+
+import array
+import os, os.path
+import re
+
+from ff import scanner
+from ff.utils import normalize, fsencode, fsdecode
+
+__all__ = ['CompactTree']
+
+FLAG_DIR = 1
+FLAG_SYMLINK = 2
+
+_SEP = fsencode(os.sep)
+## names are matched in blocks of that many items
+_MATCH_BLOCK = 65536
+_RXP_NON_ASCII = re.compile(b'[\x80-\xff]')
+
+
+class CompactTree(object):
+    """
+    Snapshot of directories tree stored in flat arrays, not in Python objects.
+
+    Every item is identified by its position. For every item there are stored: index of
+    parent (-1 for roots), offset of name in single buffer with all names (as they exist
+    on filesystem), flags (directory, symlink) and, optionally, size and mtime. Content
+    of every directory is stored at consecutive positions (sorted by name), so only
+    range of children is stored for directory. Full paths are built only when asked for them.
+
+    Has the same interface as index.Index (has_dir, list_dir), so can be used by
+    scanner.Scanner instead of filesystem (cfg.index). Searches with --use-index
+    are made in tree loaded from index (see: cli.load_index): Scanner matches names
+    with `CompactTree.match`, and builds entries only for matching items.
+    """
+
+    def __init__(self, with_stat=False):
+        """
+        Initializer. Use CompactTree.build or CompactTree.from_index to create filled tree.
+        :param with_stat:bool - store size and mtime of items
+        """
+        self.with_stat = with_stat
+
+        self.parents = array.array('i')
+        self.flags = array.array('B')
+        ## offset of name of item i is offsets[i], its end: offsets[i + 1] - 1 (so all names can take up
+        ## to 4GiB). Every name is followed by new line, so block of names can be matched at once.
+        self.offsets = array.array('I', [0])
+        self.names = bytearray()
+        ## range of children of directory i: child_start[i]:child_end[i]
+        self.child_start = array.array('i')
+        self.child_end = array.array('i')
+        self.sizes = array.array('q') if with_stat else None
+        self.mtimes = array.array('d') if with_stat else None
+
+        self._roots = {}
+
+    def __len__(self):
+        return len(self.parents)
+
+    def _append(self, parent, name, flags, stat=None):
+        """
+        Add item to tree
+        :param parent:int
+        :param name:bytes
+        :param flags:int
+        :param stat:os.stat_result|None
+        :return:int - index of added item
+        """
+        self.parents.append(parent)
+        self.flags.append(flags)
+        self.names.extend(name)
+        self.names.append(10)
+        self.offsets.append(len(self.names))
+        self.child_start.append(0)
+        self.child_end.append(0)
+        if self.with_stat:
+            self.sizes.append(stat.st_size if stat else -1)
+            self.mtimes.append(stat.st_mtime if stat else 0.0)
+        return len(self.parents) - 1
+
+    def _fill(self, roots, list_dir):
+        """
+        Fill tree breadth-first, so content of every directory is stored at consecutive positions.
+        :param roots:list of str
+        :param list_dir:callable - called with path (bytes) of directory, returns iterable of
+            tuples: (name as bytes, is_dir, is_symlink, os.stat_result or None)
+        """
+        for root in roots:
+            fs_root = fsencode(root)
+            stat = None
+            if self.with_stat:
+                try:
+                    stat = os.stat(fs_root)
+                except OSError:
+                    pass
+            ## paths are built by joining names with separator, so root "/" has empty name
+            self._roots[root.rstrip(os.sep) or os.sep] = self._append(-1, fs_root.rstrip(_SEP), FLAG_DIR, stat)
+
+        i = 0
+        while i < len(self.parents):
+            if self.flags[i] != FLAG_DIR:
+                i += 1
+                continue
+
+            items = sorted(list_dir(self.fs_path(i)), key=lambda item: item[0])
+            self.child_start[i] = len(self.parents)
+            for name, is_dir, is_symlink, stat in items:
+                self._append(i, name, (FLAG_DIR if is_dir else 0) | (FLAG_SYMLINK if is_symlink else 0), stat)
+            self.child_end[i] = len(self.parents)
+            i += 1
+
+    @classmethod
+    def build(cls, roots, with_stat=False):
+        """
+        Scan filesystem and build tree
+        :param roots:list of str - directories to scan
+        :param with_stat:bool - store size and mtime of items
+        :return:CompactTree
+        """
+        if scanner.scandir is not None:
+            list_entries = scanner.Scanner._list_dir_scandir
+        else:
+            list_entries = scanner.Scanner._list_dir_walk
+
+        def list_dir(path):
+            """ List directory on filesystem """
+            dirs, files = list_entries(scanner.BytesEntry(os.path.basename(path), path, 0, True))
+            for entry in dirs + files:
+                stat = None
+                if with_stat:
+                    try:
+                        stat = os.stat(entry.fs_path)
+                    except OSError:
+                        pass
+                yield entry.fs_name, entry.is_dir(), entry.is_symlink(), stat
+
+        tree = cls(with_stat)
+        tree._fill(roots, list_dir)
+        return tree
+
+    @classmethod
+    def from_index(cls, index, roots):
+        """
+        Build tree from index (index.Index), without touching filesystem
+        :param index:index.Index
+        :param roots:list of str - indexed directories
+        :return:CompactTree
+        """
+        def list_dir(path):
+            """ List directory in index """
+            for name, fs_name, is_dir, is_symlink in index.list_dir(fsdecode(path)):
+                yield fsencode(fs_name or name), is_dir, is_symlink, None
+
+        tree = cls()
+        tree._fill([root for root in roots if index.has_dir(root)], list_dir)
+        return tree
+
+    def name(self, i):
+        """
+        Name of item as it exists on filesystem (for roots: full path)
+        :param i:int
+        :return:bytes
+        """
+        return bytes(self.names[self.offsets[i]:self.offsets[i + 1] - 1])
+
+    def fs_path(self, i):
+        """
+        Build full path of item, as it exists on filesystem
+        :param i:int
+        :return:bytes
+        """
+        parts = []
+        while i >= 0:
+            parts.append(self.name(i))
+            i = self.parents[i]
+        return _SEP.join(reversed(parts)) or _SEP
+
+    def path(self, i):
+        """
+        Build full path of item, decoded and normalized
+        :param i:int
+        :return:str
+        """
+        return normalize(fsdecode(self.fs_path(i)))
+
+    def is_dir(self, i):
+        """ Check if item is directory (or symlink to directory)
+        """
+        return bool(self.flags[i] & FLAG_DIR)
+
+    def is_symlink(self, i):
+        """ Check if item is symbolic link
+        """
+        return bool(self.flags[i] & FLAG_SYMLINK)
+
+    def children(self, i):
+        """
+        Indexes of items inside directory
+        :param i:int
+        :return:range
+        """
+        return range(self.child_start[i], self.child_end[i])
+
+    def _find_child(self, i, name):
+        """
+        Find item inside directory by name (binary search, children are sorted by name)
+        :param i:int - index of directory
+        :param name:bytes
+        :return:int - index of item, or -1 if not found
+        """
+        low, high = self.child_start[i], self.child_end[i]
+        while low < high:
+            mid = (low + high) // 2
+            mid_name = self.name(mid)
+            if mid_name < name:
+                low = mid + 1
+            elif mid_name > name:
+                high = mid
+            else:
+                return mid
+        return -1
+
+    def find(self, path):
+        """
+        Find item by path
+        :param path:str - path as it exists on filesystem
+        :return:int - index of item, or -1 if not found
+        """
+        path = path.rstrip(os.sep) or os.sep
+        for root, i in self._roots.items():
+            if path == root:
+                return i
+            if not path.startswith(root.rstrip(os.sep) + os.sep):
+                continue
+
+            for part in fsencode(path[len(root.rstrip(os.sep)) + 1:]).split(_SEP):
+                i = self._find_child(i, part)
+                if i < 0:
+                    break
+            else:
+                return i
+        return -1
+
+    def has_dir(self, path):
+        """
+        Check if directory is in tree
+        :param path:str
+        :return:bool
+        """
+        i = self.find(path)
+        return i >= 0 and self.flags[i] == FLAG_DIR
+
+    def list_dir(self, path):
+        """
+        Return content of directory.
+        :param path:str - directory path as it exists on filesystem
+        :return:list of tuples: (name, fs_name, is_dir, is_symlink). `fs_name` is None
+            if is the same as normalized `name`
+        """
+        i = self.find(path)
+        if i < 0:
+            return []
+
+        ret = []
+        for child in self.children(i):
+            fs_name = fsdecode(self.name(child))
+            name = normalize(fs_name)
+            flags = self.flags[child]
+            ret.append((name, fs_name if fs_name != name else None, bool(flags & FLAG_DIR), bool(flags & FLAG_SYMLINK)))
+        return ret
+
+    def match(self, pattern, path_search=False):
+        """
+        Find items matching pattern. Only names are decoded (or paths, with
+        `path_search`), and roots are skipped. Names are matched in blocks, using
+        whole block of buffer with names at once (see: pattern.Pattern.match_joined).
+        :param pattern:pattern.Pattern|pattern.PatternSet
+        :param path_search:bool - match full paths instead of names
+        :return:generator of int - indexes of matching items
+        """
+        first = len(self._roots)
+        if path_search:
+            for i in range(first, len(self.parents)):
+                if pattern.match(self.path(i)):
+                    yield i
+            return
+
+        for block_start in range(first, len(self.parents), _MATCH_BLOCK):
+            block_end = min(block_start + _MATCH_BLOCK, len(self.parents))
+            base = self.offsets[block_start]
+            block = bytes(self.names[base:self.offsets[block_end] - 1])
+            ## non-ASCII names have to be normalized one by one
+            if _RXP_NON_ASCII.search(block):
+                for i in range(block_start, block_end):
+                    if pattern.match_bytes(self.name(i)):
+                        yield i
+                continue
+
+            for i in pattern.match_joined(block.decode('ascii'), self.offsets[block_start:block_end], base):
+                yield block_start + i
+
+    def memory_size(self):
+        """
+        Size of data stored in tree (without constant overhead of Python objects)
+        :return:int - in bytes
+        """
+        columns = [self.parents, self.flags, self.offsets, self.child_start, self.child_end]
+        if self.with_stat:
+            columns.extend((self.sizes, self.mtimes))
+        return len(self.names) + sum(column.itemsize * len(column) for column in columns)
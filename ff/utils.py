@@ -7,7 +7,9 @@
 from __future__ import print_function, unicode_literals, division
 
 import functools
+import io
 import os
+import re
 import sys
 import unicodedata
 
@@ -108,9 +110,57 @@ def disp(*args, **kwargs):
             print(*args, sep=kwargs.get('sep'), end=kwargs.get('end'), file=kwargs.get('file'))
 
 
+def _fsencode_py2(path):
+    """ Encode path to filesystem encoding (python2 version of os.fsencode)
+    """
+    if isinstance(path, unicode):
+        return path.encode(sys.getfilesystemencoding() or 'utf-8')
+    return path
+
+
+def _fsdecode_py2(path):
+    """ Decode path from filesystem encoding (python2 version of os.fsdecode)
+    """
+    if isinstance(path, str):
+        return path.decode(sys.getfilesystemencoding() or 'utf-8', 'replace')
+    return path
+
+
 # pylint: disable=invalid-name
 normalize = functools.partial(unicodedata.normalize, NORMALIZE_FORM)
 if not IS_PY2:
     getcwd = os.getcwd
+    fsencode = os.fsencode
+    fsdecode = os.fsdecode
 else:
     getcwd = os.getcwdu
+    fsencode = _fsencode_py2
+    fsdecode = _fsdecode_py2
+
+
+def _unescape_mountinfo(value):
+    """ Decode octal escapes (ie. \\040 for space) used in /proc/self/mountinfo
+    """
+    return re.sub(r'\\([0-7]{3})', lambda match: chr(int(match.group(1), 8)), value)
+
+
+def read_mounts(path='/proc/self/mountinfo'):
+    """ Read mounted filesystems (Linux only).
+        :param path:str - path to mountinfo file
+        :return:dict - type of filesystem by mount point, empty if mountinfo is not available
+    """
+    mounts = {}
+    try:
+        with io.open(path, encoding='utf-8', errors='surrogateescape' if not IS_PY2 else 'replace') as fh:
+            for line in fh:
+                ## fields: id, parent id, major:minor, root, mount point, options, optional fields..., "-", fs type, ...
+                fields = line.split()
+                try:
+                    separator = fields.index('-', 6)
+                    mounts[_unescape_mountinfo(fields[4])] = fields[separator + 1]
+                except (ValueError, IndexError):
+                    continue
+    except (IOError, OSError):
+        pass
+
+    return mounts
@@ -6,8 +6,6 @@
 
 from __future__ import print_function, unicode_literals
 
-import os.path
-
 def _test_greater(arg1, arg2):
     """ Test for being greater then.
     """
@@ -36,17 +34,11 @@ _MULTI = {
     'g': 1024**3,
 }
 
-# pylint: disable=invalid-name
-_cache = {}
-
-def _action(__, argument, path):
-    """ Test given path for being it's size match specified criteria.
+def _parse_argument(argument):
+    """ Parse argument given by user. It's syntax is: [<>=]?[0-9]+[bkgm]?
 
-        `__` - not used
-        `argument` - data passed by user. It's syntax is: [<>=]?[0-9]+[bkgm]?
-        `path` - path to tested file
+        Returns tuple: test function and size in bytes.
     """
-
     if not argument:
         # pylint: disable=undefined-variable
         raise FFPluginError('missing size')
@@ -58,29 +50,35 @@ def _action(__, argument, path):
         test = _TESTS['=']
         size = argument
 
-    if size[-1] in 'bkmgBKMG':
-        size = int(size[:-1]) * _MULTI[size[-1].lower()]
-    else:
-        size = int(size)
+    try:
+        if size[-1:] in ('b', 'k', 'm', 'g', 'B', 'K', 'M', 'G'):
+            size = int(size[:-1]) * _MULTI[size[-1].lower()]
+        else:
+            size = int(size)
+    except ValueError:
+        # pylint: disable=undefined-variable
+        raise FFPluginError('invalid size: %s' % argument)
 
-    path = os.path.realpath(path)
-    if path not in _cache:
-        _cache[path] = os.path.getsize(path)
-    return test(_cache[path], size)
+    return test, size
 
-def plugin_action(name, argument, path):
-    """ Action used by `ff`. Wrapper for `_action`.
+def plugin_prepare(__, argument):
+    """ Prepare predicate used by `ff`: argument is parsed once, and size
+        of every entry is taken from its (cached) stat data.
+
+        `__` - not used
+        `argument` - data passed by user. It's syntax is: [<>=]?[0-9]+[bkgm]?
     """
-    try:
-        return _action(name, argument, path)
-    # pylint: disable=undefined-variable
-    except FFPluginError:
-        raise
-    except:
-        import sys
-        ex = sys.exc_info()[1]
-        # pylint: disable=undefined-variable
-        raise FFPluginError(ex.message)
+    test, size = _parse_argument(argument)
+
+    def _predicate(entry):
+        """ Test given entry for being it's size match specified criteria.
+        """
+        try:
+            return test(entry.size, size)
+        except OSError:
+            return False
+
+    return _predicate
 
 PLUGIN_DESCR = 'Filter files by their size.'
 PLUGIN_HELP = '''Size must be given as argument, and must follow pattern (without spaces):
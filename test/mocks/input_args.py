@@ -7,13 +7,30 @@ class InputArgsMock:
         self.sources = []
 
         self.depth = -1
+        self.min_depth = 0
         self.excluded_paths = []
         self.include_vcs = False
         self.mode = scanner.MODE_ALL
         self.pattern = None
         self.path_search = False
+        self.sort_by_score = False
         self.invert_match = False
         self.tests = []
+        self.engine = scanner.ENGINE_SCANDIR
+        self.jobs = 1
+        self.ordered = False
+        self.order = scanner.ORDER_DFS
+        self.bytes_mode = False
+        self.respect_ignore = False
+        self.xdev = False
+        self.follow_symlinks = False
+        self.skipped_fs_types = []
+        self.index = None
+        self.stats = None
+        self.use_index = False
+        self.index_path = '~/.ff/index.sqlite'
+        self.use_server = False
+        self.server_socket = '~/.ff/server.sock'
 
         self.ignorecase = False
         self.smartcase = False
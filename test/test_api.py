@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import os
+import os.path
+import shutil
+
+from test_manager import *
+
+import ff
+from ff import pattern
+from ff import plugin
+from ff import scanner
+from test_scanner import TREE, make_tree
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'api')
+        make_tree(self.root, TREE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _search(self, pat, **kw):
+        return sorted(os.path.relpath(entry.path, self.root) for entry in ff.search(pat, self.root, **kw))
+
+    def test_search(self):
+        self.assertEqual(self._search('*.txt', mode=scanner.MODE_FILES),
+                         ['a/a1.txt', 'a/b/b1.txt', 'a/b/c/c1.txt', 'e1.txt'])
+        self.assertEqual(self._search('B', ignorecase=True), ['a/b', 'a/b/b1.txt'])
+        self.assertEqual(self._search(['d', 'e1']), ['d', 'd/d1.log', 'e1.txt'])
+        self.assertEqual(self._search('g/\\d\\.log$/', magic_pattern=True), ['d/d1.log'])
+        self.assertEqual(self._search('1', depth=1), ['e1.txt'])
+        self.assertEqual(self._search('1', excluded_paths=[os.path.join(self.root, 'a')]), ['d/d1.log', 'e1.txt'])
+
+    def test_compiled_pattern(self):
+        pat = pattern.Pattern()
+        pat.pattern = 'c1'
+        pat.compile()
+        self.assertEqual(self._search(pat), ['a/b/c/c1.txt'])
+
+    def test_metadata(self):
+        ## file content is its path, so size is the length of path
+        self.assertEqual(self._search('', size='>10', mode=scanner.MODE_FILES), ['a/b/c/c1.txt'])
+        self.assertEqual(self._search('', types='d', depth=2), ['a', 'a/b', 'd'])
+
+    def test_metadata_not_cached_between_searches(self):
+        self.assertEqual(self._search('e1', size='>10'), [])
+        with open(os.path.join(self.root, 'e1.txt'), 'w') as fh:
+            fh.write('x' * 20)
+        self.assertEqual(self._search('e1', size='>10'), ['e1.txt'])
+
+    def test_concurrent_searches_stat_cache(self):
+        path = os.path.join(self.root, 'e1.txt')
+        plugin.stat_cache.stat(path)
+
+        first = ff.search('', self.root, size='>0')
+        first_entry = next(first)
+        second = list(ff.search('', self.root, size='>0'))
+        ## caches (and counters) of searches are separate, shared one is not cleared
+        self.assertIsNot(first_entry.cache, second[0].cache)
+        self.assertIsNot(first_entry.cache, plugin.stat_cache)
+        self.assertIn(first_entry.fs_path, first_entry.cache)
+        self.assertEqual(first_entry.cache.misses, 1)
+        self.assertIn(path, plugin.stat_cache)
+        self.assertEqual(len(list(first)), len(second) - 1)
+
+    def test_limit(self):
+        self.assertEqual(len(list(ff.search('', self.root, limit=3))), 3)
+        self.assertEqual(len(list(ff.search('', self.root, first_only=True, jobs=3))), 1)
+
+    def test_cancel(self):
+        with ff.search('', self.root, jobs=2) as result:
+            found = [next(result), next(result)]
+            result.cancel()
+            self.assertEqual(list(result), [])
+        self.assertEqual(len(found), 2)
+
+    def test_lazy(self):
+        result = ff.search('', self.root)
+        shutil.rmtree(os.path.join(self.root, 'a'))
+        self.assertNotIn('a', [os.path.relpath(entry.path, self.root) for entry in result])
+
+    def test_unknown_option(self):
+        self.assertRaises(TypeError, ff.search, 'a', self.root, unknown_option=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import io
+import json
+import os
+import os.path
+import shutil
+
+from test_manager import *
+
+from ff import bench
+
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'bench')
+
+    def tearDown(self):
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+
+    def _listing(self, shape, seed):
+        bench.make_tree(self.root, shape, 0.1, seed)
+        try:
+            return sorted((path, sorted(dirs), sorted(files)) for path, dirs, files in os.walk(self.root))
+        finally:
+            shutil.rmtree(self.root)
+
+    def test_make_tree_reproducible(self):
+        for shape in bench.SHAPES:
+            self.assertEqual(self._listing(shape, 1), self._listing(shape, 1))
+        self.assertNotEqual(self._listing(bench.SHAPE_WIDE, 1), self._listing(bench.SHAPE_WIDE, 2))
+
+    def test_make_tree_excludes(self):
+        info = bench.make_tree(self.root, bench.SHAPE_EXCLUDES, 0.1)
+        self.assertTrue(info['excluded_paths'])
+        for path in info['excluded_paths']:
+            self.assertTrue(os.path.isdir(path))
+
+    def test_run_benchmark(self):
+        info = bench.make_tree(self.root, bench.SHAPE_EXCLUDES, 0.1)
+        result = bench.run_benchmark(self.root, info['excluded_paths'], repeat=1)
+
+        kinds = set(kind for kind, _, _ in bench.PATTERNS)
+        self.assertEqual(set(result['stages']), set(bench.STAGES))
+        self.assertEqual(set(result['stages']['match']), kinds)
+        self.assertEqual(set(result['end_to_end']), kinds)
+        self.assertLess(result['items'], info['files'] + info['dirs'])
+        self.assertTrue(all(result['matched'].values()))
+
+    def test_main(self):
+        output = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'bench.json')
+        try:
+            bench.main(['--shape', 'deep', '--shape', 'vcs', '--scale', '0.1', '--repeat', '1',
+                        '--dir', self.root, '--output', output])
+            with io.open(output, encoding='utf-8') as fh:
+                report = json.load(fh)
+        finally:
+            os.unlink(output)
+
+        self.assertEqual([result['shape'] for result in report['results']], ['deep', 'vcs'])
+        self.assertEqual(report['results'][1]['files'], 2 * 50 * 5)
+        ## VCS directories are skipped: only projects, their src directories and files inside
+        self.assertEqual(report['results'][1]['items'], 5 * 2 + 5 * 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -51,7 +51,7 @@ def validate_prefix_for_mode(val):
         return isinstance(val, (str, unicode))
 
 
-@register_validator('excluded_paths', 'plugins_paths')
+@register_validator('excluded_paths', 'plugins_paths', 'skipped_fs_types')
 def validate_paths_sections(val):
     if not utils.IS_PY2:
         return isinstance(val, (list, tuple)) and all(isinstance(path, str) for path in val)
@@ -71,7 +71,7 @@ class TestConfig(unittest.TestCase):
             'ignorecase', 'smartcase', 'print0', 'depth', 'mode',
             'regexp', 'fuzzy', 'path_search', 'prefix', 'prefix_dirs',
             'prefix_files', 'colorize', 'include_vcs', 'excluded_paths',
-            'plugins_paths'
+            'plugins_paths', 'skipped_fs_types'
         )
 
     def test_read_non_existent_file(self):
@@ -157,6 +157,7 @@ class TestConfig(unittest.TestCase):
         self.assertTrue(cfg.include_vcs)
         self.assertEqual(cfg.excluded_paths, ['data', 'test', '/var/log'])
         self.assertEqual(cfg.plugins_paths, ['c'])
+        self.assertEqual(cfg.skipped_fs_types, ['proc'])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+from test_manager import *
+
+from ff import evaluator
+
+
+class CheckMock(object):
+    def __init__(self, check, has_batch=False):
+        self.check = check
+        self.has_batch = has_batch
+        self.calls = 0
+
+    def test(self, entry):
+        self.calls += 1
+        return self.check(entry)
+
+    def test_batch(self, entries):
+        self.calls += len(entries)
+        return [self.check(entry) for entry in entries]
+
+
+class TestEvaluator(unittest.TestCase):
+    def test_all_of(self):
+        tests = evaluator.AllOf([CheckMock(lambda x: x > 2), CheckMock(lambda x: x < 5)], adaptive=False)
+        self.assertEqual([x for x in range(8) if tests.test(x)], [3, 4])
+        self.assertEqual(tests.test_batch(list(range(8))), [x in (3, 4) for x in range(8)])
+        self.assertTrue(evaluator.AllOf([]).test(1))
+
+    def test_any_of(self):
+        tests = evaluator.AnyOf([CheckMock(lambda x: x < 2), CheckMock(lambda x: x > 5)], adaptive=False)
+        self.assertEqual([x for x in range(8) if tests.test(x)], [0, 1, 6, 7])
+        self.assertEqual(tests.test_batch(list(range(8))), [x in (0, 1, 6, 7) for x in range(8)])
+        self.assertFalse(evaluator.AnyOf([]).test(1))
+
+    def test_not(self):
+        tests = evaluator.Not(CheckMock(lambda x: x % 2))
+        self.assertEqual([x for x in range(6) if tests.test(x)], [0, 2, 4])
+        self.assertEqual(tests.test_batch([0, 1]), [True, False])
+
+    def test_nested(self):
+        tests = evaluator.AllOf([
+            CheckMock(lambda x: x > 0),
+            evaluator.AnyOf([CheckMock(lambda x: x % 3 == 0), CheckMock(lambda x: x % 5 == 0)]),
+            evaluator.Not(CheckMock(lambda x: x % 2 == 0)),
+        ])
+        expected = [x for x in range(1, 40) if (x % 3 == 0 or x % 5 == 0) and x % 2]
+        self.assertEqual([x for x in range(40) if tests.test(x)], expected)
+        self.assertEqual([x for x, result in zip(range(40), tests.test_batch(list(range(40)))) if result], expected)
+
+    def test_statistics(self):
+        first, second = CheckMock(lambda x: x > 2), CheckMock(lambda x: x < 5)
+        tests = evaluator.AllOf([first, second], adaptive=False)
+        for x in range(8):
+            tests.test(x)
+        self.assertEqual([row[:3] for row in tests.statistics()], [(first, 8, 5), (second, 5, 2)])
+        self.assertTrue(all(row[3] >= 0 for row in tests.statistics()))
+
+    def test_short_circuit(self):
+        first, second = CheckMock(lambda x: False), CheckMock(lambda x: True)
+        tests = evaluator.AllOf([first, second], adaptive=False)
+        for x in range(10):
+            tests.test(x)
+        self.assertEqual((first.calls, second.calls), (10, 0))
+
+        tests.test_batch(list(range(10)))
+        self.assertEqual((first.calls, second.calls), (20, 0))
+
+    def test_adaptive_order(self):
+        rare, selective = CheckMock(lambda x: True), CheckMock(lambda x: x % 10 == 0)
+        tests = evaluator.AllOf([rare, selective])
+        for x in range(evaluator.REORDER_EVERY * 2):
+            tests.test(x)
+
+        self.assertEqual(tests.tests, [selective, rare])
+        self.assertLess(rare.calls, evaluator.REORDER_EVERY * 2)
+
+    def test_has_batch(self):
+        self.assertFalse(evaluator.AllOf([CheckMock(None)]).has_batch)
+        self.assertTrue(evaluator.AllOf([CheckMock(None), evaluator.Not(CheckMock(None, True))]).has_batch)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import io
+import os
+import os.path
+import sys
+
+from test_manager import *
+
+from ff.execute import Executor
+
+
+SCRIPT = '''
+import sys
+with open(sys.argv[1], 'a') as fh:
+    fh.write(' '.join(sys.argv[2:]) + '\\n')
+'''
+
+
+class TestExecutor(unittest.TestCase):
+    def setUp(self):
+        self.script = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'ff_execute_script.py')
+        self.output = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'ff_execute_output.txt')
+        with open(self.script, 'w') as fh:
+            fh.write(SCRIPT)
+
+    def tearDown(self):
+        for path in (self.script, self.output):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _command(self, args):
+        return '"%s" "%s" "%s" %s' % (sys.executable, self.script, self.output, args)
+
+    def _read_output(self):
+        with io.open(self.output, encoding='utf-8') as fh:
+            return fh.read().splitlines()
+
+    def test_single(self):
+        executor = Executor(self._command('{basename} {dirname}'))
+        executor.submit('/a/b')
+        executor.submit('/c/d')
+        executor.close()
+
+        self.assertEqual(self._read_output(), ['b /a', 'd /c'])
+
+    def test_batch(self):
+        executor = Executor(self._command('-x {path}'), batch=True)
+        for path in ('/a', '/b', '/c'):
+            executor.submit(path)
+        executor.close()
+
+        self.assertEqual(self._read_output(), ['-x /a /b /c'])
+
+    def test_batch_repeat_arguments_with_placeholders(self):
+        executor = Executor(self._command('-x --name={basename} --dir={dirname} end'), batch=True)
+        for path in ('/a/b', '/c/d'):
+            executor.submit(path)
+        executor.close()
+
+        self.assertEqual(self._read_output(), ['-x --name=b --dir=/a --name=d --dir=/c end'])
+
+    def test_batch_without_placeholders(self):
+        executor = Executor(self._command('--'), batch=True)
+        for path in ('/a', '/b', '/c'):
+            executor.submit(path)
+        executor.close()
+
+        self.assertEqual(self._read_output(), ['-- /a /b /c'])
+
+    def test_batch_size_limit(self):
+        executor = Executor(self._command('{path} end'), batch=True)
+        executor._size_limit = sum(len(arg) + 9 for arg in executor.template) + 3 * (len('/p00') + 9)
+
+        paths = ['/p%02d' % i for i in range(10)]
+        for path in paths:
+            executor.submit(path)
+        executor.close()
+
+        output = self._read_output()
+        self.assertEqual(len(output), 4)
+        self.assertEqual(output[0], '/p00 /p01 /p02 end')
+        self.assertEqual(' '.join(output).replace(' end', '').split(), paths)
+
+    def test_jobs(self):
+        executor = Executor(self._command('{path}'), jobs=4)
+        paths = ['/p%02d' % i for i in range(20)]
+        for path in paths:
+            executor.submit(path)
+        executor.close()
+
+        self.assertEqual(sorted(self._read_output()), paths)
+
+    def test_close_without_wait(self):
+        executor = Executor(self._command('{path}'), batch=True)
+        executor.submit('/a')
+        executor.close(wait=False)
+
+        self.assertFalse(os.path.exists(self.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,7 @@ import types
 from test_manager import *
 
 from ff import plugin
+from ff import scanner
 
 
 class TestFFPlugin(unittest.TestCase):
@@ -34,11 +35,25 @@ class TestFFPlugin(unittest.TestCase):
             fh.write("PLUGIN_DESCR = lambda name: \"short descr for \" + name\n")
             fh.write("PLUGIN_HELP = lambda name: \"some help for \" + name\n")
 
+        with open(os.path.join(PLAYGROUND_PATH, 'ffplugin_test_mod5_prepare.py'), 'w') as fh:
+            fh.write("calls = []\n")
+            fh.write("def plugin_prepare(name, arg):\n")
+            fh.write("    calls.append(arg)\n")
+            fh.write("    return lambda entry: entry.name.startswith(arg)\n")
+
+        with open(os.path.join(PLAYGROUND_PATH, 'ffplugin_test_mod6_batch.py'), 'w') as fh:
+            fh.write("batches = []\n")
+            fh.write("plugin_prepare = lambda name, arg: lambda entry: entry.name.startswith(arg)\n")
+            fh.write("def plugin_test_batch(predicate, entries):\n")
+            fh.write("    batches.append(len(entries))\n")
+            fh.write("    return [predicate(entry) for entry in entries]\n")
+
     def tearDown(self):
         sys.path.remove(PLAYGROUND_PATH)
 
         for file_ in ('ffplugin_test_mod1_empty.py', 'ffplugin_test_mod2_action.py',
-                      'ffplugin_test_mod3_action_descr_help.py', 'ffplugin_test_mod4_action_descr_help_callable.py'):
+                      'ffplugin_test_mod3_action_descr_help.py', 'ffplugin_test_mod4_action_descr_help_callable.py',
+                      'ffplugin_test_mod5_prepare.py', 'ffplugin_test_mod6_batch.py'):
             path = os.path.join(PLAYGROUND_PATH, file_)
             if os.path.exists(path):
                 os.unlink(path)
@@ -54,6 +69,7 @@ class TestFFPlugin(unittest.TestCase):
         self.assertTrue(hasattr(_mod, 'PLUGIN_HELP'))
         self.assertTrue(hasattr(_mod, 'FFPluginError'))
         self.assertTrue(_mod.FFPluginError is plugin.FFPluginError)
+        self.assertTrue(_mod.stat_cache is plugin.stat_cache)
 
     def test_import_non_existant(self):
         self.assertRaises(ImportError, lambda: plugin.FFPlugin._import('test', 'mod_non_existent'))
@@ -108,6 +124,39 @@ class TestFFPlugin(unittest.TestCase):
         result = 'mod4_action_descr_help_callable'.upper() + '!' + arg.lower() + '!' + path.upper()
         self.assertEqual(p.run(path), result)
 
+    def test_v1_adapter(self):
+        p = plugin.FFPlugin('mod4_action_descr_help_callable', 'test', argument='ARG')
+        self.assertEqual(p.api_version, 1)
+        self.assertFalse(p.has_batch)
+
+        entries = [scanner.Entry('/x/asd', 'asd', '/x/asd', 1, False), scanner.Entry('/x/qwe', 'qwe', '/x/qwe', 1, False)]
+        prefix = 'mod4_action_descr_help_callable'.upper() + '!arg!'
+        self.assertEqual(p.test(entries[0]), prefix + '/X/ASD')
+        self.assertEqual(p.test_batch(entries), [prefix + '/X/ASD', prefix + '/X/QWE'])
+
+    def test_prepare(self):
+        p = plugin.FFPlugin('mod5_prepare', 'test', argument='as')
+        self.assertEqual(p.api_version, 2)
+        self.assertFalse(p.has_batch)
+        self.assertIsNone(p.action)
+
+        entries = [scanner.Entry('/x/asd', 'asd', '/x/asd', 1, False), scanner.Entry('/x/qwe', 'qwe', '/x/qwe', 1, False)]
+        self.assertTrue(p.test(entries[0]))
+        self.assertFalse(p.test(entries[1]))
+        self.assertEqual(p.test_batch(entries), [True, False])
+        self.assertTrue(p.run('/x/asd'))
+
+        ## argument is parsed only once
+        self.assertEqual(sys.modules['ffplugin_test_mod5_prepare'].calls, ['as'])
+
+    def test_batch(self):
+        p = plugin.FFPlugin('mod6_batch', 'test', argument='q')
+        self.assertTrue(p.has_batch)
+
+        entries = [scanner.Entry('/x/asd', 'asd', '/x/asd', 1, False), scanner.Entry('/x/qwe', 'qwe', '/x/qwe', 1, False)]
+        self.assertEqual(p.test_batch(entries), [False, True])
+        self.assertEqual(sys.modules['ffplugin_test_mod6_batch'].batches, [2])
+
 
 if __name__ == '__main__':
     unittest.main()
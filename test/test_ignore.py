@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import os
+import os.path
+import shutil
+
+from test_manager import *
+
+from ff import ignore
+
+
+def rules(*lines):
+    return [rule for rule in (ignore.compile_rule(line) for line in lines) if rule is not None]
+
+
+class TestCompileRule(unittest.TestCase):
+    def test_empty_and_comments(self):
+        self.assertIsNone(ignore.compile_rule(''))
+        self.assertIsNone(ignore.compile_rule('   \n'))
+        self.assertIsNone(ignore.compile_rule('# comment'))
+        self.assertIsNotNone(ignore.compile_rule('\\#file'))
+
+    def test_flags(self):
+        _, negate, dir_only = ignore.compile_rule('!build/\n')
+        self.assertTrue(negate)
+        self.assertTrue(dir_only)
+
+        _, negate, dir_only = ignore.compile_rule('*.log')
+        self.assertFalse(negate)
+        self.assertFalse(dir_only)
+
+    def test_not_anchored(self):
+        rxp = ignore.compile_rule('*.log')[0]
+        self.assertTrue(rxp.match('a.log'))
+        self.assertTrue(rxp.match('x/y/a.log'))
+        self.assertFalse(rxp.match('a.log.txt'))
+
+    def test_anchored(self):
+        rxp = ignore.compile_rule('/build')[0]
+        self.assertTrue(rxp.match('build'))
+        self.assertFalse(rxp.match('x/build'))
+
+        rxp = ignore.compile_rule('doc/*.txt')[0]
+        self.assertTrue(rxp.match('doc/a.txt'))
+        self.assertFalse(rxp.match('doc/x/a.txt'))
+        self.assertFalse(rxp.match('x/doc/a.txt'))
+
+    def test_double_star(self):
+        rxp = ignore.compile_rule('**/foo')[0]
+        self.assertTrue(rxp.match('foo'))
+        self.assertTrue(rxp.match('a/b/foo'))
+
+        rxp = ignore.compile_rule('a/**/b')[0]
+        self.assertTrue(rxp.match('a/b'))
+        self.assertTrue(rxp.match('a/x/y/b'))
+        self.assertFalse(rxp.match('x/a/b'))
+
+        rxp = ignore.compile_rule('a/**')[0]
+        self.assertTrue(rxp.match('a/x/y'))
+        self.assertFalse(rxp.match('a'))
+
+    def test_wildcards(self):
+        rxp = ignore.compile_rule('file?.[ch]')[0]
+        self.assertTrue(rxp.match('file1.c'))
+        self.assertTrue(rxp.match('file2.h'))
+        self.assertFalse(rxp.match('file1.o'))
+        self.assertFalse(rxp.match('file/.c'))
+
+        rxp = ignore.compile_rule('[!a]*')[0]
+        self.assertTrue(rxp.match('b'))
+        self.assertFalse(rxp.match('a'))
+
+
+class TestIgnoreRules(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'ignore')
+
+    def tearDown(self):
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+
+    def test_is_ignored(self):
+        parent = ignore.IgnoreRules('/src', rules('*.log', 'build/', 'tmp'))
+        child = ignore.IgnoreRules('/src/lib', rules('!keep.log', 'tmp/'), parent)
+
+        self.assertTrue(parent.is_ignored('/src/a.log', False))
+        self.assertTrue(parent.is_ignored('/src/build', True))
+        self.assertFalse(parent.is_ignored('/src/build', False))
+        self.assertFalse(parent.is_ignored('/src/a.txt', False))
+
+        self.assertTrue(child.is_ignored('/src/lib/a.log', False))
+        self.assertFalse(child.is_ignored('/src/lib/keep.log', False))
+        self.assertTrue(parent.is_ignored('/src/lib/keep.log', False))
+        ## the last matching rule wins, rules from deeper directories are checked first
+        self.assertTrue(child.is_ignored('/src/lib/tmp', False))
+        self.assertTrue(child.is_ignored('/src/lib/tmp', True))
+
+    def test_for_parents(self):
+        source = os.path.join(self.root, 'repo', 'sub', 'dir')
+        os.makedirs(source)
+        os.makedirs(os.path.join(self.root, 'repo', '.git'))
+        with open(os.path.join(self.root, 'repo', '.gitignore'), 'w') as fh:
+            fh.write('*.log\n')
+        with open(os.path.join(self.root, 'repo', 'sub', '.ignore'), 'w') as fh:
+            fh.write('/dir/build\n')
+
+        rules_ = ignore.IgnoreRules.for_parents(source)
+        self.assertTrue(rules_.is_ignored(os.path.join(source, 'a.log'), False))
+        self.assertTrue(rules_.is_ignored(os.path.join(source, 'build'), True))
+        self.assertFalse(rules_.is_ignored(os.path.join(source, 'a.txt'), False))
+
+        self.assertIsNone(ignore.IgnoreRules.for_parents(os.path.join(self.root, 'repo')))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import os
+import os.path
+import shutil
+import sqlite3
+import tempfile
+
+from test_manager import *
+from mocks.input_args import InputArgsMock
+
+from ff import index
+from ff import pattern
+from ff import scanner
+
+from test_scanner import TREE, make_tree
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'index')
+        make_tree(self.root, TREE)
+
+        fh, self.index_path = tempfile.mkstemp(prefix='ff_', suffix='.sqlite')
+        os.close(fh)
+        self.index = index.Index(self.index_path)
+
+    def tearDown(self):
+        self.index.close()
+        os.unlink(self.index_path)
+        shutil.rmtree(self.root)
+
+    def _scan(self, pat='', use_index=True, **kw):
+        cfg = InputArgsMock()
+        cfg.sources = [self.root]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = pat
+        cfg.pattern.compile()
+        cfg.index = self.index if use_index else None
+        for key, value in kw.items():
+            setattr(cfg, key, value)
+
+        return [os.path.relpath(item.path, self.root) for item in scanner.Scanner(cfg)]
+
+    def _touch_dir(self, path):
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(path, (mtime, mtime))
+
+    def test_missing_index_file(self):
+        with self.assertRaises(index.FFIndexError):
+            index.Index(os.path.join(self.root, 'missing.sqlite'))
+
+    def test_same_results_as_live_scan(self):
+        self.index.update(self.root)
+
+        self.assertEqual(self._scan(), self._scan(use_index=False))
+        self.assertEqual(self._scan('1'), self._scan('1', use_index=False))
+        self.assertEqual(self._scan(depth=2), self._scan(depth=2, use_index=False))
+        self.assertEqual(self._scan(mode=scanner.MODE_DIRS), self._scan(mode=scanner.MODE_DIRS, use_index=False))
+        self.assertEqual(self._scan(include_vcs=True), self._scan(include_vcs=True, use_index=False))
+
+        excluded = [os.path.join(self.root, 'a', 'b')]
+        self.assertEqual(self._scan(excluded_paths=excluded), self._scan(excluded_paths=excluded, use_index=False))
+
+    def test_not_indexed_source(self):
+        self.assertEqual(self._scan(), [])
+
+    def test_incremental_refresh(self):
+        self.assertEqual(self.index.update(self.root), 6)
+        self.assertEqual(self.index.update(self.root), 0)
+
+        with open(os.path.join(self.root, 'a', 'b', 'new.txt'), 'w'):
+            pass
+        self._touch_dir(os.path.join(self.root, 'a', 'b'))
+        self.assertEqual(self.index.update(self.root), 1)
+        self.assertIn('a/b/new.txt', self._scan())
+
+        shutil.rmtree(os.path.join(self.root, 'a', 'b'))
+        self._touch_dir(os.path.join(self.root, 'a'))
+        self.assertEqual(self.index.update(self.root), 1)
+        self.assertEqual(self._scan(), self._scan(use_index=False))
+
+    @unittest.skipIf(IS_PY2, 'names are not decoded with surrogateescape in python2')
+    def test_undecodable_names(self):
+        try:
+            os.mkdir(os.path.join(self.root.encode('utf-8'), b'und\xffir'))
+            open(os.path.join(self.root.encode('utf-8'), b'und\xffir', b'f\xfe.txt'), 'w').close()
+        except (OSError, IOError):
+            self.skipTest('filesystem does not accept undecodable names')
+
+        self.assertEqual(self.index.update(self.root), 7)
+        self.assertEqual(self.index.update(self.root), 0)
+        self.assertEqual(sorted(self._scan()), sorted(self._scan(use_index=False)))
+        self.assertIn(os.path.join('und\udcffir', 'f\udcfe.txt'), self._scan())
+
+    def test_old_format(self):
+        self.index.close()
+        os.unlink(self.index_path)
+        db = sqlite3.connect(self.index_path)
+        db.execute('CREATE TABLE dirs (id INTEGER PRIMARY KEY, parent_id INTEGER, path TEXT NOT NULL UNIQUE, mtime REAL)')
+        db.close()
+
+        with self.assertRaises(index.FFIndexError):
+            index.Index(self.index_path)
+
+        self.index = index.Index(self.index_path, create=True)
+        self.index.update(self.root)
+        self.assertEqual(self._scan(), self._scan(use_index=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -61,6 +61,21 @@ class TestIsPathExcluded(unittest.TestCase):
                  'Path "%s" should%s be excluded (excluded: %s)' % (
                      path, '' if test_paths[path] else ' not', self.scanner.excluded_paths))
 
+    def test_nested_and_prefixed_paths(self):
+        excluded_paths = ['/var/lib', '/var/lib/docker', '/home/user/node_modules']
+        self._set_excluded_paths(excluded_paths)
+
+        test_paths = {
+            '/var': False, '/var/li': False, '/var/lib': True, '/var/libs': False,
+            '/var/lib/docker/a': True, '/var/lib/apt': True,
+            '/home/user': False, '/home/user/node_modules/a/b': True, '/opt/home/user/node_modules': False,
+        }
+        for path in sorted(test_paths.keys()):
+            path = normalize(path)
+            self.assertEqual(self.scanner._is_path_excluded(path), test_paths[path],
+                 'Path "%s" should%s be excluded (excluded: %s)' % (
+                     path, '' if test_paths[path] else ' not', self.scanner.excluded_paths))
+
     def test_unicode_normalized_is_excluded(self):
         excluded_paths = ['/etc/pas_ążśź_GÖS_end']
         self._set_excluded_paths(excluded_paths)
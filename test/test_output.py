@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import io
+
+from test_manager import *
+
+from ff.output import Output
+
+
+class TestOutput(unittest.TestCase):
+    def test_buffering(self):
+        stream = io.BytesIO()
+        out = Output(stream, encoding='utf-8', buffer_size=10)
+
+        out.write('abc')
+        self.assertEqual(stream.getvalue(), b'')
+
+        out.write('defghij')
+        self.assertEqual(stream.getvalue(), b'abc\ndefghij\n')
+
+    def test_flush(self):
+        stream = io.BytesIO()
+        out = Output(stream, encoding='utf-8')
+
+        out.write('abc', 'def', end='\0')
+        out.write('ghi', end='\0')
+        self.assertEqual(stream.getvalue(), b'')
+
+        out.flush()
+        self.assertEqual(stream.getvalue(), b'abcdef\0ghi\0')
+
+    def test_text_stream(self):
+        raw = io.BytesIO()
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+        out = Output(stream)
+
+        stream.write('first\n')
+        out.write('zażółć')
+        out.flush()
+        self.assertEqual(raw.getvalue(), 'first\nzażółć\n'.encode('utf-8'))
+
+    def test_encoding_errors(self):
+        stream = io.BytesIO()
+        out = Output(stream, encoding='ascii')
+
+        out.write('zażółć')
+        out.flush()
+        self.assertEqual(stream.getvalue(), b'za????\n')
+
+    def test_not_tty(self):
+        out = Output(io.BytesIO())
+        self.assertFalse(out.is_tty)
+        self.assertTrue(out.buffer_size > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,7 @@ except ImportError:
 import os.path
 import re
 import sys
+import tempfile
 import unicodedata
 
 from test_manager import *
@@ -255,6 +256,15 @@ class TestParseInputArgs(unittest.TestCase):
         with self.assertRaisesRegexp(SystemExit, '2'):
             parse_input_args(iargs, cfg)
 
+    def test_min_depth(self):
+        cfg = InputArgsMock()
+
+        args = parse_input_args(['--pattern', 'a', '--min-depth', '2'], cfg)
+        self.assertEqual(args.min_depth, 2)
+
+        with self.assertRaisesRegexp(SystemExit, '2'):
+            parse_input_args(['--pattern', 'a', '--min-depth=-1'], cfg)
+
     def test_depth_valid_values(self):
         cfg = InputArgsMock()
 
@@ -333,6 +343,44 @@ class TestParseInputArgs(unittest.TestCase):
         self.assertIsInstance(args.pattern, pattern.Pattern)
         self.assertEqual(args.tests, ['t1:val', 't2:val'])
 
+    def test_max_results(self):
+        cfg = InputArgsMock()
+
+        args = parse_input_args(['--pattern', 'a'], cfg)
+        self.assertIsNone(args.max_results)
+
+        args = parse_input_args(['--pattern', 'a', '--max-results', '5'], cfg)
+        self.assertEqual(args.max_results, 5)
+
+        args = parse_input_args(['--pattern', 'a', '-1'], cfg)
+        self.assertEqual(args.max_results, 1)
+
+        with self.assertRaisesRegexp(SystemExit, '2'):
+            parse_input_args(['--pattern', 'a', '--max-results', '0'], cfg)
+
+    def test_metadata(self):
+        cfg = InputArgsMock()
+
+        args = parse_input_args(['--pattern', 'a'], cfg)
+        self.assertIsNone(args.metadata)
+
+        args = parse_input_args(['--pattern', 'a', '--size', '>1k', '--type', 'f,l', '--empty'], cfg)
+        self.assertEqual(len(args.metadata), 3)
+
+        for iargs in (['--size', '1x'], ['--type', 'x'], ['--perm', 'abc'], ['--newer', '/not/existing']):
+            with self.assertRaisesRegexp(SystemExit, '2'):
+                parse_input_args(['--pattern', 'a'] + iargs, cfg)
+
+    def test_tests_any_not(self):
+        cfg = InputArgsMock()
+
+        iargs = ['--pattern', 'a', '--test', 't1', '--test-any', 't2:val', '--test-any', 't3', '--test-not', 't4']
+        args = parse_input_args(iargs, cfg)
+
+        self.assertEqual(args.tests, ['t1'])
+        self.assertEqual(args.test_any, ['t2:val', 't3'])
+        self.assertEqual(args.test_not, ['t4'])
+
     def test_version(self):
         cfg = InputArgsMock()
 
@@ -514,6 +562,35 @@ class TestParseInputArgs(unittest.TestCase):
         for option in options:
             self.assertEquals(getattr(org_args, option), getattr(args, option), "%s shouldn't change" % option)
 
+    def test_multiple_patterns(self):
+        cfg = InputArgsMock()
+
+        iargs = ['--pattern', 'a', '-p', 'g/b+/', 'src']
+        args = parse_input_args(iargs, cfg)
+        self.assertIsInstance(args.pattern, pattern.PatternSet)
+        self.assertEqual([str(pat) for pat in args.pattern.patterns], ['/a/', '/g/b+//'])
+        self.assertEqual(args.sources, [os.path.abspath('src')])
+
+    def test_patterns_from(self):
+        cfg = InputArgsMock()
+
+        tmp = tempfile.NamedTemporaryFile(prefix='ff_', delete=False)
+        try:
+            tmp.write('# comment\n\nsetup.py\ng/^a+$/i\n'.encode('utf-8'))
+            tmp.close()
+
+            args = parse_input_args(['--patterns-from', tmp.name, 'src'], cfg)
+            self.assertIsInstance(args.pattern, pattern.PatternSet)
+            self.assertEqual(len(args.pattern), 2)
+            self.assertTrue(args.pattern.patterns[1].regexp)
+            self.assertTrue(args.pattern.patterns[1].ignorecase)
+            self.assertEqual(args.sources, [os.path.abspath('src')])
+        finally:
+            os.unlink(tmp.name)
+
+        with self.assertRaisesRegexp(SystemExit, '2'):
+            parse_input_args(['--patterns-from', tmp.name], cfg)
+
 
 if __name__ == '__main__':
     unittest.main()
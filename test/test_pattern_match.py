@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import itertools
+
+from test_manager import *
+
+from ff import pattern
+from ff.utils import normalize
+
+
+NAMES = (
+    '', 'a', 'abc', 'xabcx', 'ABC', 'abcd.py', 'abcd.pyc', 'setup.py', '.py', 'a.b.c',
+    'aaab', 'abbbc', 'foo123bar', 'foobar', 'x.txt', 'xtxt', 'ążśź_GÖS', '[abc]', 'a*b',
+)
+
+
+def match_names(compiled, names):
+    """ Match names as CompactTree.match does: joined with new line, at once """
+    starts = []
+    offset = 0
+    for name in names:
+        starts.append(offset)
+        offset += len(name) + 1
+    found = compiled.match_joined('\n'.join(names), starts) if names else []
+    return [i in found for i in range(len(names))]
+
+
+class TestPatternMatch(unittest.TestCase):
+    def _pattern(self, pat, **kw):
+        ret = pattern.Pattern()
+        ret.pattern = pat
+        for key, value in kw.items():
+            setattr(ret, key, value)
+        ret.compile()
+        return ret
+
+    def _assert_same_as_regexp(self, pat, **kw):
+        compiled = self._pattern(pat, **kw)
+        for name in NAMES:
+            self.assertEqual(bool(compiled.match(name)), compiled.pattern.search(name) is not None,
+                'Pattern %r (%s) gives different result for %r' % (pat, kw, name))
+
+    def test_fnmatch_literal(self):
+        for pat in ('', 'a', 'abc', 'py', '.py', 'GÖS', 'a.b'):
+            for begin, end in itertools.product((False, True), repeat=2):
+                self._assert_same_as_regexp(pat, fnmatch_begin=begin, fnmatch_end=end)
+                self._assert_same_as_regexp(pat, fnmatch_begin=begin, fnmatch_end=end, ignorecase=True)
+
+    def test_fnmatch_wildcards(self):
+        for pat in ('*.py', 'a*b', 'a?c', '[ab]bc', '[!x]bc', 'ab[', '*', '?', 'a[*]b', 'foo*bar'):
+            for begin, end in itertools.product((False, True), repeat=2):
+                self._assert_same_as_regexp(pat, fnmatch_begin=begin, fnmatch_end=end)
+
+    def test_regexp(self):
+        for pat in ('abc', r'\.py$', r'^a', r'ab+c', r'a+b', r'fo+\d+bar', r'a|x', r'(ab)?c',
+                    r'a{2,3}b', r'[abc]+', r'\[abc\]', r'a\*b', r'x.txt'):
+            self._assert_same_as_regexp(pat, regexp=True)
+            self._assert_same_as_regexp(pat, regexp=True, ignorecase=True)
+
+    def test_fuzzy(self):
+        for pat in ('', 'abc', 'ac', 'xtt', 'GS', 'gs', 'pyc', 'c', 'ab', 'a.c'):
+            for begin, end in itertools.product((False, True), repeat=2):
+                self._assert_same_as_regexp(pat, fuzzy=True, fnmatch_begin=begin, fnmatch_end=end)
+                self._assert_same_as_regexp(pat, fuzzy=True, fnmatch_begin=begin, fnmatch_end=end, ignorecase=True)
+
+    def test_fuzzy_long_name(self):
+        compiled = self._pattern('a' * 30 + 'b', fuzzy=True)
+        self.assertFalse(compiled.match('a' * 5000))
+        self.assertTrue(compiled.match('a' * 5000 + 'b'))
+
+    def test_fuzzy_spans(self):
+        compiled = self._pattern('abc', fuzzy=True)
+        self.assertEqual(compiled.spans('xaxabcx'), [(3, 6)])
+        self.assertEqual(compiled.spans('a_b_c'), [(0, 1), (2, 3), (4, 5)])
+        self.assertEqual(compiled.spans('xyz'), [])
+
+        compiled = self._pattern('ac', fuzzy=True, fnmatch_end=True)
+        self.assertEqual(compiled.spans('acxac'), [(3, 5)])
+
+    def test_spans(self):
+        compiled = self._pattern('ab')
+        self.assertEqual(compiled.spans('abxab'), [(0, 2), (3, 5)])
+        self.assertEqual(self._pattern('').spans('abc'), [])
+
+    def test_score(self):
+        compiled = self._pattern('ffr', fuzzy=True)
+        self.assertIsNone(compiled.score('xyz'))
+        scores = [compiled.score(name) for name in ('ffrc', 'ffxrc', 'xfxfxxxr', 'ff_rc', 'ff.rc')]
+        self.assertGreater(scores[0], scores[1])
+        self.assertGreater(scores[1], scores[2])
+        self.assertGreater(scores[3], scores[1])
+        self.assertEqual(scores[3], scores[4])
+
+        compiled = self._pattern('ffr', fuzzy=True, ignorecase=True)
+        self.assertGreater(compiled.score('FooFooRc'), compiled.score('foofoorc'))
+
+        compiled = self._pattern('py')
+        self.assertGreater(compiled.score('setup.py'), compiled.score('happy'))
+
+    def test_required_literal_regexp(self):
+        find = pattern.Pattern._find_required_literal_regexp
+        self.assertEqual(find('abc'), 'abc')
+        self.assertEqual(find('ab+c'), 'ab')
+        self.assertEqual(find('x(ab)?cde'), 'cde')
+        self.assertEqual(find('a{2,3}bcd'), 'bcd')
+        self.assertEqual(find(r'\.txt$'), '.txt')
+        self.assertEqual(find(r'^foo\d+bar'), 'foo')
+        self.assertEqual(find('[abc]xyz'), 'xyz')
+        self.assertEqual(find('abc|xyz'), '')
+        self.assertEqual(find('(?i)abc'), '')
+        self.assertEqual(find(r'\x66oo'), 'oo')
+        self.assertEqual(find(r'ab\101'), 'ab')
+        self.assertEqual(find(r'\0123'), '3')
+        self.assertEqual(find(r'\u00e9tude'), 'tude')
+        self.assertEqual(find(r'\U000000e9x'), 'x')
+        self.assertEqual(find(r'\N{LATIN SMALL LETTER E WITH ACUTE}tude'), 'tude')
+        self.assertEqual(find(r'(a)\1bc'), 'bc')
+
+    def test_regexp_escapes(self):
+        for pat, name in ((r'\x66oo', 'foo.py'), (r'\x41', 'A'), (r'\101', 'A'), (r'\u00e9', 'café'),
+                          (r'\N{LATIN SMALL LETTER E WITH ACUTE}', 'café'), (r'\x2epy', 'setup.py')):
+            compiled = self._pattern(pat, regexp=True)
+            self.assertTrue(compiled.match(name), 'Pattern %r does not match %r' % (pat, name))
+            self.assertEqual(match_names(compiled, [name, 'zzz']), [True, False])
+
+    def test_match_bytes(self):
+        patterns = (
+            ('abc', {}), ('*.py', {'fnmatch_end': True}), ('a?c', {}), ('GÖS', {'ignorecase': True}),
+            (r'fo+\d+bar', {'regexp': True}), ('ABC', {'ignorecase': True}), ('ac', {'fuzzy': True}),
+            ('gs', {'fuzzy': True, 'ignorecase': True}), ('ab', {'fnmatch_begin': True, 'fnmatch_end': True}),
+            (r'\N{LATIN CAPITAL LETTER O WITH DIAERESIS}', {'regexp': True}), (r'\u00d6S|a', {'regexp': True}),
+        )
+        for pat, kw in patterns:
+            compiled = self._pattern(pat, **kw)
+            for name in NAMES + ('ﬁle.py', 'ＡＢＣ'):
+                self.assertEqual(compiled.match_bytes(name.encode('utf-8')), compiled.match(normalize(name)),
+                    'Pattern %r (%s) gives different result for %r' % (pat, kw, name))
+
+    def test_match_joined(self):
+        patterns = (
+            ('abc', {}), ('*.py', {}), ('*.py', {'fnmatch_end': True}), ('a?c', {}), ('[!x]bc', {}),
+            ('ab', {'fnmatch_begin': True}), ('abc', {'ignorecase': True}), ('', {}), ('*', {}),
+            (r'fo+\d+bar', {'regexp': True}), (r'^a.*b$', {'regexp': True}), (r'a\Z', {'regexp': True}),
+            (r'(?=a)ab', {'regexp': True}), (r'a\sb', {'regexp': True}), ('ac', {'fuzzy': True}),
+        )
+        ## names with new line can't be split in joined buffer, so are matched one by one
+        for names in (NAMES, NAMES + ('a\nb', 'x\n'), ('x', 'bc', 'a') * 3, ()):
+            for pat, kw in patterns:
+                compiled = self._pattern(pat, **kw)
+                self.assertEqual(match_names(compiled, names), [bool(compiled.match(name)) for name in names],
+                    'Pattern %r (%s) gives different result for %r' % (pat, kw, names))
+
+    def test_match_joined_base(self):
+        compiled = self._pattern('*.py', fnmatch_end=True)
+        buffer = 'skipped\nsetup.py\nx.txt\n.py'
+        starts = [8, 17, 23]
+        self.assertEqual(compiled.match_joined(buffer[8:], starts, base=8), [0, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+from test_manager import *
+
+from ff import pattern
+
+from test_pattern_match import match_names
+
+
+NAMES = (
+    '', 'a', 'abc', 'xabcx', 'ABC', 'setup.py', 'setup.pyc', 'README.md', 'Makefile', 'foo123bar',
+    'node_modules', 'x.txt', 'ążśź_GÖS', 'ushers', 'his', 'pom.xml',
+)
+
+
+def _compile(pat, **kw):
+    ret = pattern.Pattern()
+    ret.pattern = pat
+    for key, value in kw.items():
+        setattr(ret, key, value)
+    ret.compile()
+    return ret
+
+
+class TestPatternSet(unittest.TestCase):
+    def _assert_same_as_any(self, patterns):
+        pat_set = pattern.PatternSet(patterns)
+        for name in NAMES:
+            expected = [pat for pat in patterns if pat.match(name)]
+            self.assertEqual(pat_set.match(name), bool(expected),
+                'PatternSet(%s) gives different result for %r' % (pat_set, name))
+            if expected:
+                self.assertEqual(pat_set.matching(name), expected)
+
+    def test_literals(self):
+        self._assert_same_as_any([_compile('abc'), _compile('py')])
+        self._assert_same_as_any([_compile('he'), _compile('she'), _compile('his'), _compile('hers'), _compile('GÖS')])
+        self._assert_same_as_any([
+            _compile('setup', fnmatch_begin=True), _compile('.md', fnmatch_end=True),
+            _compile('Makefile', fnmatch_begin=True, fnmatch_end=True), _compile('node'),
+        ])
+
+    def test_mixed(self):
+        self._assert_same_as_any([
+            _compile('*.py', fnmatch_end=True), _compile(r'\d+', regexp=True), _compile('readme', ignorecase=True),
+            _compile('pxl', fuzzy=True), _compile('x', fnmatch_begin=True), _compile('a', regexp=True),
+            _compile('ab', regexp=True), _compile('bc', regexp=True), _compile('GS', fuzzy=True),
+            _compile(r'(a)\2', regexp=True),
+        ])
+
+    def test_inline_flags(self):
+        self._assert_same_as_any([
+            _compile('(?i)abc', regexp=True), _compile(r'\d+', regexp=True), _compile('x(?s:.)t', regexp=True),
+            _compile('(?i)readme', regexp=True),
+        ])
+
+    def test_match_joined(self):
+        pat_set = pattern.PatternSet([_compile('*.py', fnmatch_end=True), _compile(r'\d+', regexp=True), _compile('his')])
+        self.assertEqual(match_names(pat_set, NAMES), [pat_set.match(name) for name in NAMES])
+
+    def test_spans_and_score(self):
+        pat_set = pattern.PatternSet([_compile('ab'), _compile('bc'), _compile('x')])
+        self.assertEqual(pat_set.spans('xabcx'), [(0, 5)])
+        self.assertEqual(pat_set.spans('abqbc'), [(0, 2), (3, 5)])
+        self.assertEqual(pat_set.score('xabcx'), max(_compile('ab').score('xabcx'), _compile('bc').score('xabcx')))
+        self.assertIsNone(pat_set.score('qqq'))
+
+    def test_literals_special_chars(self):
+        pat_set = pattern.PatternSet([_compile('a.b'), _compile('(p)'), _compile('c+d')])
+        self.assertTrue(pat_set.match('xa.bx'))
+        self.assertTrue(pat_set.match('x(p)'))
+        self.assertTrue(pat_set.match('c+d.txt'))
+        self.assertFalse(pat_set.match('axb'))
+        self.assertFalse(pat_set.match('p'))
+        self.assertFalse(pat_set.match('ccd'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import operator
+import os
+import os.path
+import shutil
+import time
+
+from test_manager import *
+
+from ff import plugin
+from ff import predicates
+from ff import scanner
+
+
+class TestPredicatesParse(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(predicates.parse_size('10'), (operator.eq, 10))
+        self.assertEqual(predicates.parse_size('>2k'), (operator.gt, 2048))
+        self.assertEqual(predicates.parse_size('<1M'), (operator.lt, 1024 ** 2))
+        self.assertEqual(predicates.parse_size('=3g'), (operator.eq, 3 * 1024 ** 3))
+        for value in ('', 'k', '>', '10x', '>>1', '-1'):
+            self.assertRaises(predicates.PredicateError, predicates.parse_size, value)
+
+    def test_parse_time(self):
+        self.assertEqual(predicates.parse_time('30s', now=1000), 970)
+        self.assertEqual(predicates.parse_time('2h', now=10000), 10000 - 7200)
+        self.assertEqual(predicates.parse_time('1w', now=10 ** 6), 10 ** 6 - 7 * 86400)
+        self.assertEqual(predicates.parse_time('2015-01-02'), time.mktime((2015, 1, 2, 0, 0, 0, 0, 0, -1)))
+        self.assertEqual(predicates.parse_time('2015-01-02 10:20'), time.mktime((2015, 1, 2, 10, 20, 0, 0, 0, -1)))
+        self.assertEqual(predicates.parse_time(__file__), os.stat(__file__).st_mtime)
+        self.assertRaises(predicates.PredicateError, predicates.parse_time, '/not/existing/file')
+
+    def test_parse_perm(self):
+        self.assertEqual(predicates.parse_perm('644'), ('', 0o644))
+        self.assertEqual(predicates.parse_perm('-111'), ('-', 0o111))
+        self.assertEqual(predicates.parse_perm('/4000'), ('/', 0o4000))
+        for value in ('', '9', 'rwx', '/-1', '77777'):
+            self.assertRaises(predicates.PredicateError, predicates.parse_perm, value)
+
+    def test_parse_types(self):
+        self.assertEqual(predicates.parse_types('f'), set(['f']))
+        self.assertEqual(predicates.parse_types('f,l'), set(['f', 'l']))
+        self.assertRaises(predicates.PredicateError, predicates.parse_types, 'f,x')
+
+    def test_parse_user(self):
+        self.assertEqual(predicates.parse_user('123'), 123)
+        self.assertEqual(predicates.parse_group('456'), 456)
+        self.assertRaises(predicates.PredicateError, predicates.parse_user, 'ff-not-existing-user')
+
+
+class TestMetadata(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'predicates')
+        os.makedirs(os.path.join(self.root, 'dir', 'sub'))
+        os.makedirs(os.path.join(self.root, 'empty_dir'))
+        for name, size in (('empty.txt', 0), ('small.txt', 10), ('big.txt', 3000)):
+            with open(os.path.join(self.root, name), 'w') as fh:
+                fh.write('x' * size)
+        os.chmod(os.path.join(self.root, 'small.txt'), 0o640)
+        os.utime(os.path.join(self.root, 'big.txt'), (1000000000, 1000000000))
+        if hasattr(os, 'symlink'):
+            os.symlink(os.path.join(self.root, 'big.txt'), os.path.join(self.root, 'link'))
+
+        self.entries = [scanner.Entry(os.path.join(self.root, name), name, os.path.join(self.root, name), 1,
+                                      os.path.isdir(os.path.join(self.root, name)),
+                                      os.path.islink(os.path.join(self.root, name)))
+                        for name in sorted(os.listdir(self.root))]
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _names(self, **kw):
+        test = predicates.Metadata(**kw)
+        return [entry.name for entry in self.entries if test.test(entry)]
+
+    def test_no_conditions(self):
+        self.assertEqual(len(predicates.Metadata()), 0)
+        self.assertEqual(len(self._names()), len(self.entries))
+
+    def test_size(self):
+        self.assertEqual(self._names(size=(operator.gt, 100), types=set('f')), ['big.txt'])
+        self.assertEqual(self._names(size=(operator.eq, 10)), ['small.txt'])
+
+    def test_time(self):
+        self.assertEqual(self._names(older=1000000001), ['big.txt', 'link'])
+        self.assertNotIn('big.txt', self._names(newer=1000000001))
+
+    def test_types(self):
+        self.assertEqual(self._names(types=set('d')), ['dir', 'empty_dir'])
+        self.assertEqual(self._names(types=set('f')), ['big.txt', 'empty.txt', 'small.txt'])
+        if hasattr(os, 'symlink'):
+            self.assertEqual(self._names(types=set('l')), ['link'])
+
+    def test_perm(self):
+        self.assertEqual(self._names(perm=('', 0o640)), ['small.txt'])
+        self.assertIn('small.txt', self._names(perm=('-', 0o600)))
+        self.assertNotIn('small.txt', self._names(perm=('/', 0o002)))
+
+    def test_owner(self):
+        uid, gid = os.getuid(), os.getgid()
+        self.assertEqual(len(self._names(uid=uid, gid=gid)), len(self.entries))
+        self.assertEqual(self._names(uid=uid + 1), [])
+
+    def test_empty(self):
+        self.assertEqual(self._names(empty=True), ['empty.txt', 'empty_dir'])
+
+    def test_single_stat(self):
+        entry = self.entries[0]
+        calls = plugin.stat_cache.hits + plugin.stat_cache.misses
+
+        test = predicates.Metadata(size=(operator.gt, 0), older=time.time() + 10, perm=('-', 0), types=set('f'))
+        self.assertTrue(test.test(entry))
+        self.assertEqual(plugin.stat_cache.hits + plugin.stat_cache.misses, calls + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -139,7 +139,7 @@ class TestMagicPatternModifier(unittest.TestCase):
         's': 'regex_dotall',
         'r': 'invert_match',
     }
-    excluded_pattern_fields = ('pattern', 'magic_pattern', 'compilation_status')
+    excluded_pattern_fields = ('pattern', 'magic_pattern', 'compilation_status', 'matcher', 'source', 'bytes_matcher', 'batch_search')
 
     def test_modifiers_single(self):
         for modifier, selected_option_name in self.modifier_to_option.items():
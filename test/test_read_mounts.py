@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import io
+import os
+import tempfile
+
+from test_manager import *
+from ff import utils
+
+
+MOUNTINFO = '''22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw
+23 22 0:21 / /proc rw,nosuid shared:12 - proc proc rw
+24 22 0:44 / /mnt/my\\040share rw master:2 - nfs4 server:/export rw
+25 22 0:45 / /broken rw
+'''
+
+
+class TestReadMounts(unittest.TestCase):
+    def test_read(self):
+        fd, path = tempfile.mkstemp()
+        try:
+            with io.open(fd, 'w', encoding='utf-8') as fh:
+                fh.write(MOUNTINFO)
+            self.assertEqual(utils.read_mounts(path), {'/': 'ext4', '/proc': 'proc', '/mnt/my share': 'nfs4'})
+        finally:
+            os.unlink(path)
+
+    def test_not_available(self):
+        self.assertEqual(utils.read_mounts('/not/existing/mountinfo'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
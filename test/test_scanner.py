@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import os
+import os.path
+import shutil
+import threading
+
+from test_manager import *
+from mocks.input_args import InputArgsMock
+
+from ff import pattern
+from ff import scanner
+
+
+TREE = (
+    'a/a1.txt',
+    'a/b/b1.txt',
+    'a/b/c/c1.txt',
+    'a/.git/config',
+    'd/d1.log',
+    'e1.txt',
+)
+
+
+def make_tree(root, files):
+    for file_ in files:
+        path = os.path.join(root, file_)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as fh:
+            fh.write(file_)
+
+
+class TestScanner(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'scanner')
+        make_tree(self.root, TREE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _cfg(self, pat='', **kw):
+        cfg = InputArgsMock()
+        cfg.sources = [self.root]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = pat
+        cfg.pattern.compile()
+        for key, value in kw.items():
+            setattr(cfg, key, value)
+        return cfg
+
+    def _scan(self, pat='', **kw):
+        return [os.path.relpath(item.path, self.root) for item in scanner.Scanner(self._cfg(pat, **kw))]
+
+    def test_engines_return_the_same(self):
+        expected = self._scan(engine=scanner.ENGINE_WALK)
+        self.assertEqual(sorted(expected), sorted([
+            'a', 'a/a1.txt', 'a/b', 'a/b/b1.txt', 'a/b/c', 'a/b/c/c1.txt', 'd', 'd/d1.log', 'e1.txt'
+        ]))
+        self.assertEqual(self._scan(engine=scanner.ENGINE_SCANDIR), expected)
+
+    def test_order_top_down(self):
+        result = self._scan(engine=scanner.ENGINE_SCANDIR)
+        self.assertLess(result.index('a'), result.index('a/a1.txt'))
+        self.assertLess(result.index('a/a1.txt'), result.index('a/b'))
+        self.assertLess(result.index('e1.txt'), result.index('a'))
+
+    def test_depth(self):
+        for engine in scanner.ENGINES:
+            self.assertEqual(self._scan(depth=0, engine=engine), [])
+            self.assertEqual(sorted(self._scan(depth=1, engine=engine)), ['a', 'd', 'e1.txt'])
+            self.assertEqual(sorted(self._scan(depth=2, mode=scanner.MODE_FILES, engine=engine)),
+                             ['a/a1.txt', 'd/d1.log', 'e1.txt'])
+
+    def test_depth_not_listed(self):
+        cfg = self._cfg(depth=2)
+        listed = []
+        scan = scanner.Scanner(cfg)
+        list_dir = scan._list_dir_scandir
+        scan._list_dir_scandir = lambda parent: listed.append(os.path.relpath(parent.path, self.root)) or list_dir(parent)
+
+        list(scan)
+        self.assertEqual(sorted(listed), ['.', 'a', 'd'])
+
+    def test_min_depth(self):
+        for order in scanner.ORDERS:
+            self.assertEqual(sorted(self._scan(min_depth=3, order=order)), ['a/b/b1.txt', 'a/b/c', 'a/b/c/c1.txt'])
+            self.assertEqual(sorted(self._scan(min_depth=2, depth=2, order=order)), ['a/a1.txt', 'a/b', 'd/d1.log'])
+        self.assertEqual(self._scan(min_depth=1), self._scan())
+
+    def test_mode(self):
+        for engine in scanner.ENGINES:
+            self.assertEqual(sorted(self._scan(mode=scanner.MODE_DIRS, engine=engine)), ['a', 'a/b', 'a/b/c', 'd'])
+
+    def test_vcs(self):
+        result = self._scan(include_vcs=True)
+        self.assertIn('a/.git', result)
+        self.assertIn('a/.git/config', result)
+
+    def test_entry_type(self):
+        cfg = InputArgsMock()
+        cfg.sources = [self.root]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = '1'
+        cfg.pattern.compile()
+
+        for engine in scanner.ENGINES:
+            cfg.engine = engine
+            for item in scanner.Scanner(cfg):
+                self.assertFalse(item.is_dir())
+                self.assertEqual(item.size, len(os.path.relpath(item.path, self.root)))
+
+    def test_sort_by_score(self):
+        result = self._scan('1', sort_by_score=True)
+        self.assertEqual(result[0], 'e1.txt')
+        self.assertEqual(sorted(result), sorted(self._scan('1')))
+
+        self.assertEqual(self._scan('a/b/b', sort_by_score=True, path_search=True)[0], 'a/b/b1.txt')
+
+    def test_excluded_paths(self):
+        excluded = [os.path.join(self.root, 'a', 'b'), os.path.join(self.root, 'e1.txt')]
+        expected = ['a', 'a/a1.txt', 'd', 'd/d1.log']
+        for jobs in (1, 3):
+            self.assertEqual(sorted(self._scan(excluded_paths=excluded, jobs=jobs)), expected)
+
+    def test_excluded_paths_are_not_listed(self):
+        cfg = InputArgsMock()
+        cfg.sources = [self.root]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = ''
+        cfg.pattern.compile()
+        cfg.excluded_paths = [os.path.join(self.root, 'a')]
+
+        listed = []
+        scan = scanner.Scanner(cfg)
+        list_dir = scan._list_dir_scandir
+        scan._list_dir_scandir = lambda parent: listed.append(parent.path) or list_dir(parent)
+
+        self.assertEqual(sorted(os.path.relpath(item.path, self.root) for item in scan), ['d', 'd/d1.log', 'e1.txt'])
+        self.assertEqual(sorted(listed), [self.root, os.path.join(self.root, 'd')])
+
+    def test_respect_ignore(self):
+        make_tree(self.root, ('.gitignore', 'd/.ffignore'))
+        with open(os.path.join(self.root, '.gitignore'), 'w') as fh:
+            fh.write('b/\n*.log\n')
+        with open(os.path.join(self.root, 'd', '.ffignore'), 'w') as fh:
+            fh.write('!d1.log\n')
+
+        expected = ['.gitignore', 'a', 'a/a1.txt', 'd', 'd/.ffignore', 'd/d1.log', 'e1.txt']
+        self.assertEqual(sorted(self._scan(respect_ignore=True)), expected)
+        self.assertEqual(sorted(self._scan(respect_ignore=True, bytes_mode=True)), expected)
+        self.assertEqual(sorted(self._scan(respect_ignore=True, jobs=3)), expected)
+        for order in scanner.ORDERS:
+            self.assertEqual(sorted(self._scan(respect_ignore=True, order=order)), expected)
+        self.assertIn('a/b/b1.txt', self._scan())
+
+    def test_respect_ignore_not_listed(self):
+        make_tree(self.root, ('.ignore', ))
+        with open(os.path.join(self.root, '.ignore'), 'w') as fh:
+            fh.write('/a\n')
+
+        listed = []
+        scan = scanner.Scanner(self._cfg(respect_ignore=True))
+        list_dir = scan._list_dir_scandir
+        scan._list_dir_scandir = lambda parent: listed.append(parent.path) or list_dir(parent)
+
+        self.assertEqual(sorted(os.path.relpath(item.path, self.root) for item in scan),
+                         ['.ignore', 'd', 'd/d1.log', 'e1.txt'])
+        self.assertEqual(sorted(listed), [self.root, os.path.join(self.root, 'd')])
+
+    def test_follow_symlinks(self):
+        os.symlink(os.path.join(self.root, 'd'), os.path.join(self.root, 'a', 'link'))
+        ## loop: points to one of parents
+        os.symlink(os.path.join(self.root, 'a'), os.path.join(self.root, 'a', 'b', 'loop'))
+
+        result = self._scan()
+        self.assertIn('a/link', result)
+        self.assertNotIn('a/link/d1.log', result)
+
+        for kw in ({}, {'jobs': 3}, {'order': scanner.ORDER_BFS}, {'bytes_mode': True}):
+            result = self._scan(follow_symlinks=True, **kw)
+            self.assertIn('a/link/d1.log', result)
+            self.assertIn('a/b/loop', result)
+            self.assertNotIn('a/b/loop/a1.txt', result)
+
+    def test_xdev(self):
+        for jobs in (1, 3):
+            self.assertEqual(sorted(self._scan(xdev=True, jobs=jobs)), sorted(self._scan()))
+
+        scan = scanner.Scanner(self._cfg(xdev=True))
+        root = scan._root_entry(self.root)
+        files, dirs = scan._expand(root, scan._get_list_dir())
+        self.assertTrue(all(entry.descend and entry.fs_id[0] == root.fs_id[0] for entry in dirs))
+
+        ## directories on other device are reported, but not listed
+        root.fs_id = (root.fs_id[0] + 1, root.fs_id[1])
+        files, dirs = scan._expand(root, scan._get_list_dir())
+        self.assertEqual(sorted(entry.name for entry in dirs), ['a', 'd'])
+        self.assertFalse(any(scan._can_descend(entry) for entry in dirs))
+
+    def test_skipped_mounts(self):
+        scan = scanner.Scanner(self._cfg())
+        scan.skipped_mounts = set([os.path.join(self.root, 'a')])
+
+        self.assertEqual(sorted(os.path.relpath(item.path, self.root) for item in scan), ['a', 'd', 'd/d1.log', 'e1.txt'])
+
+    def test_parallel_unordered(self):
+        expected = sorted(self._scan())
+        for engine in scanner.ENGINES:
+            self.assertEqual(sorted(self._scan(jobs=4, engine=engine)), expected)
+
+    def test_parallel_ordered(self):
+        expected = self._scan()
+        self.assertEqual(self._scan(jobs=4, ordered=True), expected)
+
+    def test_parallel_depth_and_vcs(self):
+        self.assertEqual(sorted(self._scan(jobs=3, depth=2)), sorted(self._scan(depth=2)))
+        self.assertEqual(sorted(self._scan(jobs=3, include_vcs=True)), sorted(self._scan(include_vcs=True)))
+        self.assertEqual(self._scan(jobs=3, ordered=True, mode=scanner.MODE_DIRS),
+                         self._scan(mode=scanner.MODE_DIRS))
+
+    def test_parallel_multiple_sources(self):
+        cfg = InputArgsMock()
+        cfg.sources = [os.path.join(self.root, 'a'), os.path.join(self.root, 'd')]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = ''
+        cfg.pattern.compile()
+        expected = [item.path for item in scanner.Scanner(cfg)]
+
+        cfg.jobs = 2
+        cfg.ordered = True
+        self.assertEqual([item.path for item in scanner.Scanner(cfg)], expected)
+
+    def test_order_bfs(self):
+        expected = sorted(self._scan())
+        for order in (scanner.ORDER_BFS, scanner.ORDER_DEEPENING):
+            for engine in scanner.ENGINES:
+                result = self._scan(order=order, engine=engine)
+                self.assertEqual(sorted(result), expected)
+
+                depths = [path.count('/') for path in result]
+                self.assertEqual(depths, sorted(depths))
+
+        self.assertEqual(self._scan(order=scanner.ORDER_DEEPENING), self._scan(order=scanner.ORDER_BFS))
+
+    def test_order_bfs_options(self):
+        for order in (scanner.ORDER_BFS, scanner.ORDER_DEEPENING):
+            self.assertEqual(sorted(self._scan(order=order, depth=2)), sorted(self._scan(depth=2)))
+            self.assertEqual(sorted(self._scan(order=order, mode=scanner.MODE_DIRS)),
+                             sorted(self._scan(mode=scanner.MODE_DIRS)))
+            self.assertEqual(sorted(self._scan(order=order, include_vcs=True)), sorted(self._scan(include_vcs=True)))
+            self.assertEqual(self._scan('1', order=order, mode=scanner.MODE_FILES)[0], 'e1.txt')
+
+    def test_order_bfs_parallel(self):
+        expected = self._scan(order=scanner.ORDER_BFS)
+        self.assertEqual(self._scan(order=scanner.ORDER_BFS, jobs=3), expected)
+        self.assertEqual(self._scan(order=scanner.ORDER_DEEPENING, jobs=3), expected)
+
+    def test_parallel_close(self):
+        threads = threading.active_count()
+        for ordered in (False, True):
+            items = iter(scanner.Scanner(self._cfg(jobs=3, ordered=ordered)))
+            next(items)
+            items.close()
+            self.assertEqual(threading.active_count(), threads)
+
+    def test_tests(self):
+        class SizeTest(object):
+            def __init__(self, size, has_batch=False):
+                self.size = size
+                self.has_batch = has_batch
+                self.batches = []
+
+            def test(self, entry):
+                return entry.size > self.size
+
+            def test_batch(self, entries):
+                self.batches.append(len(entries))
+                return [self.test(entry) for entry in entries]
+
+        ## file content is its path, so size is the length of path
+        self.assertEqual(sorted(self._scan('.txt', tests=[SizeTest(8), SizeTest(0)])), ['a/b/b1.txt', 'a/b/c/c1.txt'])
+
+        tests = [SizeTest(8, has_batch=True), SizeTest(10, has_batch=True)]
+        self.assertEqual(self._scan('.txt', tests=tests), ['a/b/c/c1.txt'])
+        self.assertEqual(tests[0].batches, [4])
+        self.assertEqual(tests[1].batches, [2])
+
+    def test_bytes_mode(self):
+        for engine in scanner.ENGINES:
+            for pat in ('', '1', 'b*.txt', 'a/b', 'zażółć'):
+                for path_search in (False, True):
+                    self.assertEqual(self._scan(pat, bytes_mode=True, engine=engine, path_search=path_search),
+                                     self._scan(pat, engine=engine, path_search=path_search))
+
+        self.assertEqual(self._scan(bytes_mode=True, include_vcs=True), self._scan(include_vcs=True))
+        self.assertEqual(sorted(self._scan(bytes_mode=True, jobs=3)), sorted(self._scan()))
+
+    def test_bytes_mode_non_ascii(self):
+        make_tree(self.root, ('ｆｕｌｌ/ﬁle.txt', 'zażółć.txt'))
+        for pat in ('file', 'full/', 'ż', '*ółć*'):
+            self.assertEqual(self._scan(pat, bytes_mode=True, path_search=True), self._scan(pat, path_search=True))
+
+        ## names are normalized before matching, like in default mode
+        self.assertEqual(self._scan('file', bytes_mode=True), ['full/file.txt'])
+        self.assertEqual(self._scan('?a?ó*', bytes_mode=True), ['zażółć.txt'])
+
+    def test_bytes_entry(self):
+        entry = scanner.BytesEntry(b'name.txt', os.path.join(self.root.encode('utf-8'), b'name.txt'), 1, False)
+        self.assertEqual(entry.name, 'name.txt')
+        self.assertEqual(entry.path, os.path.join(self.root, 'name.txt'))
+
+        child = entry.child(b'x', b'/x', False)
+        self.assertIsInstance(child, scanner.BytesEntry)
+        self.assertEqual(child.depth, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import io
+import os
+import os.path
+import shutil
+import threading
+import time
+
+from test_manager import *
+from mocks.input_args import InputArgsMock
+
+from ff import pattern
+from ff import plugin
+from ff import scanner
+from ff import server
+from ff.config import Config
+
+from test_scanner import TREE, make_tree
+
+
+class TestMemoryTree(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'server')
+        make_tree(self.root, TREE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _scan(self, index=None):
+        cfg = InputArgsMock()
+        cfg.sources = [self.root]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = ''
+        cfg.pattern.compile()
+        cfg.index = index
+        return [item.path for item in scanner.Scanner(cfg)]
+
+    def test_non_ascii_names(self):
+        make_tree(self.root, ('zażółć/ﬁle.txt', ))
+        tree = server.MemoryTree()
+        tree.update(self.root)
+        self.assertEqual(self._scan(tree), self._scan())
+        self.assertIn(('file.txt', 'ﬁle.txt', False, False), tree.list_dir(os.path.join(self.root, 'zażółć')))
+
+    def test_the_same_as_filesystem(self):
+        tree = server.MemoryTree()
+        self.assertEqual(tree.update(self.root), 6)
+        self.assertTrue(tree.has_dir(os.path.join(self.root, 'a', 'b')))
+        self.assertFalse(tree.has_dir(os.path.join(self.root, 'e1.txt')))
+        self.assertEqual(self._scan(tree), self._scan())
+
+    def test_update(self):
+        tree = server.MemoryTree()
+        tree.update(self.root)
+        ## nothing changed
+        self.assertEqual(tree.update(self.root), 0)
+
+        shutil.rmtree(os.path.join(self.root, 'a', 'b'))
+        make_tree(self.root, ('d/e/e1.txt', ))
+        tree.update(os.path.join(self.root, 'a'), recursive=False, force=True)
+        tree.update(os.path.join(self.root, 'd'), recursive=False, force=True)
+
+        self.assertFalse(tree.has_dir(os.path.join(self.root, 'a', 'b', 'c')))
+        self.assertTrue(tree.has_dir(os.path.join(self.root, 'd', 'e')))
+        self.assertEqual(self._scan(tree), self._scan())
+
+    def test_callbacks(self):
+        listed, removed = [], []
+        tree = server.MemoryTree(listed.append, removed.append)
+        tree.update(self.root)
+        self.assertEqual(len(listed), 6)
+
+        shutil.rmtree(os.path.join(self.root, 'a', 'b'))
+        tree.update(self.root)
+        self.assertEqual(sorted(removed), [os.path.join(self.root, 'a', 'b'), os.path.join(self.root, 'a', 'b', 'c')])
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'server')
+        make_tree(self.root, TREE)
+        self.socket = os.path.join(self.root, 'ff.sock')
+
+        self.server = server.Server(Config(), [self.root], self.socket)
+        self.thread = threading.Thread(target=self.server.serve, kwargs={'verbose': False})
+        self.thread.daemon = True
+        self.thread.start()
+        for _ in range(100):
+            if os.path.exists(self.socket):
+                break
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.server.stop()
+        self.thread.join()
+        shutil.rmtree(self.root)
+
+    def _query(self, *argv):
+        stdout, stderr = io.BytesIO(), io.StringIO()
+        code = server.query(self.socket, list(argv), self.root, stdout, stderr)
+        return code, stdout.getvalue().decode('utf-8').splitlines(), stderr.getvalue()
+
+    def test_query(self):
+        code, lines, errors = self._query('-m', 'files', '.txt')
+        self.assertEqual(code, 0)
+        self.assertEqual(errors, '')
+        self.assertEqual(sorted(lines), sorted(os.path.join(self.root, path) for path in TREE if path.endswith('.txt')
+                                               and '.git' not in path))
+
+    def test_query_relative_source(self):
+        code, lines, _ = self._query('-m', 'files', '1', 'a/b')
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(lines), [os.path.join(self.root, 'a', 'b', 'b1.txt'),
+                                         os.path.join(self.root, 'a', 'b', 'c', 'c1.txt')])
+
+    def test_query_errors(self):
+        code, lines, errors = self._query('x', 'not_existing')
+        self.assertEqual(code, 0)
+        self.assertEqual(lines, [])
+        self.assertIn('not_existing', errors)
+
+        code, _, errors = self._query('--test', 'not_existing_plugin', 'x')
+        self.assertEqual(code, 1)
+        self.assertIn('not_existing_plugin', errors)
+
+    def test_invalid_arguments(self):
+        code, _, errors = self._query('--depth', 'x', 'y')
+        self.assertEqual(code, 2)
+        self.assertIn("argument --depth/-D: invalid int value: 'x'", errors)
+
+        code, _, errors = self._query('--plugins-path', self.root, 'y')
+        self.assertEqual(code, 2)
+        self.assertIn('--plugins-path', errors)
+
+    def test_metadata_is_not_stale(self):
+        code, lines, _ = self._query('--size', '>100', 'e1')
+        self.assertEqual((code, lines), (0, []))
+        with open(os.path.join(self.root, 'e1.txt'), 'w') as fh:
+            fh.write('x' * 200)
+        code, lines, _ = self._query('--size', '>100', 'e1')
+        self.assertEqual((code, lines), (0, [os.path.join(self.root, 'e1.txt')]))
+
+    def test_modified_item_removed_from_stat_cache(self):
+        if self.server.watcher.inotify is None:
+            self.skipTest('inotify is not available')
+
+        path = os.path.join(self.root, 'e1.txt')
+        plugin.stat_cache.stat(path)
+        with open(path, 'a') as fh:
+            fh.write('x')
+        for _ in range(200):
+            if path not in plugin.stat_cache:
+                break
+            time.sleep(0.01)
+        self.assertNotIn(path, plugin.stat_cache)
+
+    def test_already_running(self):
+        other = server.Server(Config(), [self.root], self.socket)
+        with self.assertRaises(OSError):
+            other.serve(verbose=False)
+        ## first server still answers
+        self.assertEqual(self._query('e1')[:2], (0, [os.path.join(self.root, 'e1.txt')]))
+
+    def test_not_running(self):
+        self.assertIsNone(server.query(self.socket + '.none', ['x'], self.root, io.BytesIO(), io.StringIO()))
+
+    def test_tree_is_updated(self):
+        if self.server.watcher.inotify is None:
+            self.skipTest('inotify is not available')
+
+        make_tree(self.root, ('a/new/new.txt', ))
+        for _ in range(200):
+            _, lines, _ = self._query('new.txt')
+            if lines:
+                break
+            time.sleep(0.01)
+        self.assertEqual(lines, [os.path.join(self.root, 'a', 'new', 'new.txt')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import os
+import os.path
+
+from test_manager import *
+
+from ff import plugin
+
+
+class TestStatCache(unittest.TestCase):
+    def setUp(self):
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'ff_stat_cache_%d.txt' % i)
+            with open(path, 'w') as fh:
+                fh.write('x' * i)
+            self.paths.append(path)
+
+    def tearDown(self):
+        for path in self.paths:
+            os.unlink(path)
+
+    def test_hits_and_misses(self):
+        cache = plugin.StatCache(max_size=10)
+        self.assertEqual(cache.stat(self.paths[1]).st_size, 1)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        self.assertEqual(cache.stat(self.paths[1]).st_size, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_lru(self):
+        cache = plugin.StatCache(max_size=2)
+        cache.stat(self.paths[0])
+        cache.stat(self.paths[1])
+        cache.stat(self.paths[0])
+        cache.stat(self.paths[2])
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn(self.paths[0], cache)
+        self.assertNotIn(self.paths[1], cache)
+        self.assertIn(self.paths[2], cache)
+
+    def test_missing_file(self):
+        cache = plugin.StatCache()
+        self.assertRaises(OSError, cache.stat, self.paths[0] + '.missing')
+        self.assertEqual(len(cache), 0)
+
+    def test_put(self):
+        cache = plugin.StatCache()
+        result = os.stat(self.paths[2])
+        cache.put('/not/existing', result)
+        self.assertIs(cache.stat('/not/existing'), result)
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
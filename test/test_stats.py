@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import json
+import os
+import os.path
+import shutil
+
+from test_manager import *
+from mocks.input_args import InputArgsMock
+
+from ff import evaluator
+from ff import pattern
+from ff import scanner
+from ff.stats import Stats
+
+from test_scanner import TREE, make_tree
+
+
+class NamedCheck(object):
+    has_batch = False
+
+    def __init__(self, name, check):
+        self.name = name
+        self.argument = None
+        self.check = check
+
+    def test(self, entry):
+        return self.check(entry)
+
+
+class TestStats(unittest.TestCase):
+    def test_stage(self):
+        stats = Stats()
+        items = stats.stage('walk', range(10))
+        items = stats.stage('match', (x for x in items if x % 2))
+        self.assertEqual(list(items), [1, 3, 5, 7, 9])
+        self.assertEqual((stats.counters['walk'], stats.counters['match']), (10, 5))
+        self.assertTrue(stats.times['walk'] >= 0 and stats.times['match'] >= 0)
+
+    def test_timed_nested(self):
+        stats = Stats()
+        inner = stats.timed('exec', lambda x: x * 2)
+        outer = stats.timed('output', lambda x: inner(x) + 1)
+        self.assertEqual([outer(x) for x in range(3)], [1, 3, 5])
+        self.assertEqual((stats.counters['output'], stats.counters['exec']), (3, 3))
+        self.assertTrue(stats.times['output'] >= 0 and stats.times['exec'] >= 0)
+
+    def test_format(self):
+        stats = Stats()
+        tests = evaluator.AllOf([
+            NamedCheck('size', lambda x: x > 1),
+            evaluator.AnyOf([evaluator.Not(NamedCheck('perm', lambda x: x % 2))]),
+        ], adaptive=False)
+        for x in range(4):
+            tests.test(x)
+
+        report = json.loads(stats.format(tests, 'json'))
+        self.assertEqual([(test['name'], test['calls'], test['passed']) for test in report['tests']],
+                         [('size', 4, 2), ('anyof', 2, 1), ('anyof / not perm', 2, 1)])
+        self.assertIn('directories listed:', stats.format(tests))
+
+
+class TestScannerStats(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'stats')
+        make_tree(self.root, TREE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _stats(self, pat='', **kw):
+        cfg = InputArgsMock()
+        cfg.sources = [self.root]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = pat
+        cfg.pattern.compile()
+        cfg.stats = Stats()
+        for key, value in kw.items():
+            setattr(cfg, key, value)
+        found = list(scanner.Scanner(cfg))
+        return found, cfg.stats.report()['counters']
+
+    def test_counters(self):
+        found, counters = self._stats('1.txt', excluded_paths=[os.path.join(self.root, 'a', 'b', 'c')])
+        self.assertEqual(len(found), 3)
+        self.assertEqual(counters['dirs_listed'], 4)
+        ## root: a, d, e1.txt; a: a1.txt, b, .git; b: b1.txt, c; d: d1.log
+        self.assertEqual(counters['entries_seen'], 9)
+        self.assertEqual(counters['entries_excluded'], 1)
+        self.assertEqual(counters['dirs_vcs'], 1)
+        self.assertEqual(counters['walk'], 7)
+        self.assertEqual(counters['match'], 3)
+
+    def test_depth_pruned(self):
+        _, counters = self._stats(depth=1)
+        self.assertEqual(counters['dirs_listed'], 1)
+        self.assertEqual(counters['dirs_pruned'], 2)
+
+    def test_deepening_pruned(self):
+        ## symlink near to root is not followed, but is checked in every pass
+        os.symlink(os.path.join(self.root, 'a', 'b'), os.path.join(self.root, 'link'))
+        for depth in (-1, 1, 2):
+            _, counters = self._stats(depth=depth, order=scanner.ORDER_DEEPENING)
+            _, expected = self._stats(depth=depth)
+            self.assertEqual(counters['dirs_pruned'], expected['dirs_pruned'])
+
+    def test_parallel(self):
+        _, counters = self._stats(jobs=3)
+        _, expected = self._stats()
+        self.assertEqual(counters, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, unicode_literals, division
+
+import os
+import os.path
+import shutil
+
+from test_manager import *
+from mocks.input_args import InputArgsMock
+
+from ff import cli
+from ff import pattern
+from ff import scanner
+from ff.index import Index
+from ff import tree as tree_module
+from ff.tree import CompactTree
+
+from test_scanner import TREE, make_tree
+
+
+def _config(index, sources):
+    cfg = InputArgsMock()
+    cfg.sources = sources
+    cfg.pattern = pattern.Pattern()
+    cfg.pattern.compile()
+    cfg.index = index
+    return cfg
+
+
+class TestCompactTree(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'tree')
+        make_tree(self.root, TREE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _scan(self, index=None, pat='', **kw):
+        cfg = InputArgsMock()
+        cfg.sources = [self.root]
+        cfg.pattern = pattern.Pattern()
+        cfg.pattern.pattern = pat
+        cfg.pattern.compile()
+        cfg.index = index
+        for key, value in kw.items():
+            setattr(cfg, key, value)
+        return sorted(item.path for item in scanner.Scanner(cfg))
+
+    def test_build(self):
+        tree = CompactTree.build([self.root])
+        ## root, 3 items inside, and content of a (3), a/b (2), a/b/c (1), a/.git (1) and d (1)
+        self.assertEqual(len(tree), 12)
+        self.assertEqual(tree.path(0), self.root)
+        self.assertEqual(sorted(tree.path(i) for i in tree.children(0)),
+                         [os.path.join(self.root, name) for name in ('a', 'd', 'e1.txt')])
+        self.assertGreater(tree.memory_size(), 0)
+
+    def test_find(self):
+        tree = CompactTree.build([self.root])
+        self.assertTrue(tree.has_dir(self.root))
+        self.assertTrue(tree.has_dir(os.path.join(self.root, 'a', 'b', 'c')))
+        self.assertFalse(tree.has_dir(os.path.join(self.root, 'e1.txt')))
+        self.assertFalse(tree.has_dir(os.path.join(self.root, 'x')))
+
+        i = tree.find(os.path.join(self.root, 'a', 'b', 'b1.txt'))
+        self.assertEqual(tree.path(i), os.path.join(self.root, 'a', 'b', 'b1.txt'))
+        self.assertFalse(tree.is_dir(i))
+        self.assertFalse(tree.is_symlink(i))
+
+        self.assertEqual(tree.list_dir(os.path.join(self.root, 'a', 'b')),
+                         [('b1.txt', None, False, False), ('c', None, True, False)])
+
+    def test_stat(self):
+        tree = CompactTree.build([self.root], with_stat=True)
+        i = tree.find(os.path.join(self.root, 'd', 'd1.log'))
+        self.assertEqual(tree.sizes[i], len('d/d1.log'))
+        self.assertEqual(tree.mtimes[i], os.stat(os.path.join(self.root, 'd', 'd1.log')).st_mtime)
+        self.assertIsNone(CompactTree.build([self.root]).sizes)
+
+    def test_scanner(self):
+        tree = CompactTree.build([self.root])
+        self.assertEqual(self._scan(tree), self._scan())
+        self.assertEqual(self._scan(tree, include_vcs=True, depth=2), self._scan(include_vcs=True, depth=2))
+
+    def test_match(self):
+        tree = CompactTree.build([self.root])
+        pat = pattern.Pattern()
+        pat.pattern = '1.txt'
+        pat.compile()
+        self.assertEqual(sorted(tree.path(i) for i in tree.match(pat)),
+                         sorted(os.path.join(self.root, path) for path in TREE if path.endswith('1.txt')))
+
+        pat = pattern.Pattern()
+        pat.pattern = 'b/b'
+        pat.compile()
+        self.assertEqual([tree.path(i) for i in tree.match(pat, path_search=True)],
+                         [os.path.join(self.root, 'a', 'b', 'b1.txt')])
+
+    def test_match_blocks(self):
+        tree = CompactTree.build([self.root])
+        pat = pattern.Pattern()
+        pat.pattern = '*.txt'
+        pat.fnmatch_end = True
+        pat.compile()
+        expected = [i for i in range(1, len(tree)) if pat.match_bytes(tree.name(i))]
+        self.assertEqual(list(tree.match(pat)), expected)
+
+        old_block = tree_module._MATCH_BLOCK
+        tree_module._MATCH_BLOCK = 3
+        try:
+            self.assertEqual(list(tree.match(pat)), expected)
+        finally:
+            tree_module._MATCH_BLOCK = old_block
+
+    def test_from_index(self):
+        index_path = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'tree.sqlite')
+        index = Index(index_path, create=True)
+        try:
+            index.update(self.root)
+            tree = CompactTree.from_index(index, [self.root, os.path.join(self.root, 'not_indexed')])
+        finally:
+            index.close()
+            os.unlink(index_path)
+
+        expected = CompactTree.build([self.root])
+        self.assertEqual([tree.path(i) for i in range(len(tree))], [expected.path(i) for i in range(len(expected))])
+
+    def test_load_index(self):
+        index_path = os.path.join(os.path.abspath(PLAYGROUND_PATH), 'tree.sqlite')
+        index = Index(index_path, create=True)
+        try:
+            index.update(self.root)
+        finally:
+            index.close()
+
+        try:
+            tree = cli.load_index(index_path, [self.root])
+        finally:
+            os.unlink(index_path)
+
+        self.assertIsInstance(tree, CompactTree)
+        self.assertEqual(self._scan(tree), self._scan())
+        self.assertEqual(self._scan(tree, '1'), self._scan(pat='1'))
+        self.assertEqual(self._scan(tree, depth=1), self._scan(depth=1))
+
+    def _scan_ordered(self, tree, pat, walk=False, **kw):
+        cfg = InputArgsMock()
+        cfg.sources = kw.pop('sources', [self.root])
+        cfg.pattern = pattern.PatternSet(pat) if isinstance(pat, list) else pat
+        cfg.index = tree
+        for key, value in kw.items():
+            setattr(cfg, key, value)
+        scn = scanner.Scanner(cfg)
+        if walk:
+            scn._can_match_tree = lambda sources: False
+        return [(item.path, item.name, item.fs_path, item.depth, item.is_dir(), item.patterns) for item in scn]
+
+    def test_scanner_match_tree(self):
+        make_tree(self.root, ('a/b/x1.txt', 'a/.svn/s1', 'ząb/żółw1.txt', 'f/g/h/1', 'f/g1/x', 'f1/.git'))
+        tree = CompactTree.build([self.root])
+        ## directories are not listed, names are matched at once
+        tree.list_dir = None
+
+        one = pattern.Pattern()
+        one.pattern = '1'
+        one.compile()
+        many = [pattern.Pattern(), pattern.Pattern()]
+        many[0].pattern, many[1].pattern, many[1].regexp = 'b', r'^\.|1$', True
+        for pat in many:
+            pat.compile()
+        options = (
+            {}, {'mode': scanner.MODE_FILES}, {'mode': scanner.MODE_DIRS}, {'depth': 2}, {'min_depth': 2},
+            {'include_vcs': True}, {'path_search': True}, {'excluded_paths': [os.path.join(self.root, 'a', 'b')]},
+            {'sources': [os.path.join(self.root, 'f'), os.path.join(self.root, 'a')]},
+        )
+        for pat in (one, many):
+            for order in scanner.ORDERS:
+                for kw in options:
+                    found = self._scan_ordered(tree, pat, order=order, **kw)
+                    walk_tree = CompactTree.build([self.root])
+                    self.assertEqual(found, self._scan_ordered(walk_tree, pat, walk=True, order=order, **kw),
+                                     'different results for %s, %s' % (order, kw))
+                    self.assertTrue(found or kw.get('mode') == scanner.MODE_DIRS)
+
+    def test_scanner_match_joined(self):
+        class CountingPattern(pattern.Pattern):
+            joined = 0
+
+            def match_joined(self, buffer, starts, base=0):
+                CountingPattern.joined += 1
+                return super(CountingPattern, self).match_joined(buffer, starts, base)
+
+        cfg = _config(CompactTree.build([self.root]), [self.root])
+        cfg.pattern = CountingPattern()
+        cfg.pattern.pattern = '1'
+        cfg.pattern.compile()
+        found = sorted(item.path for item in scanner.Scanner(cfg))
+        ## names in index are matched in blocks, not one by one
+        self.assertGreater(CountingPattern.joined, 0)
+        self.assertEqual(found, self._scan(pat='1'))
+
+    def test_scanner_match_tree_fallback(self):
+        tree = CompactTree.build([self.root])
+        ## nested sources: items would be reported twice
+        sources = [self.root, os.path.join(self.root, 'a')]
+        self.assertFalse(scanner.Scanner(_config(tree, sources))._can_match_tree(sources))
+        cfg = _config(tree, [self.root])
+        cfg.invert_match = True
+        self.assertFalse(scanner.Scanner(cfg)._can_match_tree([self.root]))
+        self.assertTrue(scanner.Scanner(_config(tree, [self.root]))._can_match_tree([self.root]))
+        self.assertFalse(scanner.Scanner(_config(None, [self.root]))._can_match_tree([self.root]))
+
+    def test_load_missing_index(self):
+        with self.assertRaises(cli.FFIndexError):
+            cli.load_index(os.path.join(self.root, 'missing.sqlite'), [self.root])
+
+
+if __name__ == '__main__':
+    unittest.main()